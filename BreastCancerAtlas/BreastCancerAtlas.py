@@ -1,6 +1,22 @@
+import collections
+import contextlib
+import csv
+import functools
+import gzip
+import hashlib
+import json
 import logging
 import os
-
+import re
+import shutil
+import sys
+import time
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import numpy as np
+import qt
 import vtk
 
 import slicer
@@ -31,2685 +47,1469 @@ class BreastCancerAtlas(ScriptedLoadableModule):
 # Register sample data sets in Sample Data module
 #
 
+ATLAS_SCENE_PATH = os.path.join(os.path.dirname(__file__), 'Resources/Atlas/slicer_scene_for_module.mrb')
+
+# Statistics tables of the atlas as a gzipped JSON side file (see BreastCancerAtlasLogic.writeStatisticsFile).
+# When it is shipped the table stages of the scene are not loaded and the tables are only created when shown.
+ATLAS_STATISTICS_PATH = os.path.join(os.path.dirname(__file__), 'Resources/Atlas/statistics.json.gz')
+
+# Probability index of the atlas (see BreastCancerAtlasLogic.buildProbabilityIndex) as a binary file mapped with
+# numpy.memmap, so that the statistics are not parsed from the table cells. The file is little-endian:
+# - a STATISTICS_BINARY_HEADER of 16 bytes: the magic b'BCASTAT2', the number of statistical analyses, sides,
+#   breast regions and SLN fields as uint8, and 4 reserved bytes
+# - fieldGivenRegion then regionGivenField, each an array of STATISTICS_RECORD of shape
+#   (analysis, side, breast region, SLN field) in the order of STATISTICS_METHODS, ATLAS_SIDES, the region number
+#   and the fields of NodeRoles.json
+# A record of 64 bytes holds the estimate, CI low and CI high in percent as float64 (NaN where missing), the status
+# of the table cell as uint8 (one of STATISTICS_CELL_STATUS), 7 reserved bytes and the control point label as up to
+# 32 bytes of UTF-8 padded with zeros. The label is stored as parsed from the cell (e.g. "23%", "<1%", "N/A%").
+ATLAS_STATISTICS_BINARY_PATH = os.path.join(os.path.dirname(__file__), 'Resources/Atlas/statistics.bin')
+STATISTICS_BINARY_MAGIC = b'BCASTAT2'
+STATISTICS_BINARY_HEADER = np.dtype([('magic', 'S8'), ('methods', 'u1'), ('sides', 'u1'), ('regions', 'u1'),
+                                     ('fields', 'u1'), ('reserved', 'V4')])
+STATISTICS_RECORD = np.dtype([('values', '<f8', (3,)), ('status', 'u1'), ('reserved', 'V7'), ('label', 'S32')])
+# empty cell (no label), probability estimate, text which is not a probability (shown as is, without values)
+STATISTICS_CELL_STATUS = ['empty', 'probability', 'text']
+
+# Manifest of the role of each atlas node (breast region markups, SLN markups, ESTRO contours, tables...).
+# Nodes are found by the role stored in their NODE_ROLE_ATTRIBUTE attribute, or by their ID in the shipped scene.
+NODE_ROLES_PATH = os.path.join(os.path.dirname(__file__), 'Resources/NodeRoles.json')
+NODE_ROLE_ATTRIBUTE = 'BreastCancerAtlas.Role'
+
+# Statistical analyses of the atlas, each has a table per breast region and per SLN field
+STATISTICS_METHODS = ['bayesian', 'bootstrapping', 'frequentist']
+# (the breast regions of a side are numbered from 0, their number is given by the items of NodeRoles.json)
+ATLAS_SIDES = ['left', 'right']
+
+# A statistics table cell: the probability in percent, optionally followed by its credible/confidence interval,
+# e.g. "23 (15-31)" or "23% (15-31%)"
+PROBABILITY_CELL_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*%?(?:\s*\(\s*(\d+(?:\.\d+)?)\s*%?\s*-\s*(\d+(?:\.\d+)?)\s*%?\s*\))?')
+
+# point arrays of the SLN point cloud holding the atlas item (SLN field of one side) and colour of each SLN
+SLN_ITEM_ARRAY = 'ItemID'
+SLN_COLOUR_ARRAY = 'Colour'
+
+# cell arrays of the merged breast region and SLN field volume meshes holding the region or field of each cell
+REGION_ID_ARRAY = 'RegionID'
+FIELD_ID_ARRAY = 'FieldID'
+SEGMENT_INDEX_ARRAY = 'SegmentIndex'
+
+# triangle budget of the decimated surface shown for each atlas surface while the camera moves, per node role group,
+# overridden by the BreastCancerAtlas/LODTriangleBudget/<group> settings
+LOD_TRIANGLE_BUDGETS = {
+    'breast': 20000,
+    'muscles': 20000,
+    'ESTRO': 5000,
+    'fieldVolumes': 10000,
+}
+
+# colours of the breast regions and SLN fields when they are not highlighted, SLN colours are per SLN field
+BREAST_REGION_COLOUR = (0.874, 0.666, 0.545)
+SLN_GREEN = (0.0, 0.6666666666666666, 0.0)
+SLN_FIELD_COLOURS = {
+    'med': (0.4412, 0.2549, 0.1843),
+    'IN': (0.858, 0.647, 1.000),
+    'a2': (0.0, 0.6666666666666666, 0.0),
+    'a3': (1.0, 0.33333, 1.0),
+    'aa': (0.0, 0.0, 1.0),
+    'am': (0.3333333333333333, 0.6666666666666666, 1.0),
+    'ap': (0.3333333333333333, 1.0, 1.0),
+    'ip': (0.988, 0.416, 0.012),
+    'ics': (1.0, 1.0, 0.0),
+    'al': (0, 0.422, 0.622),
+    'sc': (0.666, 0.000, 0.498),
+}
+
+# ESTRO contours that can be shown individually, each has a left and a right model
+ESTRO_PARTS = ['L1', 'L2', 'L3', 'L4', 'IMN', 'IC4', 'INTPECT']
+
+# State of the atlas view set by the module GUI, see BreastCancerAtlasWidget.process
+AtlasViewState = collections.namedtuple('AtlasViewState', [
+    'representativeSLNsOnly', 'labels', 'method', 'greenSLNs', 'fieldVolumes', 'ESTRO', 'ESTROParts',
+    'pectoralisMajor', 'pectoralisMinor', 'latissimusDorsi', 'leftBreast', 'rightBreast', 'hoverPreview'])
+
+# The atlas scene is loaded in stages so that the 3D view shows the breast regions before the rest of the atlas
+# has been read. Each stage lists the node role groups it brings in, display and storage nodes come with them.
+ATLAS_LOADING_STAGES = [
+    ("breast regions", ['regionMarkups', 'representativeSLNMarkups', 'breast']),
+    ("sentinel lymph nodes and muscles", ['atlasSLNMarkups', 'muscles']),
+    ("ESTRO contours and SLN field volumes", ['ESTRO', 'fieldVolumes']),
+    ("Bayesian statistics tables", ['bayesianTables']),
+    ("bootstrapping statistics tables", ['bootstrappingTables']),
+    ("frequentist statistics tables", ['frequentistTables']),
+]
+
+# Role of the table holding all the statistics tables in a packaged atlas (see BreastCancerAtlasLogic.packageAtlas),
+# the per-item tables are recreated from it when the scene is loaded
+MERGED_STATISTICS_ROLE = 'statistics/merged'
+
+# triangle budget of each surface in a packaged atlas per node role group, and the grid its points are rounded to (mm)
+PACKAGE_TRIANGLE_BUDGETS = {
+    'breast': 50000,
+    'muscles': 60000,
+    'ESTRO': 20000,
+    'fieldVolumes': 20000,
+}
+PACKAGE_QUANTIZATION_STEP = 0.05
+
+# node role groups whose left and right models can be instanced, and the largest distance (mm) between a left
+# surface reflected across the midsagittal plane and its right surface for them to be a mirror pair
+MIRROR_GROUPS = ['ESTRO', 'fieldVolumes']
+MIRROR_TOLERANCE = 0.5
+
+
 def switchToModule():
     """
     Load scene for module and switch to this module
     """
-    slicer.util.loadScene(os.path.join(os.path.dirname(__file__), 'Resources/Atlas/slicer_scene_for_module.mrb'))
-    slicer.util.selectModule("BreastCancerAtlas")
+    if slicer.util.mainWindow() is None:
+        # running without GUI (e.g. batch queries), the scripts load what they need
+        return
+    global atlasSceneLoader
+    atlasSceneLoader = BreastCancerAtlasSceneLoader(ATLAS_SCENE_PATH,
+                                                    onFinished=lambda: slicer.util.selectModule("BreastCancerAtlas"))
+    atlasSceneLoader.start()
 
 
 #
-# BreastCancerAtlasWidget
+# BreastCancerAtlasSceneLoader
 #
 
-class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
-    """Uses ScriptedLoadableModuleWidget base class, available at:
-    https://github.com/Slicer/Slicer/blob/main/Base/Python/slicer/ScriptedLoadableModule.py
+class BreastCancerAtlasSceneLoader:
+    """
+    Loads the atlas scene progressively. The nodes needed for the first 3D frame are imported first, the remaining
+    stages are imported from the event loop so that the view can be rotated while the rest of the atlas streams in.
     """
 
-    def __init__(self, parent=None):
-        """
-        Called when the user opens the module the first time and the widget is initialized.
-        """
-        ScriptedLoadableModuleWidget.__init__(self, parent)
-        VTKObservationMixin.__init__(self)  # needed for parameter node observation
-        self.clearNode = "false"
-        self.logic = None
-        self._parameterNode = None
-        self._updatingGUIFromParameterNode = False
-        self.tableNode = None
-        self.pressed = ""
-        self.clicked = ""
-
-    def setup(self):
-        """
-        Called when the user opens the module the first time and the widget is initialized.
-        """
-        ScriptedLoadableModuleWidget.setup(self)
-
-        # change layout to improve usability
-        slicer.app.layoutManager().threeDWidget(0).threeDController().setVisible(True)
-        slicer.app.layoutManager().threeDWidget(0).threeDController().setShowMaximizeViewButton(False)
-        slicer.app.layoutManager().tableWidget(0).tableController().setVisible(False)
-        slicer.util.setDataProbeVisible(False)
-        slicer.util.setApplicationLogoVisible(False)
-        slicer.util.setModuleHelpSectionVisible(False)
-        slicer.util.setModulePanelTitleVisible(False)
-        # Show 3D view layout
-        slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
-        # reset the 3D view so that the model is shown correctly
-        slicer.app.layoutManager().threeDWidget(0).threeDView().rotateToViewAxis(3)
-        slicer.app.layoutManager().threeDWidget(0).threeDView().resetFocalPoint()
-        # change the background colour
-        slicer.app.layoutManager().threeDWidget(0).mrmlViewNode().SetBackgroundColor(0.95, 0.95, 0.95)
-        slicer.app.layoutManager().threeDWidget(0).mrmlViewNode().SetBackgroundColor2(0.75, 0.75, 0.75)
-
-        # Load widget from .ui file (created by Qt Designer).
-        uiWidget = slicer.util.loadUI(self.resourcePath('UI/BreastCancerAtlas.ui'))
-        self.layout.addWidget(uiWidget)
-        self.ui = slicer.util.childWidgetVariables(uiWidget)
-
-        # Set scene in MRML widgets. Make sure that in Qt designer the top-level qMRMLWidget's
-        # "mrmlSceneChanged(vtkMRMLScene*)" signal in is connected to each MRML widget's.
-        # "setMRMLScene(vtkMRMLScene*)" slot.
-        uiWidget.setMRMLScene(slicer.mrmlScene)
-
+    # time given to the event loop between two stages (to render and handle user interaction)
+    stageDelayMs = 50
+    # observers of the scene import run before the displayable managers, which observe it with priority 0
+    importObserverPriority = 100.0
 
-        # Create logic class. Logic implements all computations that should be possible to run
-        # in batch mode, without a graphical user interface.
+    def __init__(self, sceneBundlePath, onFinished=None):
+        self.sceneBundlePath = sceneBundlePath
+        self.onFinished = onFinished
         self.logic = BreastCancerAtlasLogic()
+        self.stageFiles = []
+        self.stageIndex = 0
+        self.progressBar = None
+        self.startTime = None
+        self.surfaceDigests = set()
+        self.importObservations = []
+
+    def start(self):
+        """
+        Prepare the stage scene files and load the first stage
+        """
+        self.startTime = time.perf_counter()
+        self.stageFiles = self.logic.prepareAtlasSceneStages(self.sceneBundlePath)
+        if os.path.exists(ATLAS_STATISTICS_PATH):
+            # the statistics are read from the side file instead of the tables of the scene
+            tableStages = self.logic.tableStageLabels()
+            self.stageFiles = [(label, path) for label, path in self.stageFiles if label not in tableStages]
+        self.stageIndex = 0
+        # with the BreastCancerAtlas/ClosedSurfaceCache setting (on by default) the closed surfaces of the
+        # segmentations of a stage are read from the cache as soon as the stage is imported, before the displayable
+        # managers convert them for the first render. The priority makes the cache run before them.
+        if slicer.util.settingsValue('BreastCancerAtlas/ClosedSurfaceCache', True, converter=slicer.util.toBool):
+            for event in (slicer.vtkMRMLScene.EndImportEvent, slicer.vtkMRMLScene.EndBatchProcessEvent):
+                self.importObservations.append(
+                    slicer.mrmlScene.AddObserver(event, self.onStageImported, self.importObserverPriority))
+        # show the progress in the status bar, a modal dialog would block the view
+        self.progressBar = qt.QProgressBar()
+        self.progressBar.maximum = len(self.stageFiles)
+        self.progressBar.value = 0
+        self.progressBar.setMaximumWidth(200)
+        slicer.util.mainWindow().statusBar().addPermanentWidget(self.progressBar)
+        self.loadNextStage()
+
+    def loadNextStage(self):
+        """
+        Import the next stage into the scene and schedule the one after it
+        """
+        label, stagePath = self.stageFiles[self.stageIndex]
+        slicer.util.showStatusMessage("Loading atlas: " + label + "...")
+        stageStartTime = time.perf_counter()
+        try:
+            slicer.util.loadScene(stagePath, {'clear': False})
+        except Exception:
+            self.cleanup()
+            raise
+        logging.debug("Atlas stage '%s' loaded in %.2f s" % (label, time.perf_counter() - stageStartTime))
+        self.stageIndex += 1
+        self.progressBar.value = self.stageIndex
+
+        if self.stageIndex == 1:
+            # show the first frame in the 3D view while the rest is loading
+            layoutManager = slicer.app.layoutManager()
+            layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+            layoutManager.threeDWidget(0).threeDView().rotateToViewAxis(3)
+            layoutManager.threeDWidget(0).threeDView().resetFocalPoint()
+            logging.info("Atlas first frame ready after %.2f s" % (time.perf_counter() - self.startTime))
+
+        if self.stageIndex < len(self.stageFiles):
+            qt.QTimer.singleShot(self.stageDelayMs, self.loadNextStage)
+            return
 
-        # Connections
-
-        # These connections ensure that we update parameter node when scene is closed
-        self.addObserver(slicer.mrmlScene, slicer.mrmlScene.StartCloseEvent, self.onSceneStartClose)
-        self.addObserver(slicer.mrmlScene, slicer.mrmlScene.EndCloseEvent, self.onSceneEndClose)
-
-        # These connections ensure that whenever user changes some settings on the GUI, that is saved in the MRML scene
-        # (in the selected parameter node).
-        self.ui.bayesianButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.bootstrappingButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.frequentistButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.numberLabelButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.nameLabelButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.noLabelButton.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.leftBreastCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.rightBreastCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.pectoralisMajorCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.pectoralisMinorCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.latissimusDorsiCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.repSLNOnlyCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.ESTROCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.greenSLNCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.muscleOpacitySlider.connect('valueChanged(double)', self.muscleOpacitySliderValueChanged)
-        self.ui.L1CheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.L2CheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.L3CheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.L4CheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.IMNCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.IC4CheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.INTPECTCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.ESTROOpacitySlider.connect('valueChanged(double)', self.ESTROOpacitySliderValueChanged)
-        self.ui.breastOpacitySlider.connect('valueChanged(double)', self.breastOpacitySliderValueChanged)
-        self.ui.noSelectButton.connect('clicked(bool)', self.clearNodeSelection)
-        self.ui.SLNFieldModelCheckBox.connect("toggled(bool)", self.updateParameterNodeFromGUI)
-        self.ui.SLNFieldVolOpacitySlider.connect('valueChanged(double)', self.SLNFieldVolumeOpacitySliderValueChanged)
-
-        # getting markups for breast regions and setting observers
-        # right breast
-        Rb0Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode45')
-        self.DisplayNodeRb0 = Rb0Node.GetDisplayNode()
-        self.MarkupNodeRb0 = self.DisplayNodeRb0.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb0, self.DisplayNodeRb0.ActionEvent, self.Rb0pressed)
-
-        Rb1Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode23')
-        self.DisplayNodeRb1 = Rb1Node.GetDisplayNode()
-        self.MarkupNodeRb1 = self.DisplayNodeRb1.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb1, self.DisplayNodeRb1.ActionEvent, self.Rb1pressed)
-
-        Rb2Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode46')
-        self.DisplayNodeRb2 = Rb2Node.GetDisplayNode()
-        self.MarkupNodeRb2 = self.DisplayNodeRb2.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb2, self.DisplayNodeRb2.ActionEvent, self.Rb2pressed)
-
-        Rb3Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode36')
-        self.DisplayNodeRb3 = Rb3Node.GetDisplayNode()
-        self.MarkupNodeRb3 = self.DisplayNodeRb3.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb3, self.DisplayNodeRb3.ActionEvent, self.Rb3pressed)
-
-        Rb4Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode37')
-        self.DisplayNodeRb4 = Rb4Node.GetDisplayNode()
-        self.MarkupNodeRb4 = self.DisplayNodeRb4.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb4, self.DisplayNodeRb4.ActionEvent, self.Rb4pressed)
-
-        Rb5Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode38')
-        self.DisplayNodeRb5 = Rb5Node.GetDisplayNode()
-        self.MarkupNodeRb5 = self.DisplayNodeRb5.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb5, self.DisplayNodeRb5.ActionEvent, self.Rb5pressed)
-
-        Rb6Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode39')
-        self.DisplayNodeRb6 = Rb6Node.GetDisplayNode()
-        self.MarkupNodeRb6 = self.DisplayNodeRb6.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb6, self.DisplayNodeRb6.ActionEvent, self.Rb6pressed)
-
-        Rb7Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode40')
-        self.DisplayNodeRb7 = Rb7Node.GetDisplayNode()
-        self.MarkupNodeRb7 = self.DisplayNodeRb7.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb7, self.DisplayNodeRb7.ActionEvent, self.Rb7pressed)
-
-        Rb8Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode41')
-        self.DisplayNodeRb8 = Rb8Node.GetDisplayNode()
-        self.MarkupNodeRb8 = self.DisplayNodeRb8.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb8, self.DisplayNodeRb8.ActionEvent, self.Rb8pressed)
-
-        Rb9Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode42')
-        self.DisplayNodeRb9 = Rb9Node.GetDisplayNode()
-        self.MarkupNodeRb9 = self.DisplayNodeRb9.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb9, self.DisplayNodeRb9.ActionEvent, self.Rb9pressed)
-
-        Rb10Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode43')
-        self.DisplayNodeRb10 = Rb10Node.GetDisplayNode()
-        self.MarkupNodeRb10 = self.DisplayNodeRb10.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb10, self.DisplayNodeRb10.ActionEvent, self.Rb10pressed)
-
-        Rb11Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode44')
-        self.DisplayNodeRb11 = Rb11Node.GetDisplayNode()
-        self.MarkupNodeRb11 = self.DisplayNodeRb11.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb11, self.DisplayNodeRb11.ActionEvent, self.Rb11pressed)
-
-        Rb12Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode22')
-        self.DisplayNodeRb12 = Rb12Node.GetDisplayNode()
-        self.MarkupNodeRb12 = self.DisplayNodeRb12.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeRb12, self.DisplayNodeRb12.ActionEvent, self.Rb12pressed)
-
-        # left breast
-        Lb0Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode34')
-        self.DisplayNodeLb0 = Lb0Node.GetDisplayNode()
-        self.MarkupNodeLb0 = self.DisplayNodeLb0.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb0, self.DisplayNodeLb0.ActionEvent, self.Lb0pressed)
-
-        Lb1Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode12')
-        self.DisplayNodeLb1 = Lb1Node.GetDisplayNode()
-        self.MarkupNodeLb1 = self.DisplayNodeLb1.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb1, self.DisplayNodeLb1.ActionEvent, self.Lb1pressed)
-
-        Lb2Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode16')
-        self.DisplayNodeLb2 = Lb2Node.GetDisplayNode()
-        self.MarkupNodeLb2 = self.DisplayNodeLb2.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb2, self.DisplayNodeLb2.ActionEvent, self.Lb2pressed)
-
-        Lb3Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode19')
-        self.DisplayNodeLb3 = Lb3Node.GetDisplayNode()
-        self.MarkupNodeLb3 = self.DisplayNodeLb3.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb3, self.DisplayNodeLb3.ActionEvent, self.Lb3pressed)
-
-        Lb4Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode26')
-        self.DisplayNodeLb4 = Lb4Node.GetDisplayNode()
-        self.MarkupNodeLb4 = self.DisplayNodeLb4.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb4, self.DisplayNodeLb4.ActionEvent, self.Lb4pressed)
-
-        Lb5Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode27')
-        self.DisplayNodeLb5 = Lb5Node.GetDisplayNode()
-        self.MarkupNodeLb5 = self.DisplayNodeLb5.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb5, self.DisplayNodeLb5.ActionEvent, self.Lb5pressed)
-
-        Lb6Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode28')
-        self.DisplayNodeLb6 = Lb6Node.GetDisplayNode()
-        self.MarkupNodeLb6 = self.DisplayNodeLb6.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb6, self.DisplayNodeLb6.ActionEvent, self.Lb6pressed)
-
-        Lb7Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode29')
-        self.DisplayNodeLb7 = Lb7Node.GetDisplayNode()
-        self.MarkupNodeLb7 = self.DisplayNodeLb7.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb7, self.DisplayNodeLb7.ActionEvent, self.Lb7pressed)
-
-        Lb8Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode30')
-        self.DisplayNodeLb8 = Lb8Node.GetDisplayNode()
-        self.MarkupNodeLb8 = self.DisplayNodeLb8.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb8, self.DisplayNodeLb8.ActionEvent, self.Lb8pressed)
-
-        Lb9Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode31')
-        self.DisplayNodeLb9 = Lb9Node.GetDisplayNode()
-        self.MarkupNodeLb9 = self.DisplayNodeLb9.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb9, self.DisplayNodeLb9.ActionEvent, self.Lb9pressed)
-
-        Lb10Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode32')
-        self.DisplayNodeLb10 = Lb10Node.GetDisplayNode()
-        self.MarkupNodeLb10 = self.DisplayNodeLb10.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb10, self.DisplayNodeLb10.ActionEvent, self.Lb10pressed)
-
-        Lb11Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode33')
-        self.DisplayNodeLb11 = Lb11Node.GetDisplayNode()
-        self.MarkupNodeLb11 = self.DisplayNodeLb11.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb11, self.DisplayNodeLb11.ActionEvent, self.Lb11pressed)
-
-        Lb12Node = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode7')
-        self.DisplayNodeLb12 = Lb12Node.GetDisplayNode()
-        self.MarkupNodeLb12 = self.DisplayNodeLb12.GetMarkupsNode()
-        self.addObserver(self.DisplayNodeLb12, self.DisplayNodeLb12.ActionEvent, self.Lb12pressed)
-
-        # getting markups for SLNs and setting observers
-
-        lmedSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode24')
-        self.DisplayNodelmedSLNs = lmedSLNsNode.GetDisplayNode()
-        self.MarkupNodelmedSLNs = self.DisplayNodelmedSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelmedSLNs, self.DisplayNodelmedSLNs.ActionEvent, self.lmedSLNspressed)
-
-        lINSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode48')
-        self.DisplayNodelINSLNs = lINSLNsNode.GetDisplayNode()
-        self.MarkupNodelINSLNs = self.DisplayNodelINSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelINSLNs, self.DisplayNodelINSLNs.ActionEvent, self.lINSLNspressed)
-
-        rINSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode25')
-        self.DisplayNoderINSLNs = rINSLNsNode.GetDisplayNode()
-        self.MarkupNoderINSLNs = self.DisplayNoderINSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderINSLNs, self.DisplayNoderINSLNs.ActionEvent, self.rINSLNspressed)
-
-        la2SLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode4')
-        self.DisplayNodela2SLNs = la2SLNsNode.GetDisplayNode()
-        self.MarkupNodela2SLNs = self.DisplayNodela2SLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodela2SLNs, self.DisplayNodela2SLNs.ActionEvent, self.la2SLNspressed)
-
-        ra2SLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode13')
-        self.DisplayNodera2SLNs = ra2SLNsNode.GetDisplayNode()
-        self.MarkupNodera2SLNs = self.DisplayNodera2SLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodera2SLNs, self.DisplayNodera2SLNs.ActionEvent, self.ra2SLNspressed)
-
-        laaSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode6')
-        self.DisplayNodelaaSLNs = laaSLNsNode.GetDisplayNode()
-        self.MarkupNodelaaSLNs = self.DisplayNodelaaSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelaaSLNs, self.DisplayNodelaaSLNs.ActionEvent, self.laaSLNspressed)
-
-        raaSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode15')
-        self.DisplayNoderaaSLNs = raaSLNsNode.GetDisplayNode()
-        self.MarkupNoderaaSLNs = self.DisplayNoderaaSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderaaSLNs, self.DisplayNoderaaSLNs.ActionEvent, self.raaSLNspressed)
-
-        lamSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode9')
-        self.DisplayNodelamSLNs = lamSLNsNode.GetDisplayNode()
-        self.MarkupNodelamSLNs = self.DisplayNodelamSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelamSLNs, self.DisplayNodelamSLNs.ActionEvent, self.lamSLNspressed)
-
-        ramSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode17')
-        self.DisplayNoderamSLNs = ramSLNsNode.GetDisplayNode()
-        self.MarkupNoderamSLNs = self.DisplayNoderamSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderamSLNs, self.DisplayNoderamSLNs.ActionEvent, self.ramSLNspressed)
-
-        lapSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode10')
-        self.DisplayNodelapSLNs = lapSLNsNode.GetDisplayNode()
-        self.MarkupNodelapSLNs = self.DisplayNodelapSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelapSLNs, self.DisplayNodelapSLNs.ActionEvent, self.lapSLNspressed)
-
-        rapSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode18')
-        self.DisplayNoderapSLNs = rapSLNsNode.GetDisplayNode()
-        self.MarkupNoderapSLNs = self.DisplayNoderapSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderapSLNs, self.DisplayNoderapSLNs.ActionEvent, self.rapSLNspressed)
-
-        lipSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode2')
-        self.DisplayNodelipSLNs = lipSLNsNode.GetDisplayNode()
-        self.MarkupNodelipSLNs = self.DisplayNodelipSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelipSLNs, self.DisplayNodelipSLNs.ActionEvent, self.lipSLNspressed)
-
-        ripSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode3')
-        self.DisplayNoderipSLNs = ripSLNsNode.GetDisplayNode()
-        self.MarkupNoderipSLNs = self.DisplayNoderipSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderipSLNs, self.DisplayNoderipSLNs.ActionEvent, self.ripSLNspressed)
-
-        licsSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode1')
-        self.DisplayNodelicsSLNs = licsSLNsNode.GetDisplayNode()
-        self.MarkupNodelicsSLNs = self.DisplayNodelicsSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelicsSLNs, self.DisplayNodelicsSLNs.ActionEvent, self.licsSLNspressed)
-
-        ricsSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode21')
-        self.DisplayNodericsSLNs = ricsSLNsNode.GetDisplayNode()
-        self.MarkupNodericsSLNs = self.DisplayNodericsSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodericsSLNs, self.DisplayNodericsSLNs.ActionEvent, self.ricsSLNspressed)
-
-        lalSLNsNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode8')
-        self.DisplayNodelalSLNs = lalSLNsNode.GetDisplayNode()
-        self.MarkupNodelalSLNs = self.DisplayNodelalSLNs.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelalSLNs, self.DisplayNodelalSLNs.ActionEvent, self.lalSLNspressed)
-
-        # getting markups for representative SLNs and setting observers (except ra3, la3 and rsc)
-        la3RNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode5')
-        self.DisplayNodela3R = la3RNode.GetDisplayNode()
-        self.MarkupNodela3R = self.DisplayNodela3R.GetMarkupsNode()
-        self.addObserver(self.DisplayNodela3R, self.DisplayNodela3R.ActionEvent, self.la3SLNspressed)
-
-        ra3RNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode14')
-        self.DisplayNodera3R = ra3RNode.GetDisplayNode()
-        self.MarkupNodera3R = self.DisplayNodera3R.GetMarkupsNode()
-        self.addObserver(self.DisplayNodera3R, self.DisplayNodera3R.ActionEvent, self.ra3SLNspressed)
-
-        rscRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode20')
-        self.DisplayNoderscR = rscRNode.GetDisplayNode()
-        self.MarkupNoderscR = self.DisplayNoderscR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderscR, self.DisplayNoderscR.ActionEvent, self.rscSLNspressed)
-
-        lalRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode11')
-        self.DisplayNodelalR = lalRNode.GetDisplayNode()
-        self.MarkupNodelalR = self.DisplayNodelalR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelalR, self.DisplayNodelalR.ActionEvent, self.lalSLNspressed)
-
-        lamRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode35')
-        self.DisplayNodelamR = lamRNode.GetDisplayNode()
-        self.MarkupNodelamR = self.DisplayNodelamR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelamR, self.DisplayNodelamR.ActionEvent, self.lamSLNspressed)
-
-        lapRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode47')
-        self.DisplayNodelapR = lapRNode.GetDisplayNode()
-        self.MarkupNodelapR = self.DisplayNodelapR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelapR, self.DisplayNodelapR.ActionEvent, self.lapSLNspressed)
-
-        ramRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode49')
-        self.DisplayNoderamR = ramRNode.GetDisplayNode()
-        self.MarkupNoderamR = self.DisplayNoderamR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderamR, self.DisplayNoderamR.ActionEvent, self.ramSLNspressed)
-
-        rapRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode50')
-        self.DisplayNoderapR = rapRNode.GetDisplayNode()
-        self.MarkupNoderapR = self.DisplayNoderapR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderapR, self.DisplayNoderapR.ActionEvent, self.rapSLNspressed)
-
-        ricsRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode52')
-        self.DisplayNodericsR = ricsRNode.GetDisplayNode()
-        self.MarkupNodericsR = self.DisplayNodericsR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodericsR, self.DisplayNodericsR.ActionEvent, self.ricsSLNspressed)
-
-        rINRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode53')
-        self.DisplayNoderINR = rINRNode.GetDisplayNode()
-        self.MarkupNoderINR = self.DisplayNoderINR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderINR, self.DisplayNoderINR.ActionEvent, self.rINSLNspressed)
-
-        lINRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode51')
-        self.DisplayNodelINR = lINRNode.GetDisplayNode()
-        self.MarkupNodelINR = self.DisplayNodelINR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelINR, self.DisplayNodelINR.ActionEvent, self.lINSLNspressed)
-
-        lmedRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode54')
-        self.DisplayNodelmedR = lmedRNode.GetDisplayNode()
-        self.MarkupNodelmedR = self.DisplayNodelmedR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelmedR, self.DisplayNodelmedR.ActionEvent, self.lmedSLNspressed)
-
-        rmedRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode67')
-        self.DisplayNodermedR = rmedRNode.GetDisplayNode()
-        self.MarkupNodermedR = self.DisplayNodermedR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodermedR, self.DisplayNodermedR.ActionEvent, self.rmedSLNspressed)
-
-        ra2RNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode55')
-        self.DisplayNodera2R = ra2RNode.GetDisplayNode()
-        self.MarkupNodera2R = self.DisplayNodera2R.GetMarkupsNode()
-        self.addObserver(self.DisplayNodera2R, self.DisplayNodera2R.ActionEvent, self.ra2SLNspressed)
-
-        la2RNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode56')
-        self.DisplayNodela2R = la2RNode.GetDisplayNode()
-        self.MarkupNodela2R = self.DisplayNodela2R.GetMarkupsNode()
-        self.addObserver(self.DisplayNodela2R, self.DisplayNodela2R.ActionEvent, self.la2SLNspressed)
-
-        laaRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode57')
-        self.DisplayNodelaaR = laaRNode.GetDisplayNode()
-        self.MarkupNodelaaR = self.DisplayNodelaaR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelaaR, self.DisplayNodelaaR.ActionEvent, self.laaSLNspressed)
-
-        lipRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode58')
-        self.DisplayNodelipR = lipRNode.GetDisplayNode()
-        self.MarkupNodelipR = self.DisplayNodelipR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelipR, self.DisplayNodelipR.ActionEvent, self.lipSLNspressed)
-
-        raaRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode59')
-        self.DisplayNoderaaR = raaRNode.GetDisplayNode()
-        self.MarkupNoderaaR = self.DisplayNoderaaR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderaaR, self.DisplayNoderaaR.ActionEvent, self.raaSLNspressed)
-
-        ripRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode60')
-        self.DisplayNoderipR = ripRNode.GetDisplayNode()
-        self.MarkupNoderipR = self.DisplayNoderipR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderipR, self.DisplayNoderipR.ActionEvent, self.ripSLNspressed)
-
-        licsRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode61')
-        self.DisplayNodelicsR = licsRNode.GetDisplayNode()
-        self.MarkupNodelicsR = self.DisplayNodelicsR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelicsR, self.DisplayNodelicsR.ActionEvent, self.licsSLNspressed)
-
-        ralRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode63')
-        self.DisplayNoderalR = ralRNode.GetDisplayNode()
-        self.MarkupNoderalR = self.DisplayNoderalR.GetMarkupsNode()
-        self.addObserver(self.DisplayNoderalR, self.DisplayNoderalR.ActionEvent, self.ralSLNspressed)
-
-        lscRNode = slicer.mrmlScene.GetNodeByID('vtkMRMLMarkupsFiducialNode64')
-        self.DisplayNodelscR = lscRNode.GetDisplayNode()
-        self.MarkupNodelscR = self.DisplayNodelscR.GetMarkupsNode()
-        self.addObserver(self.DisplayNodelscR, self.DisplayNodelscR.ActionEvent, self.lscSLNspressed)
-
-        # getting display nodes for the SLN field volumes
-        la2Volume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode29')
-        self.la2VolumeDisplayNode = la2Volume.GetDisplayNode()
-
-        laaVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode33')
-        self.laaVolumeDisplayNode = laaVolume.GetDisplayNode()
-
-        lalVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode34')
-        self.lalVolumeDisplayNode = lalVolume.GetDisplayNode()
-
-        lamVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode35')
-        self.lamVolumeDisplayNode = lamVolume.GetDisplayNode()
-
-        lapVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode36')
-        self.lapVolumeDisplayNode = lapVolume.GetDisplayNode()
-
-        ra2Volume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode37')
-        self.ra2VolumeDisplayNode = ra2Volume.GetDisplayNode()
-
-        raaVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode38')
-        self.raaVolumeDisplayNode = raaVolume.GetDisplayNode()
-
-        ramVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode39')
-        self.ramVolumeDisplayNode = ramVolume.GetDisplayNode()
-
-        rapVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode40')
-        self.rapVolumeDisplayNode = rapVolume.GetDisplayNode()
-
-        ricsVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode41')
-        self.ricsVolumeDisplayNode = ricsVolume.GetDisplayNode()
-
-        medVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode42')
-        self.medVolumeDisplayNode = medVolume.GetDisplayNode()
-
-        RINVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode43')
-        self.RINVolumeDisplayNode = RINVolume.GetDisplayNode()
-
-        laipVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode44')
-        self.laipVolumeDisplayNode = laipVolume.GetDisplayNode()
-
-        raipVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode45')
-        self.raipVolumeDisplayNode = raipVolume.GetDisplayNode()
-
-        licsVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode46')
-        self.licsVolumeDisplayNode = licsVolume.GetDisplayNode()
-
-        LINVolume = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode47')
-        self.LINVolumeDisplayNode = LINVolume.GetDisplayNode()
-
-        # getting display nodes for muscles
-        pecMajSegNode = slicer.mrmlScene.GetNodeByID('vtkMRMLSegmentationNode6')
-        self.pecMajSegDisplayNode = pecMajSegNode.GetDisplayNode()
-
-        pecMinSegNode = slicer.mrmlScene.GetNodeByID('vtkMRMLSegmentationNode3')
-        self.pecMinSegDisplayNode = pecMinSegNode.GetDisplayNode()
-
-        latDorSegNode = slicer.mrmlScene.GetNodeByID('vtkMRMLSegmentationNode4')
-        self.latDorSegDisplayNode = latDorSegNode.GetDisplayNode()
-
-        # get the display nodes for ESTRO contours
-        # RIGHT
-        ESTRO_RIGHT_IMN_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode11')
-        self.ESTRO_R_IMN_DisplayNode = ESTRO_RIGHT_IMN_Node.GetDisplayNode()
-
-        ESTRO_RIGHT_IC4_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode12')
-        self.ESTRO_R_IC4_DisplayNode = ESTRO_RIGHT_IC4_Node.GetDisplayNode()
-
-        ESTRO_RIGHT_INTPECT_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode13')
-        self.ESTRO_R_INTPECT_DisplayNode = ESTRO_RIGHT_INTPECT_Node.GetDisplayNode()
-
-        ESTRO_RIGHT_L1_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode14')
-        self.ESTRO_R_L1_DisplayNode = ESTRO_RIGHT_L1_Node.GetDisplayNode()
-
-        ESTRO_RIGHT_L2_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode15')
-        self.ESTRO_R_L2_DisplayNode = ESTRO_RIGHT_L2_Node.GetDisplayNode()
-
-        ESTRO_RIGHT_L3_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode16')
-        self.ESTRO_R_L3_DisplayNode = ESTRO_RIGHT_L3_Node.GetDisplayNode()
+        self.cleanup()
+        if self.surfaceDigests:
+            self.logic.pruneClosedSurfaceCache(self.surfaceDigests)
+        # a packaged atlas has one merged statistics table, the tables of the node role manifest are made from it
+        self.logic.expandMergedStatistics()
+        logging.info("Atlas scene loaded in %.2f s (%s start), %d nodes"
+                     % (time.perf_counter() - self.startTime, "warm" if self.logic.sceneCacheHit else "cold",
+                        slicer.mrmlScene.GetNumberOfNodes()))
+        if self.onFinished:
+            self.onFinished()
 
-        ESTRO_RIGHT_L4_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode17')
-        self.ESTRO_R_L4_DisplayNode = ESTRO_RIGHT_L4_Node.GetDisplayNode()
+    def onStageImported(self, caller, event):
+        """
+        Add the closed surfaces of the segmentations just imported from the cache
+        """
+        segmentationNodes = slicer.util.getNodesByClass('vtkMRMLSegmentationNode')
+        self.surfaceDigests |= self.logic.loadClosedSurfaces(segmentationNodes)
 
-        # LEFT
+    def cleanup(self):
+        """
+        Remove the scene observers and the progress indicator from the status bar
+        """
+        for tag in self.importObservations:
+            slicer.mrmlScene.RemoveObserver(tag)
+        self.importObservations = []
+        if self.progressBar is not None:
+            slicer.util.mainWindow().statusBar().removeWidget(self.progressBar)
+            self.progressBar.deleteLater()
+            self.progressBar = None
+        slicer.util.showStatusMessage("")
 
-        ESTRO_LEFT_IMN_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode4')
-        self.ESTRO_L_IMN_DisplayNode = ESTRO_LEFT_IMN_Node.GetDisplayNode()
 
-        ESTRO_LEFT_IC4_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode5')
-        self.ESTRO_L_IC4_DisplayNode = ESTRO_LEFT_IC4_Node.GetDisplayNode()
+#
+# BreastCancerAtlasInteractionProfiler
+#
 
-        ESTRO_LEFT_INTPECT_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode6')
-        self.ESTRO_L_INTPECT_DisplayNode = ESTRO_LEFT_INTPECT_Node.GetDisplayNode()
+class BreastCancerAtlasInteractionProfiler:
+    """
+    Context manager counting the Modified events of the atlas nodes and the 3D view renders caused by one
+    interaction. Renders requested during the interaction happen once the event loop resumes, so the counts are
+    logged a short while after the context is left.
+    """
 
-        ESTRO_LEFT_L1_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode7')
-        self.ESTRO_L_L1_DisplayNode = ESTRO_LEFT_L1_Node.GetDisplayNode()
+    # time to wait for the requested renders before logging the counts
+    reportDelayMs = 250
 
-        ESTRO_LEFT_L2_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode8')
-        self.ESTRO_L_L2_DisplayNode = ESTRO_LEFT_L2_Node.GetDisplayNode()
+    def __init__(self, nodes, interaction):
+        self.nodes = nodes
+        self.interaction = interaction
+        self.modifiedEvents = 0
+        self.renders = 0
+        self.observations = []
+        self.startTime = None
+        self.elapsedTime = None
 
-        ESTRO_LEFT_L3_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode9')
-        self.ESTRO_L_L3_DisplayNode = ESTRO_LEFT_L3_Node.GetDisplayNode()
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+        for node in self.nodes:
+            self.observations.append((node, node.AddObserver(vtk.vtkCommand.ModifiedEvent, self.onModified)))
+        renderWindow = slicer.app.layoutManager().threeDWidget(0).threeDView().renderWindow()
+        self.observations.append((renderWindow, renderWindow.AddObserver(vtk.vtkCommand.EndEvent, self.onRender)))
+        return self
 
-        ESTRO_LEFT_L4_Node = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode10')
-        self.ESTRO_L_L4_DisplayNode = ESTRO_LEFT_L4_Node.GetDisplayNode()
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.elapsedTime = time.perf_counter() - self.startTime
+        qt.QTimer.singleShot(self.reportDelayMs, self.report)
 
-        # get the display nodes for the breast regions
-        RbreastSegNode = slicer.mrmlScene.GetNodeByID('vtkMRMLSegmentationNode5')
-        self.RbreastSegDisplayNode = RbreastSegNode.GetDisplayNode()
+    def onModified(self, caller, event):
+        self.modifiedEvents += 1
 
-        LbFatModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode18')
-        self.LbFatDisplayNode = LbFatModelNode.GetDisplayNode()
+    def onRender(self, caller, event):
+        self.renders += 1
 
-        Lb0ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode19')
-        self.Lb0DisplayNode = Lb0ModelNode.GetDisplayNode()
+    def report(self):
+        for observed, tag in self.observations:
+            observed.RemoveObserver(tag)
+        self.observations = []
+        logging.info("%s: %d Modified events, %d renders, %.1f ms"
+                     % (self.interaction, self.modifiedEvents, self.renders, self.elapsedTime * 1000))
 
-        Lb1ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode32')
-        self.Lb1DisplayNode = Lb1ModelNode.GetDisplayNode()
 
-        Lb2ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode30')
-        self.Lb2DisplayNode = Lb2ModelNode.GetDisplayNode()
+#
+# BreastCancerAtlasSliderThrottle
+#
 
-        Lb3ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode31')
-        self.Lb3DisplayNode = Lb3ModelNode.GetDisplayNode()
+class BreastCancerAtlasSliderThrottle:
+    """
+    Applies the value of a slider at most once per display frame while it is dragged, the latest value wins.
+    The pending value is applied as soon as the slider is released, so the final value is always exact.
+    The frame rate of the 3D view during each drag is logged at debug level.
+    """
 
-        Lb4ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode28')
-        self.Lb4DisplayNode = Lb4ModelNode.GetDisplayNode()
+    # about one frame of a 60 Hz display
+    frameIntervalMs = 16
+
+    def __init__(self, slider, apply):
+        self.apply = apply
+        self.pendingValue = None
+        self.timer = qt.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.frameIntervalMs)
+        self.timer.connect('timeout()', self.applyPendingValue)
+        slider.connect('valueChanged(double)', self.onValueChanged)
+        for innerSlider in slicer.util.findChildren(slider, className='QSlider'):
+            innerSlider.connect('sliderPressed()', self.onDragStarted)
+            innerSlider.connect('sliderReleased()', self.onDragFinished)
+        self.renderWindow = None
+        self.renderObservation = None
+        self.renders = 0
+        self.dragStartTime = None
+
+    def onValueChanged(self, value):
+        if self.timer.isActive():
+            # applied at the end of the frame
+            self.pendingValue = value
+            return
+        self.applyValue(value)
 
-        Lb5ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode27')
-        self.Lb5DisplayNode = Lb5ModelNode.GetDisplayNode()
+    def applyPendingValue(self):
+        self.timer.stop()
+        if self.pendingValue is None:
+            return
+        value, self.pendingValue = self.pendingValue, None
+        self.applyValue(value)
+
+    def applyValue(self, value):
+        # render once for all the display nodes changed by the value
+        with slicer.util.RenderBlocker():
+            self.apply(value)
+        self.timer.start()
+
+    def onDragStarted(self):
+        self.renders = 0
+        self.dragStartTime = time.perf_counter()
+        self.renderWindow = slicer.app.layoutManager().threeDWidget(0).threeDView().renderWindow()
+        self.renderObservation = self.renderWindow.AddObserver(vtk.vtkCommand.EndEvent, self.onRender)
+
+    def onRender(self, caller, event):
+        self.renders += 1
+
+    def onDragFinished(self):
+        self.applyPendingValue()
+        if self.renderObservation is None:
+            return
+        self.renderWindow.RemoveObserver(self.renderObservation)
+        self.renderObservation = None
+        duration = time.perf_counter() - self.dragStartTime
+        if duration > 0:
+            logging.debug("Slider drag: %d frames in %.2f s (%.1f fps)"
+                          % (self.renders, duration, self.renders / duration))
 
-        Lb6ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode26')
-        self.Lb6DisplayNode = Lb6ModelNode.GetDisplayNode()
 
-        Lb7ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode25')
-        self.Lb7DisplayNode = Lb7ModelNode.GetDisplayNode()
+class BreastCancerAtlasViewManager:
+    """
+    Change the layout and the table shown by the module only when they differ from what is already shown.
+    Layout changes rebuild the view widgets, so switching to the current layout is skipped, and a table is only
+    propagated to the table view when another table is showing.
+    """
 
-        Lb8ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode24')
-        self.Lb8DisplayNode = Lb8ModelNode.GetDisplayNode()
+    def setLayout(self, layout):
+        layoutManager = slicer.app.layoutManager()
+        if layoutManager.layout == layout:
+            return False
+        layoutManager.setLayout(layout)
+        return True
+
+    def isTableViewShown(self):
+        tableViewNode = slicer.app.layoutManager().activeMRMLTableViewNode()
+        return tableViewNode is not None and tableViewNode.IsViewVisibleInLayout()
+
+    def showTable(self, tableNode):
+        selectionNode = slicer.app.applicationLogic().GetSelectionNode()
+        tableViewNode = slicer.app.layoutManager().activeMRMLTableViewNode()
+        if (selectionNode.GetActiveTableID() == tableNode.GetID() and tableViewNode is not None
+                and tableViewNode.GetTableNodeID() == tableNode.GetID()):
+            return False
+        selectionNode.SetReferenceActiveTableID(tableNode.GetID())
+        slicer.app.applicationLogic().PropagateTableSelection()
+        return True
+
+
+class BreastCancerAtlasSLNPointCloud:
+    """
+    Draw the SLNs of the full atlas in the 3D view as one point cloud with a sphere per point, instead of one markups
+    node per SLN field. The points are a model node rendered as spheres on the GPU, so the cost stays low as the
+    number of SLNs grows. The colour of each point is in its SLN_COLOUR_ARRAY entry and is changed without touching
+    the points. The model is not saved with the scene and is removed along with it.
+    """
 
-        Lb9ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode23')
-        self.Lb9DisplayNode = Lb9ModelNode.GetDisplayNode()
+    # diameter of the spheres in pixels, like the markups glyphs the size is relative to the screen
+    pointSize = 8
+
+    def __init__(self, polyData, itemPointIds):
+        self.polyData = polyData
+        self.itemPointIds = itemPointIds
+        self.modelNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLModelNode',
+                                                            slicer.mrmlScene.GenerateUniqueName('SLN point cloud'))
+        self.modelNode.SetSaveWithScene(False)
+        # the surfaces behind the points are picked, not the points
+        self.modelNode.SetSelectable(False)
+        self.modelNode.SetAndObservePolyData(polyData)
+        self.modelNode.CreateDefaultDisplayNodes()
+        displayNode = self.modelNode.GetDisplayNode()
+        displayNode.SetSaveWithScene(False)
+        displayNode.SetRepresentation(displayNode.PointsRepresentation)
+        displayNode.SetRenderPointsAsSpheres(True)
+        displayNode.SetPointSize(self.pointSize)
+        displayNode.SetActiveScalar(SLN_COLOUR_ARRAY, vtk.vtkAssignAttribute.POINT_DATA)
+        displayNode.SetScalarRangeFlag(displayNode.UseDirectMapping)
+        displayNode.SetScalarVisibility(True)
+        displayNode.SetVisibility2D(False)
+
+    def setVisibility(self, visible):
+        self.modelNode.GetDisplayNode().SetVisibility(visible)
+
+    def setColour(self, item, colour):
+        colours = self.polyData.GetPointData().GetArray(SLN_COLOUR_ARRAY)
+        rgb = [round(component * 255) for component in colour]
+        for pointId in self.itemPointIds.get(item, []):
+            colours.SetTuple3(pointId, *rgb)
+        colours.Modified()
+        self.polyData.Modified()
 
-        Lb10ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode22')
-        self.Lb10DisplayNode = Lb10ModelNode.GetDisplayNode()
+    def cleanup(self):
+        # the model is already gone if the scene was closed
+        if self.modelNode.GetScene() is not None:
+            slicer.mrmlScene.RemoveNode(self.modelNode.GetDisplayNode())
+            slicer.mrmlScene.RemoveNode(self.modelNode)
 
-        Lb11ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode21')
-        self.Lb11DisplayNode = Lb11ModelNode.GetDisplayNode()
 
-        Lb12ModelNode = slicer.mrmlScene.GetNodeByID('vtkMRMLModelNode20')
-        self.Lb12DisplayNode = Lb12ModelNode.GetDisplayNode()
+class BreastCancerAtlasCameraMotion:
+    """
+    Detect the camera being moved with the mouse in the 3D view: a button press followed by a drag starts the motion
+    and the button release stops it, a click is not a motion. Listeners are called without arguments.
+    """
 
-        # initialise the parameter node when the module is reloaded
-        if self.parent.isEntered:
-            self.initializeParameterNode()
+    dragThreshold = 3
+
+    def __init__(self, threeDView):
+        self.startListeners = []
+        self.stopListeners = []
+        self.pressPosition = None
+        self.moving = False
+        interactor = threeDView.interactor()
+        self.observations = [(interactor, interactor.AddObserver(event, callback)) for event, callback in [
+            (vtk.vtkCommand.LeftButtonPressEvent, self.onButtonPressed),
+            (vtk.vtkCommand.MiddleButtonPressEvent, self.onButtonPressed),
+            (vtk.vtkCommand.RightButtonPressEvent, self.onButtonPressed),
+            (vtk.vtkCommand.MouseMoveEvent, self.onMouseMoved),
+            (vtk.vtkCommand.LeftButtonReleaseEvent, self.onButtonReleased),
+            (vtk.vtkCommand.MiddleButtonReleaseEvent, self.onButtonReleased),
+            (vtk.vtkCommand.RightButtonReleaseEvent, self.onButtonReleased)]]
+
+    def addListener(self, onStarted, onStopped):
+        self.startListeners.append(onStarted)
+        self.stopListeners.append(onStopped)
+
+    def onButtonPressed(self, caller, event):
+        self.pressPosition = caller.GetEventPosition()
+
+    def onMouseMoved(self, caller, event):
+        if self.pressPosition is None or self.moving:
+            return
+        x, y = caller.GetEventPosition()
+        if abs(x - self.pressPosition[0]) + abs(y - self.pressPosition[1]) > self.dragThreshold:
+            self.moving = True
+            for listener in self.startListeners:
+                listener()
+
+    def onButtonReleased(self, caller, event):
+        self.pressPosition = None
+        if not self.moving:
+            return
+        self.moving = False
+        for listener in self.stopListeners:
+            listener()
 
     def cleanup(self):
-        """
-        Called when the application closes and the module widget is destroyed.
-        """
-        self.removeObservers()
+        for observed, tag in self.observations:
+            observed.RemoveObserver(tag)
+        self.observations = []
 
-    def enter(self):
-        """
-        Called each time the user opens this module.
-        """
-        # Make sure parameter node exists and observed
-        self.initializeParameterNode()
 
-    def exit(self):
-        """
-        Called each time the user opens a different module.
-        """
-        # Do not react to parameter node changes (GUI wlil be updated when the user enters into the module)
-        self.removeObserver(self._parameterNode, vtk.vtkCommand.ModifiedEvent, self.updateGUIFromParameterNode)
+class BreastCancerAtlasLevelOfDetail:
+    """
+    Show decimated copies of the atlas surfaces while the camera is moved in the 3D view, and the full surfaces again
+    when the mouse button is released. The copies are made once, within the triangle budget of each surface, and take
+    the colour, opacity and visibility of their surface when they are swapped in.
+    """
 
-    def onSceneStartClose(self, caller, event):
-        """
-        Called just before the scene is closed.
-        """
-        # Parameter node will be reset, do not use it anymore
-        self.setParameterNode(None)
+    def __init__(self, logic, surfaces, threeDView, cameraMotion):
+        """
+        surfaces is a list of (model or segmentation node, triangle budget)
+        """
+        self.logic = logic
+        self.threeDView = threeDView
+        self.levels = [(node, logic.buildDecimatedSurface(node, budget)) for node, budget in surfaces]
+        self.swapped = []
+        cameraMotion.addListener(self.swapIn, self.swapOut)
+
+    def swapIn(self):
+        """
+        Replace the shown surfaces by their decimated copies in the 3D view
+        """
+        with slicer.util.RenderBlocker():
+            for node, decimated in self.levels:
+                displayNode = node.GetDisplayNode()
+                if not displayNode.GetVisibility() or not displayNode.GetVisibility3D():
+                    continue
+                decimatedDisplayNode = decimated.GetDisplayNode()
+                if node.IsA('vtkMRMLSegmentationNode'):
+                    colorNode = decimatedDisplayNode.GetColorNode()
+                    segmentation = node.GetSegmentation()
+                    for index in range(segmentation.GetNumberOfSegments()):
+                        segmentId = segmentation.GetNthSegmentID(index)
+                        colour = [0.0, 0.0, 0.0]
+                        displayNode.GetSegmentColor(segmentId, colour)
+                        visible = (displayNode.GetSegmentVisibility(segmentId)
+                                   and displayNode.GetSegmentVisibility3D(segmentId))
+                        colorNode.SetColor(index, *colour, 1.0 if visible else 0.0)
+                    decimatedDisplayNode.SetOpacity(displayNode.GetOpacity3D())
+                else:
+                    decimatedDisplayNode.SetColor(displayNode.GetColor())
+                    decimatedDisplayNode.SetOpacity(displayNode.GetOpacity())
+                decimatedDisplayNode.SetVisibility(True)
+                displayNode.SetVisibility3D(False)
+                self.swapped.append((displayNode, decimatedDisplayNode))
+
+    def swapOut(self):
+        """
+        Show the full surfaces again
+        """
+        if not self.swapped:
+            return
+        with slicer.util.RenderBlocker():
+            for displayNode, decimatedDisplayNode in self.swapped:
+                displayNode.SetVisibility3D(True)
+                decimatedDisplayNode.SetVisibility(False)
+        self.swapped = []
 
-    def onSceneEndClose(self, caller, event):
+    def measureFrameRates(self, frames=100):
         """
-        Called just after the scene is closed.
+        Measure the 3D view frame rate with the full surfaces and with their decimated copies, in frames per second
         """
-        # If this module is shown while the scene is closed then recreate a new parameter node immediately
-        if self.parent.isEntered:
-            self.initializeParameterNode()
+        frameRates = {'full': 1.0 / self.logic.measureFrameTime(self.threeDView, frames)}
+        self.swapIn()
+        frameRates['decimated'] = 1.0 / self.logic.measureFrameTime(self.threeDView, frames)
+        self.swapOut()
+        logging.info("Atlas rendering: %.1f fps with the full surfaces, %.1f fps with the decimated surfaces"
+                     % (frameRates['full'], frameRates['decimated']))
+        return frameRates
 
-    def muscleOpacitySliderValueChanged(self, newValue):
-        """
-        Change the muscle segment opacity when the user interacts with the slider
-        """
-        self.latDorSegDisplayNode.SetOpacity(newValue)
-        self.pecMinSegDisplayNode.SetOpacity(newValue)
-        self.pecMajSegDisplayNode.SetOpacity(newValue)
+    def cleanup(self):
+        self.swapOut()
 
-    def ESTROOpacitySliderValueChanged(self, newValue):
-        """
-        Change the ESTRO segment opacity when the user interacts with the slider
-        """
-        self.ESTRO_L_IMN_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_IC4_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_INTPECT_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_L1_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_L2_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_L3_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_L_L4_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_IMN_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_IC4_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_INTPECT_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_L1_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_L2_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_L3_DisplayNode.SetOpacity(newValue)
-        self.ESTRO_R_L4_DisplayNode.SetOpacity(newValue)
 
-    def breastOpacitySliderValueChanged(self, newValue):
-        """
-        Change the breast segment opacity when the user interacts with the slider
-        """
-        self.RbreastSegDisplayNode.SetOpacity(newValue)
-        self.Lb0DisplayNode.SetOpacity(newValue)
-        self.Lb1DisplayNode.SetOpacity(newValue)
-        self.Lb2DisplayNode.SetOpacity(newValue)
-        self.Lb3DisplayNode.SetOpacity(newValue)
-        self.Lb4DisplayNode.SetOpacity(newValue)
-        self.Lb5DisplayNode.SetOpacity(newValue)
-        self.Lb6DisplayNode.SetOpacity(newValue)
-        self.Lb7DisplayNode.SetOpacity(newValue)
-        self.Lb8DisplayNode.SetOpacity(newValue)
-        self.Lb9DisplayNode.SetOpacity(newValue)
-        self.Lb10DisplayNode.SetOpacity(newValue)
-        self.Lb11DisplayNode.SetOpacity(newValue)
-        self.Lb12DisplayNode.SetOpacity(newValue)
-        self.LbFatDisplayNode.SetOpacity(newValue)
+class BreastCancerAtlasRenderingProfile:
+    """
+    Choose the depth peeling quality of the 3D view from the number of visible translucent actors. Depth peeling is
+    off when nothing is translucent, more peels are used as more translucent surfaces overlap, and fewer peels with a
+    higher occlusion ratio are used while the camera moves. The full quality is chosen again when the camera stops
+    and when update() is called after the opacity or visibility of the atlas surfaces changed. The render times of
+    each quality are logged when the camera stops, to show the trade-off.
+    """
 
-    def SLNFieldVolumeOpacitySliderValueChanged(self, newValue):
-        """
-        Change the SLN field volumes opacity when the user interacts with the slider
-        """
-        # in 3D view
-        self.la2VolumeDisplayNode.SetOpacity(newValue)
-        self.laaVolumeDisplayNode.SetOpacity(newValue)
-        self.lalVolumeDisplayNode.SetOpacity(newValue)
-        self.lamVolumeDisplayNode.SetOpacity(newValue)
-        self.lapVolumeDisplayNode.SetOpacity(newValue)
-        self.ra2VolumeDisplayNode.SetOpacity(newValue)
-        self.raaVolumeDisplayNode.SetOpacity(newValue)
-        self.ramVolumeDisplayNode.SetOpacity(newValue)
-        self.rapVolumeDisplayNode.SetOpacity(newValue)
-        self.ricsVolumeDisplayNode.SetOpacity(newValue)
-        self.medVolumeDisplayNode.SetOpacity(newValue)
-        self.RINVolumeDisplayNode.SetOpacity(newValue)
-        self.laipVolumeDisplayNode.SetOpacity(newValue)
-        self.raipVolumeDisplayNode.SetOpacity(newValue)
-        self.licsVolumeDisplayNode.SetOpacity(newValue)
-        self.LINVolumeDisplayNode.SetOpacity(newValue)
-        # in slice view
-        self.la2VolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.laaVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.lalVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.lamVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.lapVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.ra2VolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.raaVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.ramVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.rapVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.ricsVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.medVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.RINVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.laipVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.raipVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.licsVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-        self.LINVolumeDisplayNode.SetSliceIntersectionOpacity(newValue)
-
-    def Rb0pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # change the layout to show table
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode14')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode14')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode114')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode114')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode64')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode64')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change label colour and names
-            self.pressed = 'Rb0'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_4", 1, 0, 0)
+    maximumPeels = 8
+    minimumPeels = 4
+    interactivePeels = 2
+    interactiveOcclusionRatio = 0.2
+
+    def __init__(self, threeDView, viewNode, cameraMotion):
+        self.viewNode = viewNode
+        self.renderWindow = threeDView.renderWindow()
+        self.renderer = self.renderWindow.GetRenderers().GetFirstRenderer()
+        self.moving = False
+        self.renderStartTime = None
+        self.interactiveRenderTimes = []
+        self.reportNextRender = False
+        self.observations = [
+            (self.renderWindow, self.renderWindow.AddObserver(vtk.vtkCommand.StartEvent, self.onRenderStarted)),
+            (self.renderWindow, self.renderWindow.AddObserver(vtk.vtkCommand.EndEvent, self.onRenderEnded))]
+        cameraMotion.addListener(self.onMotionStarted, self.onMotionStopped)
+
+    def countTranslucentActors(self):
+        props = self.renderer.GetViewProps()
+        props.InitTraversal()
+        count = 0
+        for index in range(props.GetNumberOfItems()):
+            prop = props.GetNextProp()
+            if prop.GetVisibility() and prop.HasTranslucentPolygonalGeometry():
+                count += 1
+        return count
+
+    def fullQualityProfile(self, translucentActors):
+        """
+        Return (use depth peeling, maximum number of peels, occlusion ratio) for the number of translucent actors
+        """
+        if translucentActors == 0:
+            return False, 0, 0.0
+        peels = min(self.maximumPeels, max(self.minimumPeels, translucentActors))
+        return True, peels, 0.0
+
+    def applyProfile(self, profile):
+        useDepthPeeling, peels, occlusionRatio = profile
+        if (self.viewNode.GetUseDepthPeeling() == useDepthPeeling and self.viewNode.GetMaximumNumberOfPeels() == peels
+                and self.viewNode.GetOcclusionRatio() == occlusionRatio):
+            return
+        with slicer.util.NodeModify(self.viewNode):
+            self.viewNode.SetUseDepthPeeling(useDepthPeeling)
+            self.viewNode.SetMaximumNumberOfPeels(peels)
+            self.viewNode.SetOcclusionRatio(occlusionRatio)
 
-    def Rb1pressed(self, caller, event):
+    def update(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Choose the full quality for the translucent actors shown, the profile of a moving camera is kept until it stops
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode15')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode15')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode115')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode115')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode65')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode65')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change label colours and values
-            self.pressed = 'Rb1'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_6", 1, 0, 0)
+        if not self.moving:
+            self.applyProfile(self.fullQualityProfile(self.countTranslucentActors()))
 
-    def Rb2pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode16')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode16')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode116')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode116')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode66')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode66')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb2'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_7", 1, 0, 0)
+    def onMotionStarted(self):
+        self.moving = True
+        self.interactiveRenderTimes = []
+        if self.countTranslucentActors():
+            self.applyProfile((True, self.interactivePeels, self.interactiveOcclusionRatio))
 
-    def Rb3pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode17')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode17')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode117')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode117')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode67')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode67')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb3'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_8", 1, 0, 0)
+    def onMotionStopped(self):
+        self.moving = False
+        # the render at full quality that follows is reported along with the renders while moving
+        self.reportNextRender = bool(self.interactiveRenderTimes)
+        self.update()
 
-    def Rb4pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode18')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode18')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode118')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode118')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode68')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode68')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb4'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_9", 1, 0, 0)
+    def onRenderStarted(self, caller, event):
+        self.renderStartTime = time.perf_counter()
 
-    def Rb5pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode19')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode19')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode119')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode119')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode69')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode69')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb5'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_10", 1, 0, 0)
+    def onRenderEnded(self, caller, event):
+        if self.renderStartTime is None:
+            return
+        renderTime = time.perf_counter() - self.renderStartTime
+        self.renderStartTime = None
+        if self.moving:
+            self.interactiveRenderTimes.append(renderTime)
+            return
+        if self.reportNextRender:
+            self.reportNextRender = False
+            logging.info("Depth peeling: %.1f ms per frame while moving (%d frames, %d peels, occlusion ratio %.2f), "
+                         "%.1f ms at rest (%d peels)"
+                         % (sum(self.interactiveRenderTimes) / len(self.interactiveRenderTimes) * 1000,
+                            len(self.interactiveRenderTimes), self.interactivePeels, self.interactiveOcclusionRatio,
+                            renderTime * 1000, self.viewNode.GetMaximumNumberOfPeels()))
 
-    def Rb6pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode20')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode20')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode120')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode120')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode70')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode70')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb6'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_11", 1, 0, 0)
+    def cleanup(self):
+        for observed, tag in self.observations:
+            observed.RemoveObserver(tag)
+        self.observations = []
 
-    def Rb7pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode21')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode21')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode121')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode121')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode71')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode71')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb7'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_12", 1, 0, 0)
 
-    def Rb8pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode22')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode22')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode122')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode122')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode72')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode72')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb8'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_13", 1, 0, 0)
+#
+# BreastCancerAtlasWidget
+#
 
-    def Rb9pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode23')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode23')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode123')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode123')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode73')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode73')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb9'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_14", 1, 0, 0)
+class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
+    """Uses ScriptedLoadableModuleWidget base class, available at:
+    https://github.com/Slicer/Slicer/blob/main/Base/Python/slicer/ScriptedLoadableModule.py
+    """
 
-    def Rb10pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode24')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode24')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode124')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode124')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode74')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode74')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb10'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_15", 1, 0, 0)
+    # time the pointer has to rest over a breast region before its statistics are previewed
+    hoverDelayMs = 100
 
-    def Rb11pressed(self, caller, event):
+    def __init__(self, parent=None):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called when the user opens the module the first time and the widget is initialized.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode25')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode25')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode125')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode125')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode75')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode75')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb11'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_17", 1, 0, 0)
+        ScriptedLoadableModuleWidget.__init__(self, parent)
+        VTKObservationMixin.__init__(self)  # needed for parameter node observation
+        self.clearNode = "false"
+        self.logic = None
+        self._parameterNode = None
+        self._updatingGUIFromParameterNode = False
+        self.tableNode = None
+        self.tableMethod = None
+        self.mergedTables = {}
+        self.methodSwitchLatency = None
+        self.viewManager = BreastCancerAtlasViewManager()
+        self.pressed = ""
+        self.highlightedItems = set()
+        self.labelLatency = None
+        self.mirrorPairs = []
+        self.mirrorTransforms = {}
+        self.appliedViewState = None
+        self.scheduledUpdateTriggers = []
+        self.scheduledUpdateTime = None
+        self.methodSwitchTime = None
+        self.openModification = None
+        self.batchedNodeIds = set()
 
-    def Rb12pressed(self, caller, event):
+    def setup(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called when the user opens the module the first time and the widget is initialized.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode26')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode26')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode126')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode126')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode76')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode76')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Rb12'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_5", 1, 0, 0)
+        ScriptedLoadableModuleWidget.setup(self)
 
-    def Lb0pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode1')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode1')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode101')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode101')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode51')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode51')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb0'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb0DisplayNode.SetColor(1, 0, 0)
+        # change layout to improve usability
+        slicer.app.layoutManager().threeDWidget(0).threeDController().setVisible(True)
+        slicer.app.layoutManager().threeDWidget(0).threeDController().setShowMaximizeViewButton(False)
+        slicer.app.layoutManager().tableWidget(0).tableController().setVisible(False)
+        slicer.util.setDataProbeVisible(False)
+        slicer.util.setApplicationLogoVisible(False)
+        slicer.util.setModuleHelpSectionVisible(False)
+        slicer.util.setModulePanelTitleVisible(False)
+        # Show 3D view layout
+        self.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+        # reset the 3D view so that the model is shown correctly
+        slicer.app.layoutManager().threeDWidget(0).threeDView().rotateToViewAxis(3)
+        slicer.app.layoutManager().threeDWidget(0).threeDView().resetFocalPoint()
+        # change the background colour
+        slicer.app.layoutManager().threeDWidget(0).mrmlViewNode().SetBackgroundColor(0.95, 0.95, 0.95)
+        slicer.app.layoutManager().threeDWidget(0).mrmlViewNode().SetBackgroundColor2(0.75, 0.75, 0.75)
 
-    def Lb1pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode2')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode2')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode102')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode102')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode52')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode52')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb1'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb1DisplayNode.SetColor(1, 0, 0)
-    def Lb2pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode3')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode3')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode103')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode103')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode53')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode53')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb2'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb2DisplayNode.SetColor(1, 0, 0)
+        # Load widget from .ui file (created by Qt Designer).
+        uiWidget = slicer.util.loadUI(self.resourcePath('UI/BreastCancerAtlas.ui'))
+        self.layout.addWidget(uiWidget)
+        self.ui = slicer.util.childWidgetVariables(uiWidget)
 
-    def Lb3pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode4')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode4')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode104')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode104')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode54')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode54')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb3'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb3DisplayNode.SetColor(1, 0, 0)
+        # Set scene in MRML widgets. Make sure that in Qt designer the top-level qMRMLWidget's
+        # "mrmlSceneChanged(vtkMRMLScene*)" signal in is connected to each MRML widget's.
+        # "setMRMLScene(vtkMRMLScene*)" slot.
+        uiWidget.setMRMLScene(slicer.mrmlScene)
 
-    def Lb4pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode5')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode5')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode105')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode105')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode55')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode55')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb4'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb4DisplayNode.SetColor(1, 0, 0)
 
-    def Lb5pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode6')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode6')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode106')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode106')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode56')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode56')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb5'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb5DisplayNode.SetColor(1, 0, 0)
+        # Create logic class. Logic implements all computations that should be possible to run
+        # in batch mode, without a graphical user interface.
+        self.logic = BreastCancerAtlasLogic()
 
-    def Lb6pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode7')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode7')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode107')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode107')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode57')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode57')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb6'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb6DisplayNode.SetColor(1, 0, 0)
+        # Connections
 
-    def Lb7pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode8')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode8')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode108')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode108')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode58')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode58')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb7'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb7DisplayNode.SetColor(1, 0, 0)
+        # These connections ensure that we update parameter node when scene is closed
+        self.addObserver(slicer.mrmlScene, slicer.mrmlScene.StartCloseEvent, self.onSceneStartClose)
+        self.addObserver(slicer.mrmlScene, slicer.mrmlScene.EndCloseEvent, self.onSceneEndClose)
 
-    def Lb8pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode9')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode9')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode109')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode109')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode59')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode59')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb8'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb8DisplayNode.SetColor(1, 0, 0)
+        # These connections ensure that whenever user changes some settings on the GUI, that is saved in the MRML scene
+        # (in the selected parameter node). Changes are collected and applied once at the next event loop turn, so that
+        # e.g. switching a radio button (one button unchecked, one checked) only updates the atlas once.
+        self.parameterNodeUpdateTimer = qt.QTimer()
+        self.parameterNodeUpdateTimer.setSingleShot(True)
+        self.parameterNodeUpdateTimer.setInterval(0)
+        self.parameterNodeUpdateTimer.connect('timeout()', self.applyScheduledParameterNodeUpdate)
+        # the table views are rebuilt by layout changes and reset by table changes, the columns of the other
+        # analyses are hidden again once they are updated
+        self.columnUpdateTimer = qt.QTimer()
+        self.columnUpdateTimer.setSingleShot(True)
+        self.columnUpdateTimer.setInterval(0)
+        self.columnUpdateTimer.connect('timeout()', self.hideOtherMethodColumns)
+        slicer.app.layoutManager().connect('layoutChanged(int)', self.onLayoutChanged)
+        self.connectParameterWidget(self.ui.bayesianButton)
+        self.connectParameterWidget(self.ui.bootstrappingButton)
+        self.connectParameterWidget(self.ui.frequentistButton)
+        self.methodTriggers = {self.ui.bayesianButton.objectName, self.ui.bootstrappingButton.objectName,
+                               self.ui.frequentistButton.objectName}
+        self.connectParameterWidget(self.ui.numberLabelButton)
+        self.connectParameterWidget(self.ui.nameLabelButton)
+        self.connectParameterWidget(self.ui.noLabelButton)
+        self.connectParameterWidget(self.ui.hoverPreviewCheckBox)
+        self.connectParameterWidget(self.ui.leftBreastCheckBox)
+        self.connectParameterWidget(self.ui.rightBreastCheckBox)
+        self.connectParameterWidget(self.ui.pectoralisMajorCheckBox)
+        self.connectParameterWidget(self.ui.pectoralisMinorCheckBox)
+        self.connectParameterWidget(self.ui.latissimusDorsiCheckBox)
+        self.connectParameterWidget(self.ui.repSLNOnlyCheckBox)
+        self.connectParameterWidget(self.ui.ESTROCheckBox)
+        self.connectParameterWidget(self.ui.greenSLNCheckBox)
+        self.muscleOpacityThrottle = BreastCancerAtlasSliderThrottle(self.ui.muscleOpacitySlider,
+                                                                     self.muscleOpacitySliderValueChanged)
+        self.connectParameterWidget(self.ui.L1CheckBox)
+        self.connectParameterWidget(self.ui.L2CheckBox)
+        self.connectParameterWidget(self.ui.L3CheckBox)
+        self.connectParameterWidget(self.ui.L4CheckBox)
+        self.connectParameterWidget(self.ui.IMNCheckBox)
+        self.connectParameterWidget(self.ui.IC4CheckBox)
+        self.connectParameterWidget(self.ui.INTPECTCheckBox)
+        self.ESTROOpacityThrottle = BreastCancerAtlasSliderThrottle(self.ui.ESTROOpacitySlider,
+                                                                    self.ESTROOpacitySliderValueChanged)
+        self.breastOpacityThrottle = BreastCancerAtlasSliderThrottle(self.ui.breastOpacitySlider,
+                                                                     self.breastOpacitySliderValueChanged)
+        self.ui.noSelectButton.connect('clicked(bool)', self.clearNodeSelection)
+        self.connectParameterWidget(self.ui.SLNFieldModelCheckBox)
+        self.SLNFieldVolumeOpacityThrottle = BreastCancerAtlasSliderThrottle(
+            self.ui.SLNFieldVolOpacitySlider, self.SLNFieldVolumeOpacitySliderValueChanged)
+
+        # find the atlas nodes listed in the node role manifest, bind their display nodes to the widget
+        # (e.g. DisplayNodeRb0, pecMajSegDisplayNode) and observe interactions with the markups
+        nodeRoles = self.logic.loadNodeRoles()
+        if self.logic.loadStatisticsFile():
+            # the scene has no statistics tables, they are read from the side file
+            self.atlasNodes = self.logic.findAtlasNodes(
+                {group: groupRoles for group, groupRoles in nodeRoles.items() if not group.endswith('Tables')})
+        else:
+            self.atlasNodes = self.logic.findAtlasNodes(nodeRoles)
+
+        # the closed surfaces of the segmentations were added by the scene loader (read from the cache or converted
+        # from their labelmaps), the BreastCancerAtlas/ViewOnly setting discards the labelmaps as the atlas is not
+        # edited
+        if slicer.util.settingsValue('BreastCancerAtlas/ViewOnly', False, converter=slicer.util.toBool):
+            self.logic.discardLabelmaps(
+                [node for node in self.atlasNodes.values() if node.IsA('vtkMRMLSegmentationNode')])
+
+        # with the BreastCancerAtlas/MirrorInstancing setting the right model of each symmetric left/right pair shares
+        # the surface of the left model and is shown through a reflection transform
+        # the right models are restored while the scene is saved, so that their files keep their own surface
+        if slicer.util.settingsValue('BreastCancerAtlas/MirrorInstancing', False, converter=slicer.util.toBool):
+            self.mirrorPairs = self.logic.instanceMirrorPairs(self.atlasNodes)
+            self.addObserver(slicer.mrmlScene, slicer.mrmlScene.StartSaveEvent, self.onSceneStartSave)
+            self.addObserver(slicer.mrmlScene, slicer.mrmlScene.EndSaveEvent, self.onSceneEndSave)
+        self.markupsItems = {}
+        for group, groupRoles in nodeRoles.items():
+            if 'displayNode' not in groupRoles:
+                continue
+            for role in groupRoles['nodes']:
+                displayNode = self.atlasNodes[group + '/' + role].GetDisplayNode()
+                setattr(self, groupRoles['displayNode'].format(role), displayNode)
+                if 'markupsNode' in groupRoles:
+                    setattr(self, groupRoles['markupsNode'].format(role), displayNode.GetMarkupsNode())
+                    self.markupsItems[displayNode.GetID()] = role
+                    self.addObserver(displayNode, displayNode.ActionEvent, self.onMarkupsAction)
+
+        # nodes changed when the user interacts with the atlas, observed when the interactions are profiled
+        self.interactionNodes = []
+        for key, node in self.atlasNodes.items():
+            if not key.split('/')[0].endswith('Tables'):
+                self.interactionNodes += [node, node.GetDisplayNode()]
+        self.profileInteractions = slicer.util.settingsValue('BreastCancerAtlas/ProfileInteractions', False,
+                                                             converter=slicer.util.toBool)
+        self.batchSceneModifications = slicer.util.settingsValue('BreastCancerAtlas/BatchSceneModifications', True,
+                                                                 converter=slicer.util.toBool)
+
+        # breast regions and SLN fields that can be clicked, and the statistics of all their tables
+        self.atlasItems = nodeRoles['items']
+        self.logic.loadStatisticsIndex(self.atlasNodes, nodeRoles)
+        # the markups node showing the name or statistic of each item, and the other surfaces of each breast
+        self.labelMarkups = {item: self.atlasNodes[descriptor['label']['node']]
+                             for item, descriptor in self.atlasItems.items()}
+        self.labelNodes = [node for markupsNode in self.labelMarkups.values()
+                           for node in (markupsNode, markupsNode.GetDisplayNode())]
+        self.breastSurfaces = nodeRoles['breastSurfaces']
+
+        # how each item is highlighted in red and set back: a segment override colour, a model colour or a
+        # markups colour, and the nodes these change
+        self.highlightActions = {}
+        self.restoreActions = {}
+        self.highlightNodes = {}
+        for item, descriptor in self.atlasItems.items():
+            self.highlightActions[item] = []
+            self.restoreActions[item] = []
+            self.highlightNodes[item] = []
+            for highlight in descriptor['highlight']:
+                displayNode = self.atlasNodes[highlight['node']].GetDisplayNode()
+                self.highlightNodes[item].append(displayNode)
+                if 'segment' in highlight:
+                    self.highlightActions[item].append(
+                        functools.partial(displayNode.SetSegmentOverrideColor, highlight['segment'], 1, 0, 0))
+                    self.restoreActions[item].append(
+                        functools.partial(displayNode.UnsetSegmentOverrideColor, highlight['segment']))
+                elif displayNode.IsA('vtkMRMLMarkupsDisplayNode'):
+                    self.highlightActions[item].append(functools.partial(displayNode.SetSelectedColor, 1, 0, 0))
+                    self.restoreActions[item].append(
+                        functools.partial(self.restoreSLNColour, displayNode, descriptor['field']))
+                else:
+                    self.highlightActions[item].append(functools.partial(displayNode.SetColor, 1, 0, 0))
+                    self.restoreActions[item].append(functools.partial(displayNode.SetColor, *BREAST_REGION_COLOUR))
+
+        # breast regions previewed when the pointer rests over their markups or surface in the 3D view. Pointer moves
+        # only restart a timer, the hovered region is looked up once the pointer rests so rotating stays smooth
+        self.previewedItem = None
+        self.hoverMarkups = {}
+        self.regionSurfaces = {}
+        for item, descriptor in self.atlasItems.items():
+            if 'region' not in descriptor:
+                continue
+            self.hoverMarkups[item] = self.atlasNodes['regionMarkups/' + item].GetDisplayNode()
+            for highlight in descriptor['highlight']:
+                self.regionSurfaces[(self.atlasNodes[highlight['node']].GetID(), highlight.get('segment'))] = item
+        self.hoverTimer = qt.QTimer()
+        self.hoverTimer.setSingleShot(True)
+        self.hoverTimer.setInterval(self.hoverDelayMs)
+        self.hoverTimer.connect('timeout()', self.onPointerRested)
+        self.threeDView = slicer.app.layoutManager().threeDWidget(0).threeDView()
+        self.addObserver(self.threeDView.interactor(), vtk.vtkCommand.MouseMoveEvent, self.onPointerMoved)
+
+        # with the BreastCancerAtlas/MergedBreastMeshes setting each breast is shown as one mesh labelled with the
+        # region of each cell: highlighting changes a colour table entry and a click on the surface is one cell pick
+        self.regionMeshes = {}
+        self.regionMeshItems = {}
+        self.clickPosition = None
+        if slicer.util.settingsValue('BreastCancerAtlas/MergedBreastMeshes', False, converter=slicer.util.toBool):
+            self.useRegionMeshes()
+
+        # with the BreastCancerAtlas/MergedFieldVolumes setting the SLN field volumes are shown as one mesh
+        # labelled with the field of each cell, rendered as a single translucent actor
+        self.fieldVolumeRoles = list(nodeRoles['fieldVolumes']['nodes'])
+        self.fieldVolumeMesh = None
+        if slicer.util.settingsValue('BreastCancerAtlas/MergedFieldVolumes', False, converter=slicer.util.toBool):
+            self.useFieldVolumeMesh()
+
+        # with the BreastCancerAtlas/SLNPointCloud setting the SLNs of the full atlas are drawn as one point cloud
+        # model, markups are only kept for the representative SLNs that can be clicked
+        self.slnPointCloud = None
+        if slicer.util.settingsValue('BreastCancerAtlas/SLNPointCloud', False, converter=slicer.util.toBool):
+            self.useSLNPointCloud()
+
+        # camera motion in the 3D view, which the rendering can be lowered for
+        self.cameraMotion = BreastCancerAtlasCameraMotion(self.threeDView)
+
+        # with the BreastCancerAtlas/InteractiveLOD setting decimated surfaces are shown while the camera moves
+        self.levelOfDetail = None
+        if slicer.util.settingsValue('BreastCancerAtlas/InteractiveLOD', False, converter=slicer.util.toBool):
+            surfaces = []
+            for key, node in self.atlasNodes.items():
+                group = key.split('/')[0]
+                if group in LOD_TRIANGLE_BUDGETS:
+                    budget = slicer.util.settingsValue('BreastCancerAtlas/LODTriangleBudget/' + group,
+                                                       LOD_TRIANGLE_BUDGETS[group], converter=int)
+                    surfaces.append((node, budget))
+            self.levelOfDetail = BreastCancerAtlasLevelOfDetail(self.logic, surfaces, self.threeDView,
+                                                                self.cameraMotion)
+
+        # with the BreastCancerAtlas/AdaptiveDepthPeeling setting the depth peeling quality follows the translucent
+        # surfaces shown and is lowered while the camera moves
+        self.renderingProfile = None
+        if slicer.util.settingsValue('BreastCancerAtlas/AdaptiveDepthPeeling', False, converter=slicer.util.toBool):
+            viewNode = slicer.app.layoutManager().threeDWidget(0).mrmlViewNode()
+            self.renderingProfile = BreastCancerAtlasRenderingProfile(self.threeDView, viewNode, self.cameraMotion)
 
-    def Lb9pressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode10')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode10')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode110')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode110')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode60')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode60')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb9'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb9DisplayNode.SetColor(1, 0, 0)
+        # initialise the parameter node when the module is reloaded
+        if self.parent.isEntered:
+            self.initializeParameterNode()
 
-    def Lb10pressed(self, caller, event):
+    def cleanup(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called when the application closes and the module widget is destroyed.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode11')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode11')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode111')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode111')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode61')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode61')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb10'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb10DisplayNode.SetColor(1, 0, 0)
+        self.parameterNodeUpdateTimer.stop()
+        self.columnUpdateTimer.stop()
+        slicer.app.layoutManager().disconnect('layoutChanged(int)', self.onLayoutChanged)
+        self.hoverTimer.stop()
+        if self.slnPointCloud is not None:
+            self.slnPointCloud.cleanup()
+        if self.levelOfDetail is not None:
+            self.levelOfDetail.cleanup()
+        if self.renderingProfile is not None:
+            self.renderingProfile.cleanup()
+        self.cameraMotion.cleanup()
+        self.removeObservers()
 
-    def Lb11pressed(self, caller, event):
+    @contextlib.contextmanager
+    def atlasModification(self, interaction):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Context manager applying all the changes made to the atlas within it as a single scene modification: the
+        views render once at the end, and the nodes given to batchModifications fire their Modified event once.
+        With the BreastCancerAtlas/ProfileInteractions setting the Modified events and renders are counted and
+        logged, the batching can be turned off with BreastCancerAtlas/BatchSceneModifications to compare.
+        A modification made within another one is part of it.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode12')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode12')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode112')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode112')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode62')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode62')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb11'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb11DisplayNode.SetColor(1, 0, 0)
+        if self.openModification is not None:
+            yield
+            return
+        with contextlib.ExitStack() as modification:
+            # called last, once the nodes have fired their Modified events and the actors show the changes
+            modification.callback(self.updateRenderingProfile)
+            if self.profileInteractions:
+                modification.enter_context(BreastCancerAtlasInteractionProfiler(self.interactionNodes, interaction))
+            if self.batchSceneModifications:
+                modification.enter_context(slicer.util.RenderBlocker())
+                # called once the batched nodes have ended their modification
+                modification.callback(self.closeModification)
+                self.openModification = modification
+            yield
+
+    def batchModifications(self, nodes):
+        """
+        Let nodes changed more than once within the current atlas modification (several segments, control points
+        or colour table entries) fire their Modified event once, when the modification ends
+        """
+        if self.openModification is None:
+            return
+        for node in nodes:
+            if node.GetID() not in self.batchedNodeIds:
+                self.batchedNodeIds.add(node.GetID())
+                self.openModification.enter_context(slicer.util.NodeModify(node))
+
+    def closeModification(self):
+        self.openModification = None
+        self.batchedNodeIds = set()
+
+    def updateRenderingProfile(self):
+        """
+        Update the depth peeling quality after the opacity or visibility of the atlas surfaces changed
+        """
+        if self.renderingProfile is not None:
+            self.renderingProfile.update()
+
+    def onMarkupsAction(self, caller, event):
+        """
+        Called when the user interacts with one of the atlas markups, shows its breast region or SLN field as one
+        scene modification
+        """
+        item = self.markupsItems[caller.GetID()]
+        with self.atlasModification(item + " pressed"):
+            self.onAtlasItemPressed(item)
+
+    def useRegionMeshes(self):
+        """
+        Replace the breast region models and segments by one merged mesh per side, highlighted through its colour
+        table and picked with a single cell pick
+        """
+        for side in ATLAS_SIDES:
+            modelNode = self.logic.buildRegionMesh(self.atlasNodes, self.atlasItems, side)
+            self.regionMeshes[side] = modelNode
+            colorNode = modelNode.GetDisplayNode().GetColorNode()
+            self.interactionNodes += [modelNode, modelNode.GetDisplayNode(), colorNode]
+            for item, descriptor in self.atlasItems.items():
+                if 'region' not in descriptor or descriptor['side'] != side:
+                    continue
+                region = descriptor['region']
+                self.regionMeshItems[(modelNode.GetID(), region)] = item
+                self.highlightNodes[item] = [colorNode]
+                self.highlightActions[item] = [functools.partial(colorNode.SetColor, region, 1, 0, 0)]
+                self.restoreActions[item] = [functools.partial(colorNode.SetColor, region,
+                                                               *colorNode.GetLookupTable().GetTableValue(region))]
+                # the merged mesh is shown instead of the region surfaces
+                for highlight in descriptor['highlight']:
+                    displayNode = self.atlasNodes[highlight['node']].GetDisplayNode()
+                    if 'segment' in highlight:
+                        displayNode.SetSegmentVisibility(highlight['segment'], False)
+                    else:
+                        displayNode.SetVisibility(False)
+        interactor = self.threeDView.interactor()
+        self.addObserver(interactor, vtk.vtkCommand.LeftButtonPressEvent, self.onLeftButtonPressed)
+        self.addObserver(interactor, vtk.vtkCommand.LeftButtonReleaseEvent, self.onLeftButtonReleased)
+
+    def useFieldVolumeMesh(self):
+        """
+        Replace the SLN field volume models by one merged mesh: the visibility and colour of each field are colour
+        table edits and the opacity of all the fields is set on one display node
+        """
+        self.fieldVolumeMesh = self.logic.buildFieldVolumeMesh(self.atlasNodes, self.fieldVolumeRoles)
+        meshDisplayNode = self.fieldVolumeMesh.GetDisplayNode()
+        sourceDisplayNodes = self.atlasDisplayNodes('fieldVolumes')
+        meshDisplayNode.SetOpacity(sourceDisplayNodes[0].GetOpacity())
+        meshDisplayNode.SetSliceIntersectionOpacity(sourceDisplayNodes[0].GetSliceIntersectionOpacity())
+        meshDisplayNode.SetVisibility2D(sourceDisplayNodes[0].GetVisibility2D())
+        meshDisplayNode.SetVisibility(sourceDisplayNodes[0].GetVisibility())
+        for displayNode in sourceDisplayNodes:
+            displayNode.SetVisibility(False)
+        self.interactionNodes += [self.fieldVolumeMesh, meshDisplayNode, meshDisplayNode.GetColorNode()]
+
+    def useSLNPointCloud(self):
+        """
+        Replace the full atlas SLN markups by a point cloud drawn as spheres, highlighting a SLN field changes the
+        colours of its points
+        """
+        polyData, itemPointIds = self.logic.buildSLNPointCloud(self.atlasNodes, self.atlasItems)
+        self.slnPointCloud = BreastCancerAtlasSLNPointCloud(polyData, itemPointIds)
+        self.interactionNodes += [self.slnPointCloud.modelNode, self.slnPointCloud.modelNode.GetDisplayNode()]
+        for displayNode in self.atlasDisplayNodes('atlasSLNMarkups'):
+            displayNode.SetVisibility(False)
+        # the hidden markups keep being coloured along with the points, so that they match when shown again
+        for item in itemPointIds:
+            self.highlightNodes[item].append(self.slnPointCloud.modelNode)
+            self.highlightActions[item].append(functools.partial(self.slnPointCloud.setColour, item, (1, 0, 0)))
+            self.restoreActions[item].append(
+                functools.partial(self.restoreSLNPointColour, item, self.atlasItems[item]['field']))
+
+    def restoreSLNPointColour(self, item, field):
+        """
+        Set the points of a SLN field in the point cloud back to green or to the SLN field colour
+        """
+        self.slnPointCloud.setColour(item, self.slnColour(field))
+
+    def setFieldVolumeVisibility(self, role, visible):
+        """
+        Show or hide the SLN field volume of a fieldVolumes role, on the merged mesh by changing its alpha
+        """
+        if self.fieldVolumeMesh is None:
+            self.atlasNodes['fieldVolumes/' + role].GetDisplayNode().SetVisibility(visible)
+            return
+        colorNode = self.fieldVolumeMesh.GetDisplayNode().GetColorNode()
+        self.batchModifications([colorNode])
+        index = self.fieldVolumeRoles.index(role)
+        red, green, blue, alpha = colorNode.GetLookupTable().GetTableValue(index)
+        colorNode.SetColor(index, red, green, blue, 1.0 if visible else 0.0)
+
+    def benchmarkFieldVolumeRendering(self, frames=100, opacity=0.5):
+        """
+        Compare the 3D view frame time with all the SLN field volumes shown translucent as separate models and as
+        the merged mesh. Returns the mean frame times in seconds, the view is restored afterwards.
+        """
+        fieldVolumeMesh = self.fieldVolumeMesh or self.logic.buildFieldVolumeMesh(self.atlasNodes,
+                                                                                   self.fieldVolumeRoles)
+        sourceDisplayNodes = self.atlasDisplayNodes('fieldVolumes')
+        meshDisplayNode = fieldVolumeMesh.GetDisplayNode()
+        displayNodes = sourceDisplayNodes + [meshDisplayNode]
+        previousDisplay = [(node.GetVisibility(), node.GetOpacity()) for node in displayNodes]
+
+        for displayNode in displayNodes:
+            displayNode.SetOpacity(opacity)
+        frameTimes = {}
+        for representation in ['separate', 'merged']:
+            for displayNode in sourceDisplayNodes:
+                displayNode.SetVisibility(representation == 'separate')
+            meshDisplayNode.SetVisibility(representation == 'merged')
+            frameTimes[representation] = self.logic.measureFrameTime(self.threeDView, frames)
+
+        for displayNode, (visibility, nodeOpacity) in zip(displayNodes, previousDisplay):
+            displayNode.SetVisibility(visibility)
+            displayNode.SetOpacity(nodeOpacity)
+        if fieldVolumeMesh is not self.fieldVolumeMesh:
+            slicer.mrmlScene.RemoveNode(meshDisplayNode.GetColorNode())
+            slicer.mrmlScene.RemoveNode(fieldVolumeMesh)
+        logging.info("SLN field volumes at opacity %.2f: %.2f ms per frame as %d models, %.2f ms as one mesh"
+                     % (opacity, frameTimes['separate'] * 1000, len(sourceDisplayNodes), frameTimes['merged'] * 1000))
+        return frameTimes
+
+    def onLeftButtonPressed(self, caller, event):
+        self.clickPosition = caller.GetEventPosition()
+
+    def onLeftButtonReleased(self, caller, event):
+        """
+        Select the breast region clicked on the merged mesh, a drag (rotating the view) is not a click
+        """
+        if self.clickPosition is None:
+            return
+        x, y = caller.GetEventPosition()
+        pressX, pressY = self.clickPosition
+        self.clickPosition = None
+        if abs(x - pressX) + abs(y - pressY) > 2:
+            return
+        item = self.pickedAtlasRegion(x, y)
+        if item is None:
+            return
+        with self.atlasModification(item + " pressed"):
+            self.onAtlasItemPressed(item)
 
-    def Lb12pressed(self, caller, event):
+    def onPointerMoved(self, caller, event):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called on every pointer move in the 3D view, only restarts the hover timer
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode13')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode13')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode113')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode113')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode63')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode63')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'Lb12'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left breast'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.Lb12DisplayNode.SetColor(1, 0, 0)
+        if self.appliedViewState is not None and self.appliedViewState.hoverPreview:
+            self.hoverTimer.start()
 
-    def rmedSLNspressed(self, caller, event):
+    def onPointerRested(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called when the pointer rests in the 3D view: preview the statistics of the breast region under it and
+        prepare its table so that a click on it is instant
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode49')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode49')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode149')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode149')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode99')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode99')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rmed'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodermedR.SetSelectedColor(1, 0, 0)
+        state = self.appliedViewState
+        if state is None or not state.hoverPreview or state.labels != 'numbers':
+            return
+        # the view is being rotated or panned
+        if qt.QApplication.mouseButtons() != qt.Qt.NoButton:
+            return
+        item = self.hoveredAtlasItem()
+        if item == self.previewedItem:
+            return
+        with self.atlasModification("hover preview"):
+            if item is None:
+                self.endHoverPreview()
+                return
+            self.previewedItem = item
+            self.MakeCPLabelNumbers(item)
+        if item not in self.mergedTables:
+            self.mergedTables[item] = self.logic.mergeStatisticsTables(self.atlasNodes, item)
+
+    def endHoverPreview(self):
+        """
+        Show the labels of the pressed item again, or the names if nothing is pressed
+        """
+        self.previewedItem = None
+        if self.pressed:
+            self.MakeCPLabelNumbers()
+        else:
+            self.MakeCPLabelNames()
 
-    def lmedSLNspressed(self, caller, event):
+    def hoveredAtlasItem(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Return the breast region under the pointer in the 3D view, from its markups or its surface, None if there is
+        none
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # show the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode37')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode37')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode137')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode137')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode87')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode87')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            self.pressed = 'lmed'
-            # change the label colours and values
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelmedR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelmedSLNs.SetSelectedColor(1, 0, 0)
+        for item, displayNode in self.hoverMarkups.items():
+            if displayNode.GetActiveComponentType() == slicer.vtkMRMLMarkupsDisplayNode.ComponentControlPoint:
+                return item
+        x, y = self.threeDView.interactor().GetEventPosition()
+        return self.pickedAtlasRegion(x, y)
 
-    def lINSLNspressed(self, caller, event):
+    def pickedAtlasRegion(self, x, y):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Return the breast region whose surface is at the display position of the 3D view, None if there is none.
+        On a merged region mesh the region is read from the region ID of the picked cell.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # show the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode35')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode35')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode135')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode135')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode85')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode85')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lIN'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelINR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelINSLNs.SetSelectedColor(1, 0, 0)
+        modelManager = self.threeDView.displayableManagerByClassName('vtkMRMLModelDisplayableManager')
+        if modelManager.Pick(x, y):
+            modelNode = slicer.mrmlScene.GetNodeByID(modelManager.GetPickedNodeID())
+            if modelNode in self.regionMeshes.values():
+                regionIds = modelNode.GetPolyData().GetCellData().GetArray(REGION_ID_ARRAY)
+                region = regionIds.GetValue(modelManager.GetPickedCellID())
+                return self.regionMeshItems.get((modelNode.GetID(), region))
+            return self.regionSurfaces.get((modelManager.GetPickedNodeID(), None))
+        segmentationManager = self.threeDView.displayableManagerByClassName('vtkMRMLSegmentationsDisplayableManager3D')
+        if segmentationManager.Pick(x, y):
+            return self.regionSurfaces.get((segmentationManager.GetPickedNodeID(),
+                                            segmentationManager.GetPickedSegmentID()))
+        return None
 
-    def rINSLNspressed(self, caller, event):
+    def enter(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called each time the user opens this module.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # show the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode47')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode47')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode147')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode147')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode97')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode97')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rIN'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderINR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderINSLNs.SetSelectedColor(1, 0, 0)
+        # Make sure parameter node exists and observed
+        self.initializeParameterNode()
 
-    def la2SLNspressed(self, caller, event):
+    def exit(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called each time the user opens a different module.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode27')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode27')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode127')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode127')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode77')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode77')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'la2'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodela2R.SetSelectedColor(1, 0, 0)
-            self.DisplayNodela2SLNs.SetSelectedColor(1, 0, 0)
+        # Do not react to parameter node changes (GUI wlil be updated when the user enters into the module)
+        self.removeObserver(self._parameterNode, vtk.vtkCommand.ModifiedEvent, self.updateGUIFromParameterNode)
 
-    def la3SLNspressed(self, caller, event):
+    def onSceneStartClose(self, caller, event):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called just before the scene is closed.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode28')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode28')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode128')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode128')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode78')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode78')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'la3'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodela3R.SetSelectedColor(1, 0, 0)
+        # Parameter node will be reset, do not use it anymore
+        self.setParameterNode(None)
+        # the merged statistics tables and the mirror instanced models are removed with the scene
+        self.tableNode = None
+        self.mergedTables = {}
+        self.mirrorPairs = []
+        self.mirrorTransforms = {}
 
-    def laaSLNspressed(self, caller, event):
+    def onSceneStartSave(self, caller, event):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called just before the scene is saved, the mirror instanced right models get their own surface back
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode29')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode29')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode129')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode129')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode79')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode79')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'laa'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelaaR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelaaSLNs.SetSelectedColor(1, 0, 0)
+        self.mirrorTransforms = self.logic.restoreMirrorPairs(self.atlasNodes, self.mirrorPairs)
 
-    def lalSLNspressed(self, caller, event):
+    def onSceneEndSave(self, caller, event):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called just after the scene is saved, the right models share the left surfaces again
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode30')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode30')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode130')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode130')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode80')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode80')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lal'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelalR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelalSLNs.SetSelectedColor(1, 0, 0)
+        self.logic.reinstanceMirrorPairs(self.atlasNodes, self.mirrorTransforms)
+        self.mirrorTransforms = {}
 
-    def lamSLNspressed(self, caller, event):
+    def onSceneEndClose(self, caller, event):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called just after the scene is closed.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode31')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode31')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode131')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode131')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode81')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode81')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lam'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelamR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelamSLNs.SetSelectedColor(1, 0, 0)
+        # If this module is shown while the scene is closed then recreate a new parameter node immediately
+        if self.parent.isEntered:
+            self.initializeParameterNode()
 
-    def lapSLNspressed(self, caller, event):
+    def muscleOpacitySliderValueChanged(self, newValue):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Change the muscle segment opacity when the user interacts with the slider
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode32')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode32')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode132')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode132')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode82')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode82')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lap'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelapR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelapSLNs.SetSelectedColor(1, 0, 0)
+        for displayNode in self.atlasDisplayNodes('muscles'):
+            displayNode.SetOpacity(newValue)
+        self.updateRenderingProfile()
 
-    def licsSLNspressed(self, caller, event):
+    def ESTROOpacitySliderValueChanged(self, newValue):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Change the ESTRO segment opacity when the user interacts with the slider
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode34')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode34')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode134')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode134')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode84')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode84')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label values and colours
-            self.pressed = 'lics'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelicsR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelicsSLNs.SetSelectedColor(1, 0, 0)
+        for displayNode in self.atlasDisplayNodes('ESTRO'):
+            displayNode.SetOpacity(newValue)
+        self.updateRenderingProfile()
 
-    def lipSLNspressed(self, caller, event):
+    def breastOpacitySliderValueChanged(self, newValue):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Change the breast segment opacity when the user interacts with the slider
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode36')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode36')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode136')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode136')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode86')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode86')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lip'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelipR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelipSLNs.SetSelectedColor(1, 0, 0)
+        for displayNode in self.atlasDisplayNodes('breast'):
+            displayNode.SetOpacity(newValue)
+        for modelNode in self.regionMeshes.values():
+            modelNode.GetDisplayNode().SetOpacity(newValue)
+        self.updateRenderingProfile()
 
-    def ra2SLNspressed(self, caller, event):
+    def SLNFieldVolumeOpacitySliderValueChanged(self, newValue):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Change the SLN field volumes opacity when the user interacts with the slider
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode39')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode39')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode139')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode139')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode89')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode89')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'ra2'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodera2R.SetSelectedColor(1, 0, 0)
-            self.DisplayNodera2SLNs.SetSelectedColor(1, 0, 0)
+        if self.fieldVolumeMesh is not None:
+            self.fieldVolumeMesh.GetDisplayNode().SetOpacity(newValue)
+            self.fieldVolumeMesh.GetDisplayNode().SetSliceIntersectionOpacity(newValue)
+        else:
+            # in 3D view and in slice view
+            for displayNode in self.atlasDisplayNodes('fieldVolumes'):
+                displayNode.SetOpacity(newValue)
+                displayNode.SetSliceIntersectionOpacity(newValue)
+        self.updateRenderingProfile()
 
-    def ra3SLNspressed(self, caller, event):
+    def onAtlasItemPressed(self, item):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Called when the user interacts with the markup of a breast region or SLN field and acts to display the
+        relevant table. The table, the labels and the highlight are looked up from the node role manifest.
         """
         # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode40')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode40')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode140')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode140')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode90')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode90')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'ra3'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodera3R.SetSelectedColor(1, 0, 0)
+        if self._parameterNode.GetParameter("ESTROVis") != 'false':
+            return
+        # show the table of the selected statistical analysis, the layout and table are only changed if needed
+        self.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
+        self.showStatisticsTable(item, self.selectedStatisticsMethod())
+        # change the label colours and values
+        self.pressed = item
+        if self._parameterNode.GetParameter("numberLabelVis") == "true":
+            self.MakeCPLabelNumbers()
+        self.updateHighlight()
 
-    def raaSLNspressed(self, caller, event):
+    def showStatisticsTable(self, item, method):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Show the statistics of the item with only the columns of the statistical analysis. The tables of the three
+        analyses are merged once per item, so switching analysis only hides and shows columns of the table view.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode41')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode41')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode141')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode141')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode91')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode91')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'raa'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderaaR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderaaSLNs.SetSelectedColor(1, 0, 0)
+        if item not in self.mergedTables:
+            self.mergedTables[item] = self.logic.mergeStatisticsTables(self.atlasNodes, item)
+            # a modified table resets the table views, which shows all the columns again
+            self.addObserver(self.mergedTables[item], vtk.vtkCommand.ModifiedEvent,
+                             lambda caller, event: self.columnUpdateTimer.start())
+        self.tableNode = self.mergedTables[item]
+        self.tableMethod = method
+        self.viewManager.showTable(self.tableNode)
+        self.hideOtherMethodColumns()
 
-    def ramSLNspressed(self, caller, event):
-        """
-        Called when the user interacts with this markup and acts to display the relevant table
-        """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode43')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode43')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode143')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode143')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode93')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode93')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'ram'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderamR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderamSLNs.SetSelectedColor(1, 0, 0)
+    def onLayoutChanged(self, layout):
+        self.columnUpdateTimer.start()
 
-    def rapSLNspressed(self, caller, event):
+    def hideOtherMethodColumns(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Hide the columns of the other analyses in the table views showing the statistics table. The hidden columns
+        are kept by the header of each view, not in MRML, so they are hidden again whenever the views are rebuilt
+        (layout change) or their table is reset.
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode44')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode44')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode144')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode144')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode94')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode94')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rap'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderapR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderapSLNs.SetSelectedColor(1, 0, 0)
+        if self.tableNode is None:
+            return
+        layoutManager = slicer.app.layoutManager()
+        for index in range(layoutManager.tableViewCount):
+            tableView = layoutManager.tableWidget(index).tableView()
+            shownTable = tableView.mrmlTableNode()
+            if shownTable is None or shownTable.GetID() != self.tableNode.GetID():
+                continue
+            for column in range(1, self.tableNode.GetNumberOfColumns()):
+                columnMethod = self.tableNode.GetColumnProperty(self.tableNode.GetColumnName(column), 'method')
+                tableView.setColumnHidden(column, columnMethod != self.tableMethod)
 
-    def ripSLNspressed(self, caller, event):
+    def updateHighlight(self):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Set back only the breast regions and SLN fields highlighted before, then highlight the pressed one
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode48')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode48')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode148')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode148')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode98')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode98')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rip'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderipR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderipSLNs.SetSelectedColor(1, 0, 0)
+        for item in self.highlightedItems - {self.pressed}:
+            self.restoreAtlasItem(item)
+        self.KeepPressedRed()
 
-    def rscSLNspressed(self, caller, event):
+    def highlightAtlasItem(self, item):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Make the breast region or SLN field red
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode50')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode50')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode150')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode150')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode100')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode100')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rsc'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderscR.SetSelectedColor(1, 0, 0)
+        self.batchModifications(self.highlightNodes[item])
+        for highlight in self.highlightActions[item]:
+            highlight()
+        self.highlightedItems.add(item)
 
-    def ricsSLNspressed(self, caller, event):
+    def restoreAtlasItem(self, item):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Set the breast region or SLN field back to its colour
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode46')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode46')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode146')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode146')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode96')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode96')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'rics'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodericsR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodericsSLNs.SetSelectedColor(1, 0, 0)
+        self.batchModifications(self.highlightNodes[item])
+        for restore in self.restoreActions[item]:
+            restore()
+        self.highlightedItems.discard(item)
 
-    def ralSLNspressed(self, caller, event):
+    def restoreSLNColour(self, displayNode, field):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Set a SLN markups back to green or to its SLN field colour
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode42')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode42')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode142')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode142')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode92')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode92')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'ral'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'right SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNoderalR.SetSelectedColor(1, 0, 0)
+        displayNode.SetSelectedColor(*self.slnColour(field))
 
-    def lscSLNspressed(self, caller, event):
+    def slnColour(self, field):
         """
-        Called when the user interacts with this markup and acts to display the relevant table
+        Return the colour of the SLNs of a SLN field: green if all SLNs are shown green, else the SLN field colour
         """
-        # don't do anything if ESTRO contours are showing
-        if self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # show the table view
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayout3DTableView)
-            # find the relevant table
-            if self._parameterNode.GetParameter("bayesianVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode38')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode38')
-            elif self._parameterNode.GetParameter("frequentistVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode138')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode138')
-            elif self._parameterNode.GetParameter("bootstrappingVis") == 'true':
-                slicer.app.applicationLogic().GetSelectionNode().SetReferenceActiveTableID('vtkMRMLTableNode88')
-                self.tableNode = slicer.mrmlScene.GetNodeByID('vtkMRMLTableNode88')
-            # show table
-            slicer.app.applicationLogic().PropagateTableSelection()
-            # change the label colours and values
-            self.pressed = 'lsc'
-            if self._parameterNode.GetParameter("numberLabelVis") == "true":
-                self.clicked = 'left SLN'
-                self.MakeCPLabelNumbers()
-            self.SetColoursBack()
-            self.DisplayNodelscR.SetSelectedColor(1, 0, 0)
+        if self._parameterNode.GetParameter("greenSLNs") == "true":
+            return SLN_GREEN
+        return SLN_FIELD_COLOURS[field]
 
     def KeepPressedRed(self):
         """
         Set the SLN or breast region which was most recently pressed back to red
         """
-        if self.pressed == 'Rb0':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_4", 1, 0, 0)
-        if self.pressed == 'Rb1':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_6", 1, 0, 0)
-        if self.pressed == 'Rb2':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_7", 1, 0, 0)
-        if self.pressed == 'Rb3':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_8", 1, 0, 0)
-        if self.pressed == 'Rb4':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_9", 1, 0, 0)
-        if self.pressed == 'Rb5':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_10", 1, 0, 0)
-        if self.pressed == 'Rb6':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_11", 1, 0, 0)
-        if self.pressed == 'Rb7':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_12", 1, 0, 0)
-        if self.pressed == 'Rb8':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_13", 1, 0, 0)
-        if self.pressed == 'Rb9':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_14", 1, 0, 0)
-        if self.pressed == 'Rb10':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_15", 1, 0, 0)
-        if self.pressed == 'Rb11':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_17", 1, 0, 0)
-        if self.pressed == 'Rb12':
-            self.RbreastSegDisplayNode.SetSegmentOverrideColor("Segment_5", 1, 0, 0)
-        if self.pressed == 'Lb0':
-            self.Lb0DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb1':
-            self.Lb1DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb2':
-            self.Lb2DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb3':
-            self.Lb3DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb4':
-            self.Lb4DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb5':
-            self.Lb5DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb6':
-            self.Lb6DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb7':
-            self.Lb7DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb8':
-            self.Lb8DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb9':
-            self.Lb9DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb10':
-            self.Lb10DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb11':
-            self.Lb11DisplayNode.SetColor(1, 0, 0)
-        if self.pressed == 'Lb12':
-            self.Lb12DisplayNode.SetColor(1, 0, 0)
-        # SLNs
-        if self.pressed == 'lmed':
-            self.DisplayNodelmedR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelmedSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lIN':
-            self.DisplayNodelINR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelINSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rmed':
-            self.DisplayNodermedR.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rIN':
-            self.DisplayNoderINR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderINSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'la2':
-            self.DisplayNodela2R.SetSelectedColor(1, 0, 0)
-            self.DisplayNodela2SLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'ra2':
-            self.DisplayNodera2R.SetSelectedColor(1, 0, 0)
-            self.DisplayNodera2SLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'la3':
-            self.DisplayNodela3R.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'ra3':
-            self.DisplayNodera3R.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'laa':
-            self.DisplayNodelaaR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelaaSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'raa':
-            self.DisplayNoderaaR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderaaSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lal':
-            self.DisplayNodelalR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelalSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lap':
-            self.DisplayNodelapR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelapSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rap':
-            self.DisplayNoderapR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderapSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lam':
-            self.DisplayNodelamR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelamSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'ram':
-            self.DisplayNoderamR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderamSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lics':
-            self.DisplayNodelicsR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelicsSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rics':
-            self.DisplayNodericsR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodericsSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lip':
-            self.DisplayNodelipR.SetSelectedColor(1, 0, 0)
-            self.DisplayNodelipSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rip':
-            self.DisplayNoderipR.SetSelectedColor(1, 0, 0)
-            self.DisplayNoderipSLNs.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'rsc':
-            self.DisplayNoderscR.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'lsc':
-            self.DisplayNodelscR.SetSelectedColor(1, 0, 0)
-        if self.pressed == 'ral':
-            self.DisplayNoderalR.SetSelectedColor(1, 0, 0)
-
-    def MakeCPLabelNumbers(self):
-        """
-        Change the control point label to the relevant statistic
+        if self.pressed:
+            self.highlightAtlasItem(self.pressed)
+
+    def MakeCPLabelNumbers(self, pressed=None):
+        """
+        Change the control point label to the relevant statistic of the pressed item, or of another item to preview it
         """
+        startTime = time.perf_counter()
+        pressed = pressed or self.pressed
+        method = self.selectedStatisticsMethod()
+
+        # look up all the labels first, then apply them
+        labels = self.logic.controlPointLabels(self.atlasItems, pressed, method)
+
         # set the rest to names
         self.MakeCPLabelNames()
+        for name, label in labels.items():
+            self.labelMarkups[name].SetNthControlPointLabel(0, label)
+            if 'region' in self.atlasItems[name]:
+                self.labelMarkups[name].GetDisplayNode().SetSelectedColor(1.0, 1.0, 1.0)
+
+        self.labelLatency = time.perf_counter() - startTime
+        logging.debug("Labels of %s (%s) updated in %.1f ms" % (pressed, method, self.labelLatency * 1000))
 
-        # change the left SLN numbers if a left breast region was clicked
-        num_rows = self.tableNode.GetNumberOfRows()
-        if self.clicked == "left breast":
-            # change the left SLN numbers
-            for i in range(num_rows):
-                if self.tableNode.GetCellText(i, 0) == "MED: Mediastinal":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelmedR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "IN: Interval":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelINR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "A2: Axilla Level II":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodela2R.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "A3: Axilla Level III":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodela3R.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AA: Axilla Level I (anterior)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelaaR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AM: Axilla Level I (medial)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelamR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AP: Axilla Level I (posterior)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelapR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AIP: Axilla Level I (interpectoral)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelipR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "IM: Internal Mammary":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelicsR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AL: Axilla Level I (lateral)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelalR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "SC: Supraclavicular":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodelscR.SetNthControlPointLabel(0, (label[0]+'%'))
-            # make the right SLN labels hidden
-            self.MarkupNodermedR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderscR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderalR.SetNthControlPointLabel(0, '')
-            self.MarkupNodericsR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderipR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderapR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderamR.SetNthControlPointLabel(0, '')
-            self.MarkupNoderaaR.SetNthControlPointLabel(0, '')
-            self.MarkupNodera3R.SetNthControlPointLabel(0, '')
-            self.MarkupNodera2R.SetNthControlPointLabel(0, '')
-            self.MarkupNoderINR.SetNthControlPointLabel(0, '')
-
-        # change the right SLN numbers if a right breast region was clicked
-        if self.clicked == 'right breast':
-            # change the right SLN numbers
-            for i in range(num_rows):
-                if self.tableNode.GetCellText(i, 0) == "MED: Mediastinal":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodermedR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "IN: Interval":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderINR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "A2: Axilla Level II":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodera2R.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "A3: Axilla Level III":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodera3R.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AA: Axilla Level I (anterior)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderaaR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AM: Axilla Level I (medial)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderamR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AP: Axilla Level I (posterior)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderapR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AIP: Axilla Level I (interpectoral)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderipR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "IM: Internal Mammary":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodericsR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "SC: Supraclavicular":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderscR.SetNthControlPointLabel(0, (label[0]+'%'))
-                if self.tableNode.GetCellText(i, 0) == "AL: Axilla Level I (lateral)":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNoderalR.SetNthControlPointLabel(0, (label[0]+'%'))
-            # make the left SLN labels hidden
-            self.MarkupNodelmedR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelINR.SetNthControlPointLabel(0, '')
-            self.MarkupNodela2R.SetNthControlPointLabel(0, '')
-            self.MarkupNodela3R.SetNthControlPointLabel(0, '')
-            self.MarkupNodelaaR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelamR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelapR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelipR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelicsR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelalR.SetNthControlPointLabel(0, '')
-            self.MarkupNodelscR.SetNthControlPointLabel(0, '')
-
-        # change the left breast numbers and colours if a left SLN was clicked
-        if self.clicked == 'left SLN':
-            # change the left breast numbers
-            for i in range(num_rows):
-                if self.tableNode.GetCellText(i, 0) == "0":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb0.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb0.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "1":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb1.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb1.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "2":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb2.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb2.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "3":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb3.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb3.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "4":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb4.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb4.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "5":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb5.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb5.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "6":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb6.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb6.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "7":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb7.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb7.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "8":
-                    value = self.tableNode.GetCellText(i, 1)
-                    self.MarkupNodeLb8.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb8.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "9":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb9.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb9.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "10":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb10.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb10.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "11":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb11.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb11.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "12":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeLb12.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeLb12.SetSelectedColor(1.0, 1.0, 1.0)
-
-        # change the right breast numbers and colours if a right SLN was clicked
-        if self.clicked == 'right SLN':
-            # change the right breast numbers
-            for i in range(num_rows):
-                if self.tableNode.GetCellText(i, 0) == "0":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb0.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb0.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "1":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb1.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb1.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "2":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb2.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb2.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "3":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb3.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb3.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "4":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb4.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb4.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "5":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb5.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb5.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "6":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb6.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb6.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "7":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb7.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb7.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "8":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb8.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb8.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "9":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb9.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb9.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "10":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb10.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb10.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "11":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb11.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb11.SetSelectedColor(1.0, 1.0, 1.0)
-                if self.tableNode.GetCellText(i, 0) == "12":
-                    value = self.tableNode.GetCellText(i, 1)
-                    label = value.split()
-                    self.MarkupNodeRb12.SetNthControlPointLabel(0, (label[0]+'%'))
-                    self.DisplayNodeRb12.SetSelectedColor(1.0, 1.0, 1.0)
+    def selectedStatisticsMethod(self):
+        """
+        Return the statistical analysis selected by the user: 'bayesian', 'bootstrapping' or 'frequentist'
+        """
+        for method in STATISTICS_METHODS:
+            if self._parameterNode.GetParameter(method + "Vis") == "true":
+                return method
+        return STATISTICS_METHODS[0]
 
     def MakeCPLabelNames(self):
         """
         Change the control point label to the relevant name
         """
-        # set SLN control points to names
-        self.MarkupNodelmedR.SetNthControlPointLabel(0, 'MED')
-        self.MarkupNodermedR.SetNthControlPointLabel(0, 'MED')
-        self.MarkupNodelINR.SetNthControlPointLabel(0, 'IN')
-        self.MarkupNoderINR.SetNthControlPointLabel(0, 'IN')
-        self.MarkupNodela2R.SetNthControlPointLabel(0, 'A2')
-        self.MarkupNodera2R.SetNthControlPointLabel(0, 'A2')
-        self.MarkupNodela3R.SetNthControlPointLabel(0, 'A3')
-        self.MarkupNodera3R.SetNthControlPointLabel(0, 'A3')
-        self.MarkupNodelaaR.SetNthControlPointLabel(0, 'AA')
-        self.MarkupNoderaaR.SetNthControlPointLabel(0, 'AA')
-        self.MarkupNodelamR.SetNthControlPointLabel(0, 'AM')
-        self.MarkupNoderamR.SetNthControlPointLabel(0, 'AM')
-        self.MarkupNodelapR.SetNthControlPointLabel(0, 'AP')
-        self.MarkupNoderapR.SetNthControlPointLabel(0, 'AP')
-        self.MarkupNodelipR.SetNthControlPointLabel(0, 'AIP')
-        self.MarkupNoderipR.SetNthControlPointLabel(0, 'AIP')
-        self.MarkupNodelicsR.SetNthControlPointLabel(0, 'IM')
-        self.MarkupNodericsR.SetNthControlPointLabel(0, 'IM')
-        self.MarkupNodelalR.SetNthControlPointLabel(0, 'AL')
-        self.MarkupNoderalR.SetNthControlPointLabel(0, 'AL')
-        self.MarkupNodelscR.SetNthControlPointLabel(0, 'SC')
-        self.MarkupNoderscR.SetNthControlPointLabel(0, 'SC')
-        # set breast control points to names
-        self.MarkupNodeRb0.SetNthControlPointLabel(0, '0')
-        self.MarkupNodeRb1.SetNthControlPointLabel(0, '1')
-        self.MarkupNodeRb2.SetNthControlPointLabel(0, '2')
-        self.MarkupNodeRb3.SetNthControlPointLabel(0, '3')
-        self.MarkupNodeRb4.SetNthControlPointLabel(0, '4')
-        self.MarkupNodeRb5.SetNthControlPointLabel(0, '5')
-        self.MarkupNodeRb6.SetNthControlPointLabel(0, '6')
-        self.MarkupNodeRb7.SetNthControlPointLabel(0, '7')
-        self.MarkupNodeRb8.SetNthControlPointLabel(0, '8')
-        self.MarkupNodeRb9.SetNthControlPointLabel(0, '9')
-        self.MarkupNodeRb10.SetNthControlPointLabel(0, '10')
-        self.MarkupNodeRb11.SetNthControlPointLabel(0, '11')
-        self.MarkupNodeRb12.SetNthControlPointLabel(0, '12')
-        self.MarkupNodeLb0.SetNthControlPointLabel(0, '0')
-        self.MarkupNodeLb1.SetNthControlPointLabel(0, '1')
-        self.MarkupNodeLb2.SetNthControlPointLabel(0, '2')
-        self.MarkupNodeLb3.SetNthControlPointLabel(0, '3')
-        self.MarkupNodeLb4.SetNthControlPointLabel(0, '4')
-        self.MarkupNodeLb5.SetNthControlPointLabel(0, '5')
-        self.MarkupNodeLb6.SetNthControlPointLabel(0, '6')
-        self.MarkupNodeLb7.SetNthControlPointLabel(0, '7')
-        self.MarkupNodeLb8.SetNthControlPointLabel(0, '8')
-        self.MarkupNodeLb9.SetNthControlPointLabel(0, '9')
-        self.MarkupNodeLb10.SetNthControlPointLabel(0, '10')
-        self.MarkupNodeLb11.SetNthControlPointLabel(0, '11')
-        self.MarkupNodeLb12.SetNthControlPointLabel(0, '12')
-        # change breast label colour back
-        self.DisplayNodeRb0.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb1.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb2.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb3.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb4.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb5.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb6.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb7.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb8.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb9.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb10.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb11.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeRb12.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb0.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb1.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb2.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb3.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb4.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb5.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb6.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb7.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb8.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb9.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb10.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb11.SetSelectedColor(0.0, 0.0, 0.0)
-        self.DisplayNodeLb12.SetSelectedColor(0.0, 0.0, 0.0)
+        self.batchModifications(self.labelNodes)
+        for item, descriptor in self.atlasItems.items():
+            self.labelMarkups[item].SetNthControlPointLabel(0, descriptor['label']['name'])
+            if 'region' in descriptor:
+                # change breast label colour back
+                self.labelMarkups[item].GetDisplayNode().SetSelectedColor(0.0, 0.0, 0.0)
 
         if self.clearNode == "false":
             self.KeepPressedRed()
+
     def MakeCPLabelNone(self):
         """
         Removes the SLN control point labels
         """
-        self.MarkupNodelmedR.SetNthControlPointLabel(0, '')
-        self.MarkupNodermedR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelINR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderINR.SetNthControlPointLabel(0, '')
-        self.MarkupNodela2R.SetNthControlPointLabel(0, '')
-        self.MarkupNodera2R.SetNthControlPointLabel(0, '')
-        self.MarkupNodela3R.SetNthControlPointLabel(0, '')
-        self.MarkupNodera3R.SetNthControlPointLabel(0, '')
-        self.MarkupNodelaaR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderaaR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelamR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderamR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelapR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderapR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelipR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderipR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelicsR.SetNthControlPointLabel(0, '')
-        self.MarkupNodericsR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelalR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderscR.SetNthControlPointLabel(0, '')
-        self.MarkupNoderalR.SetNthControlPointLabel(0, '')
-        self.MarkupNodelscR.SetNthControlPointLabel(0, '')
+        self.batchModifications(self.labelNodes)
+        for item, descriptor in self.atlasItems.items():
+            if 'field' in descriptor:
+                self.labelMarkups[item].SetNthControlPointLabel(0, '')
 
     def SetColoursBack(self):
         """
         Change the SLN colour to either green or their individual colours. Change the breast region colour to original.
+        A new selection only sets back what was highlighted (see updateHighlight), this resets the whole atlas.
         """
-        # check if the SLNs should all be green
-        if self._parameterNode.GetParameter("greenSLNs") == "true":
-            # make all the SLNs green
-            self.DisplayNodelalSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelalR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelamSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelamR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelapSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelapR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderamSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderamR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderapSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderapR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodericsSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodericsR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderINSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderINR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelINSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelINR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelmedSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelmedR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodera2SLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodera2R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodela2SLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodela2R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelaaSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelaaR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelipSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelipR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderaaSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderaaR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderipSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderipR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelicsSLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelicsR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelscR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderscR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodermedR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNoderalR.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodera3R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodela3R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-
-        # check if the SLNs should have individual node field colours
-        elif self._parameterNode.GetParameter("greenSLNs") == "false":
-            # make the SLNs separate colours
-            self.DisplayNodelalSLNs.SetSelectedColor(0, 0.422, 0.622)
-            self.DisplayNodelalR.SetSelectedColor(0, 0.422, 0.622)
-            self.DisplayNodelamSLNs.SetSelectedColor(0.3333333333333333, 0.6666666666666666, 1.0)
-            self.DisplayNodelamR.SetSelectedColor(0.3333333333333333, 0.6666666666666666, 1.0)
-            self.DisplayNodelapSLNs.SetSelectedColor(0.3333333333333333, 1.0, 1.0)
-            self.DisplayNodelapR.SetSelectedColor(0.3333333333333333, 1.0, 1.0)
-            self.DisplayNoderamSLNs.SetSelectedColor(0.3333333333333333, 0.6666666666666666, 1.0)
-            self.DisplayNoderamR.SetSelectedColor(0.3333333333333333, 0.6666666666666666, 1.0)
-            self.DisplayNoderapSLNs.SetSelectedColor(0.3333333333333333, 1.0, 1.0)
-            self.DisplayNoderapR.SetSelectedColor(0.3333333333333333, 1.0, 1.0)
-            self.DisplayNodericsSLNs.SetSelectedColor(1.0, 1.0, 0.0)
-            self.DisplayNodericsR.SetSelectedColor(1.0, 1.0, 0.0)
-            self.DisplayNoderINSLNs.SetSelectedColor(0.858, 0.647, 1.000)
-            self.DisplayNoderINR.SetSelectedColor(0.858, 0.647, 1.000)
-            self.DisplayNodelINSLNs.SetSelectedColor(0.858, 0.647, 1.000)
-            self.DisplayNodelINR.SetSelectedColor(0.858, 0.647, 1.000)
-            self.DisplayNodelmedSLNs.SetSelectedColor(0.4412, 0.2549, 0.1843)
-            self.DisplayNodelmedR.SetSelectedColor(0.4412, 0.2549, 0.1843)
-            self.DisplayNodera2SLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodera2R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodela2SLNs.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodela2R.SetSelectedColor(0.0, 0.6666666666666666, 0.0)
-            self.DisplayNodelaaSLNs.SetSelectedColor(0.0, 0.0, 1.0)
-            self.DisplayNodelaaR.SetSelectedColor(0.0, 0.0, 1.0)
-            self.DisplayNodelipSLNs.SetSelectedColor(0.988, 0.416, 0.012)
-            self.DisplayNodelipR.SetSelectedColor(0.988, 0.416, 0.012)
-            self.DisplayNoderaaSLNs.SetSelectedColor(0.0, 0.0, 1.0)
-            self.DisplayNoderaaR.SetSelectedColor(0.0, 0.0, 1.0)
-            self.DisplayNoderipSLNs.SetSelectedColor(0.988, 0.416, 0.012)
-            self.DisplayNoderipR.SetSelectedColor(0.988, 0.416, 0.012)
-            self.DisplayNodelicsSLNs.SetSelectedColor(1.0, 1.0, 0.0)
-            self.DisplayNodelicsR.SetSelectedColor(1.0, 1.0, 0.0)
-            self.DisplayNodelscR.SetSelectedColor(0.666, 0.000, 0.498)
-            self.DisplayNoderscR.SetSelectedColor(0.666, 0.000, 0.498)
-            self.DisplayNodermedR.SetSelectedColor(0.4412, 0.2549, 0.1843)
-            self.DisplayNoderalR.SetSelectedColor(0, 0.422, 0.622)
-            self.DisplayNodera3R.SetSelectedColor(1.0, 0.33333, 1.0)
-            self.DisplayNodela3R.SetSelectedColor(1.0, 0.33333, 1.0)
-
-        # set the breast segments back as well
-        self.Lb0DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb1DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb2DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb3DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb4DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb5DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb6DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb7DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb8DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb9DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb10DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb11DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.Lb12DisplayNode.SetColor(0.874, 0.666, 0.545)
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_4")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_5")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_6")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_7")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_8")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_9")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_10")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_11")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_12")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_13")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_14")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_15")
-        self.RbreastSegDisplayNode.UnsetSegmentOverrideColor("Segment_17")
+        for item in self.atlasItems:
+            self.restoreAtlasItem(item)
 
         if self.clearNode == "false":
             self.KeepPressedRed()
@@ -2718,14 +1518,14 @@ class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin)
         """
         Stop showing table and reset the atlas if pressed
         """
-        slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
-        self.clearNode = "true"
-        self.SetColoursBack()
-        if self._parameterNode.GetParameter("numberLabelVis") == "true":
-            self.MakeCPLabelNames()
-        self.clearNode = "false"
-        self.clicked = ''
-        self.pressed = ''
+        self.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+        with self.atlasModification("clear selection"):
+            self.clearNode = "true"
+            self.SetColoursBack()
+            if self._parameterNode.GetParameter("numberLabelVis") == "true":
+                self.MakeCPLabelNames()
+            self.clearNode = "false"
+            self.pressed = ''
 
     def initializeParameterNode(self):
         """
@@ -2754,7 +1554,8 @@ class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin)
         # Initial GUI update
         self.updateGUIFromParameterNode()
 
-        # Initial model update
+        # Initial model update, the whole view state is applied to the new parameter node
+        self.appliedViewState = None
         self.updateParameterNodeFromGUI()
 
     def updateGUIFromParameterNode(self, caller=None, event=None):
@@ -2792,10 +1593,47 @@ class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin)
         self.ui.IC4CheckBox.checked = (self._parameterNode.GetParameter("IC4Vis") == "true")
         self.ui.INTPECTCheckBox.checked = (self._parameterNode.GetParameter("INTPECTVis") == "true")
         self.ui.SLNFieldModelCheckBox.checked = (self._parameterNode.GetParameter("SLNVolVis") == "true")
+        self.ui.hoverPreviewCheckBox.checked = (self._parameterNode.GetParameter("hoverPreview") == "true")
 
         # All the GUI updates are done
         self._updatingGUIFromParameterNode = False
 
+    def connectParameterWidget(self, widget):
+        """
+        Update the parameter node when the check box or radio button is toggled
+        """
+        triggerName = widget.objectName
+        widget.connect("toggled(bool)", lambda checked: self.scheduleParameterNodeUpdate(triggerName))
+
+    def scheduleParameterNodeUpdate(self, trigger):
+        """
+        Collect the GUI changes made in the same event loop turn into a single parameter node update
+        """
+        if self._parameterNode is None or self._updatingGUIFromParameterNode:
+            return
+        if not self.scheduledUpdateTriggers:
+            self.scheduledUpdateTime = time.perf_counter()
+        # only a method radio button starts the statistics table switch measured in process()
+        if trigger in self.methodTriggers and self.methodSwitchTime is None:
+            self.methodSwitchTime = time.perf_counter()
+        self.scheduledUpdateTriggers.append(trigger)
+        self.parameterNodeUpdateTimer.start()
+
+    def applyScheduledParameterNodeUpdate(self):
+        """
+        Apply the GUI changes collected since the last update
+        """
+        triggers = self.scheduledUpdateTriggers
+        self.scheduledUpdateTriggers = []
+        try:
+            self.updateParameterNodeFromGUI()
+            logging.debug("Parameter node update for %s applied in %.1f ms"
+                          % (", ".join(triggers), (time.perf_counter() - self.scheduledUpdateTime) * 1000))
+        finally:
+            # the start times belong to this update only, later updates (e.g. a scene load) must not reuse them
+            self.scheduledUpdateTime = None
+            self.methodSwitchTime = None
+
     def updateParameterNodeFromGUI(self, caller=None, event=None):
         """
         This method is called when the user makes any change in the GUI.
@@ -2830,533 +1668,163 @@ class BreastCancerAtlasWidget(ScriptedLoadableModuleWidget, VTKObservationMixin)
         self._parameterNode.SetParameter("IC4Vis", "true" if self.ui.IC4CheckBox.checked else "false")
         self._parameterNode.SetParameter("INTPECTVis", "true" if self.ui.INTPECTCheckBox.checked else "false")
         self._parameterNode.SetParameter("SLNVolVis", "true" if self.ui.SLNFieldModelCheckBox.checked else "false")
+        self._parameterNode.SetParameter("hoverPreview", "true" if self.ui.hoverPreviewCheckBox.checked else "false")
 
         self._parameterNode.EndModify(wasModified)  # End modification of properties
 
         # Compute changes in model visibility
-        self.process()
+        with self.atlasModification("settings"):
+            self.process()
+
+    def desiredViewState(self):
+        """
+        Return the state the atlas view should be in according to the parameter node
+        """
+        parameter = lambda name: self._parameterNode.GetParameter(name) == "true"
+        if parameter("ESTROVis") or parameter("nameLabelVis"):
+            # names are shown while the ESTRO contours are displayed
+            labels = 'names'
+        elif parameter("numberLabelVis"):
+            labels = 'numbers'
+        else:
+            labels = 'none'
+        return AtlasViewState(
+            representativeSLNsOnly=parameter("repSLNVis"),
+            labels=labels,
+            method=self.selectedStatisticsMethod(),
+            greenSLNs=parameter("greenSLNs"),
+            fieldVolumes=parameter("SLNVolVis"),
+            ESTRO=parameter("ESTROVis"),
+            ESTROParts=tuple(part for part in ESTRO_PARTS if parameter(part + "Vis")),
+            pectoralisMajor=parameter("pecMajVis"),
+            pectoralisMinor=parameter("pecMinVis"),
+            latissimusDorsi=parameter("latDorVis"),
+            leftBreast=parameter("LbVis"),
+            rightBreast=parameter("RbVis"),
+            hoverPreview=parameter("hoverPreview"))
+
+    def atlasDisplayNodes(self, group):
+        """
+        Return the display nodes of all the atlas nodes of a node role group
+        """
+        return [node.GetDisplayNode() for key, node in self.atlasNodes.items() if key.startswith(group + '/')]
 
     def process(self):
         """
-         Run the processing to change visibility of components in the model
+        Change the visibility of components in the model to match the parameter node.
+        Only the parts of the view state that changed since the last call are applied to the scene.
         """
+        state = self.desiredViewState()
+        previousState = self.appliedViewState
+        if previousState is None:
+            changed = set(state._fields)
+        else:
+            changed = {field for field in state._fields if getattr(state, field) != getattr(previousState, field)}
+        self.appliedViewState = state
+
         # change the visibility between the representative SLNs and full atlas
-        if self._parameterNode.GetParameter("repSLNVis") == "true":
-            # hide the full atlas (no full atlas for ra3, la3, rsc, lsc,  ral)
-            self.DisplayNodelalSLNs.SetVisibility(False)
-            self.DisplayNodelamSLNs.SetVisibility(False)
-            self.DisplayNodelapSLNs.SetVisibility(False)
-            self.DisplayNoderamSLNs.SetVisibility(False)
-            self.DisplayNoderapSLNs.SetVisibility(False)
-            self.DisplayNodericsSLNs.SetVisibility(False)
-            self.DisplayNoderINSLNs.SetVisibility(False)
-            self.DisplayNodelINSLNs.SetVisibility(False)
-            self.DisplayNodelmedSLNs.SetVisibility(False)
-            self.DisplayNodera2SLNs.SetVisibility(False)
-            self.DisplayNodela2SLNs.SetVisibility(False)
-            self.DisplayNodelaaSLNs.SetVisibility(False)
-            self.DisplayNodelipSLNs.SetVisibility(False)
-            self.DisplayNoderaaSLNs.SetVisibility(False)
-            self.DisplayNoderipSLNs.SetVisibility(False)
-            self.DisplayNodelicsSLNs.SetVisibility(False)
-
-        elif self._parameterNode.GetParameter("repSLNVis") == "false":
-            # show the full atlas (no full atlas for ra3, la3, rsc, lsc, ral)
-            self.DisplayNodelalSLNs.SetVisibility(True)
-            self.DisplayNodelamSLNs.SetVisibility(True)
-            self.DisplayNodelapSLNs.SetVisibility(True)
-            self.DisplayNoderamSLNs.SetVisibility(True)
-            self.DisplayNoderapSLNs.SetVisibility(True)
-            self.DisplayNodericsSLNs.SetVisibility(True)
-            self.DisplayNoderINSLNs.SetVisibility(True)
-            self.DisplayNodelINSLNs.SetVisibility(True)
-            self.DisplayNodelmedSLNs.SetVisibility(True)
-            self.DisplayNodera2SLNs.SetVisibility(True)
-            self.DisplayNodela2SLNs.SetVisibility(True)
-            self.DisplayNodelaaSLNs.SetVisibility(True)
-            self.DisplayNodelipSLNs.SetVisibility(True)
-            self.DisplayNoderaaSLNs.SetVisibility(True)
-            self.DisplayNoderipSLNs.SetVisibility(True)
-            self.DisplayNodelicsSLNs.SetVisibility(True)
-
-        # change the control point label to names if selected
-        if self._parameterNode.GetParameter("nameLabelVis") == "true":
-            self.MakeCPLabelNames()
-        if self._parameterNode.GetParameter("numberLabelVis") == "true":
-            if self.tableNode is not None:
-                self.MakeCPLabelNumbers()
+        # (no full atlas for ra3, la3, rsc, lsc, ral)
+        if 'representativeSLNsOnly' in changed:
+            if self.slnPointCloud is not None:
+                self.slnPointCloud.setVisibility(not state.representativeSLNsOnly)
             else:
+                for displayNode in self.atlasDisplayNodes('atlasSLNMarkups'):
+                    displayNode.SetVisibility(not state.representativeSLNsOnly)
+
+        # change the control point labels, this also ends the preview of a hovered breast region
+        if 'labels' in changed:
+            self.previewedItem = None
+            if state.labels == 'names':
                 self.MakeCPLabelNames()
-        if self._parameterNode.GetParameter("noLabelVis") == "true":
-            self.MakeCPLabelNone()
+            elif state.labels == 'numbers' and self.pressed:
+                self.MakeCPLabelNumbers()
+            elif state.labels == 'numbers':
+                self.MakeCPLabelNames()
+            else:
+                self.MakeCPLabelNone()
+
+        # show the labels of the pressed item again when the hover preview is switched off
+        if 'hoverPreview' in changed and not state.hoverPreview and self.previewedItem:
+            self.endHoverPreview()
 
         # change the colour of the SLNs and breast regions which aren't selected
-        self.SetColoursBack()
-
-        # recall pressed functions to change stats table type without additional interaction
-        # check that the table is showing first
-        if slicer.app.layoutManager().activeMRMLTableViewNode().IsViewVisibleInLayout() == True:
-            # breast regions
-            if self.pressed == 'Rb0':
-                self.Rb0pressed(self, self._parameterNode)
-            if self.pressed == 'Rb1':
-                self.Rb1pressed(self, self._parameterNode)
-            if self.pressed == 'Rb2':
-                self.Rb2pressed(self, self._parameterNode)
-            if self.pressed == 'Rb3':
-                self.Rb3pressed(self, self._parameterNode)
-            if self.pressed == 'Rb4':
-                self.Rb4pressed(self, self._parameterNode)
-            if self.pressed == 'Rb5':
-                self.Rb5pressed(self, self._parameterNode)
-            if self.pressed == 'Rb6':
-                self.Rb6pressed(self, self._parameterNode)
-            if self.pressed == 'Rb7':
-                self.Rb7pressed(self, self._parameterNode)
-            if self.pressed == 'Rb8':
-                self.Rb8pressed(self, self._parameterNode)
-            if self.pressed == 'Rb9':
-                self.Rb9pressed(self, self._parameterNode)
-            if self.pressed == 'Rb10':
-                self.Rb10pressed(self, self._parameterNode)
-            if self.pressed == 'Rb11':
-                self.Rb11pressed(self, self._parameterNode)
-            if self.pressed == 'Rb12':
-                self.Rb12pressed(self, self._parameterNode)
-            if self.pressed == 'Lb0':
-                self.Lb0pressed(self, self._parameterNode)
-            if self.pressed == 'Lb1':
-                self.Lb1pressed(self, self._parameterNode)
-            if self.pressed == 'Lb2':
-                self.Lb2pressed(self, self._parameterNode)
-            if self.pressed == 'Lb3':
-                self.Lb3pressed(self, self._parameterNode)
-            if self.pressed == 'Lb4':
-                self.Lb4pressed(self, self._parameterNode)
-            if self.pressed == 'Lb5':
-                self.Lb5pressed(self, self._parameterNode)
-            if self.pressed == 'Lb6':
-                self.Lb6pressed(self, self._parameterNode)
-            if self.pressed == 'Lb7':
-                self.Lb7pressed(self, self._parameterNode)
-            if self.pressed == 'Lb8':
-                self.Lb8pressed(self, self._parameterNode)
-            if self.pressed == 'Lb9':
-                self.Lb9pressed(self, self._parameterNode)
-            if self.pressed == 'Lb10':
-                self.Lb10pressed(self, self._parameterNode)
-            if self.pressed == 'Lb11':
-                self.Lb11pressed(self, self._parameterNode)
-            if self.pressed == 'Lb12':
-                self.Lb12pressed(self, self._parameterNode)
-            # SLNs
-            if self.pressed == 'lmed':
-                self.lmedSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lIN':
-                self.lINSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rmed':
-                self.rmedSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rIN':
-                self.rINSLNspressed(self, self._parameterNode)
-            if self.pressed == 'la2':
-                self.la2SLNspressed(self, self._parameterNode)
-            if self.pressed == 'ra2':
-                self.ra2SLNspressed(self, self._parameterNode)
-            if self.pressed == 'la3':
-                self.la3SLNspressed(self, self._parameterNode)
-            if self.pressed == 'ra3':
-                self.ra3SLNspressed(self, self._parameterNode)
-            if self.pressed == 'laa':
-                self.laaSLNspressed(self, self._parameterNode)
-            if self.pressed == 'raa':
-                self.raaSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lal':
-                self.lalSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lap':
-                self.lapSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rap':
-                self.rapSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lam':
-                self.lamSLNspressed(self, self._parameterNode)
-            if self.pressed == 'ram':
-                self.ramSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lics':
-                self.licsSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rics':
-                self.ricsSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lip':
-                self.lipSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rip':
-                self.ripSLNspressed(self, self._parameterNode)
-            if self.pressed == 'rsc':
-                self.rscSLNspressed(self, self._parameterNode)
-            if self.pressed == 'lsc':
-                self.lscSLNspressed(self, self._parameterNode)
-            if self.pressed == 'ral':
-                self.ralSLNspressed(self, self._parameterNode)
+        if 'greenSLNs' in changed:
+            self.SetColoursBack()
+
+        # swap the table of the pressed item to the new stats table type without additional interaction
+        # check that the table is showing first, the layout and highlight stay as they are
+        if 'method' in changed and self.pressed and not state.ESTRO and self.viewManager.isTableViewShown():
+            self.showStatisticsTable(self.pressed, state.method)
+            if state.labels == 'numbers' and 'labels' not in changed:
+                self.MakeCPLabelNumbers()
+            if self.methodSwitchTime is not None:
+                self.methodSwitchLatency = time.perf_counter() - self.methodSwitchTime
+                self.methodSwitchTime = None
+                logging.debug("Statistics table of %s switched to %s in %.1f ms"
+                              % (self.pressed, state.method, self.methodSwitchLatency * 1000))
 
         # change the visibility of the SLN field volumes
-        if self._parameterNode.GetParameter("SLNVolVis") == 'true':
-            self.la2VolumeDisplayNode.SetVisibility(True)
-            self.laaVolumeDisplayNode.SetVisibility(True)
-            self.lalVolumeDisplayNode.SetVisibility(True)
-            self.lamVolumeDisplayNode.SetVisibility(True)
-            self.lapVolumeDisplayNode.SetVisibility(True)
-            self.ra2VolumeDisplayNode.SetVisibility(True)
-            self.raaVolumeDisplayNode.SetVisibility(True)
-            self.ramVolumeDisplayNode.SetVisibility(True)
-            self.rapVolumeDisplayNode.SetVisibility(True)
-            self.ricsVolumeDisplayNode.SetVisibility(True)
-            self.medVolumeDisplayNode.SetVisibility(True)
-            self.RINVolumeDisplayNode.SetVisibility(True)
-            self.laipVolumeDisplayNode.SetVisibility(True)
-            self.raipVolumeDisplayNode.SetVisibility(True)
-            self.licsVolumeDisplayNode.SetVisibility(True)
-            self.LINVolumeDisplayNode.SetVisibility(True)
-
-        if self._parameterNode.GetParameter("SLNVolVis") == 'false':
-            self.la2VolumeDisplayNode.SetVisibility(False)
-            self.laaVolumeDisplayNode.SetVisibility(False)
-            self.lalVolumeDisplayNode.SetVisibility(False)
-            self.lamVolumeDisplayNode.SetVisibility(False)
-            self.lapVolumeDisplayNode.SetVisibility(False)
-            self.ra2VolumeDisplayNode.SetVisibility(False)
-            self.raaVolumeDisplayNode.SetVisibility(False)
-            self.ramVolumeDisplayNode.SetVisibility(False)
-            self.rapVolumeDisplayNode.SetVisibility(False)
-            self.ricsVolumeDisplayNode.SetVisibility(False)
-            self.medVolumeDisplayNode.SetVisibility(False)
-            self.RINVolumeDisplayNode.SetVisibility(False)
-            self.laipVolumeDisplayNode.SetVisibility(False)
-            self.raipVolumeDisplayNode.SetVisibility(False)
-            self.licsVolumeDisplayNode.SetVisibility(False)
-            self.LINVolumeDisplayNode.SetVisibility(False)
+        if 'fieldVolumes' in changed:
+            if self.fieldVolumeMesh is not None:
+                self.fieldVolumeMesh.GetDisplayNode().SetVisibility(state.fieldVolumes)
+            else:
+                for displayNode in self.atlasDisplayNodes('fieldVolumes'):
+                    displayNode.SetVisibility(state.fieldVolumes)
 
         # change the view and ESTRO visibility based on check box selection
-        if self._parameterNode.GetParameter("ESTROVis") == 'true':
-            # change to the four up view
-            slicer.app.layoutManager().resetSliceViews()
-            slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
-            # make the atlas back to original
-            self.MakeCPLabelNames()
-            self.SetColoursBack()
-
-            # make the individual segment buttons enabled
-            self.ui.L1CheckBox.setEnabled(True)
-            self.ui.L2CheckBox.setEnabled(True)
-            self.ui.L3CheckBox.setEnabled(True)
-            self.ui.L4CheckBox.setEnabled(True)
-            self.ui.IMNCheckBox.setEnabled(True)
-            self.ui.IC4CheckBox.setEnabled(True)
-            self.ui.INTPECTCheckBox.setEnabled(True)
-
-            # turn on visibility of left and right estro segmentations
-            # check if each segment should be displayed before showing it
-            if self._parameterNode.GetParameter("L1Vis") == 'true':
-                # show L1 segment
-                self.ESTRO_L_L1_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_L1_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("L2Vis") == 'true':
-                # show L2 segment
-                self.ESTRO_L_L2_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_L2_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("L3Vis") == 'true':
-                # show L3 segment
-                self.ESTRO_L_L3_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_L3_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("L4Vis") == 'true':
-                # show L4 segment
-                self.ESTRO_L_L4_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_L4_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("IMNVis") == 'true':
-                # show IMN segment
-                self.ESTRO_L_IMN_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_IMN_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("IC4Vis") == 'true':
-                # show IC4 segment
-                self.ESTRO_L_IC4_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_IC4_DisplayNode.SetVisibility(True)
-            if self._parameterNode.GetParameter("INTPECTVis") == 'true':
-                # show INTPECT segment
-                self.ESTRO_L_INTPECT_DisplayNode.SetVisibility(True)
-                self.ESTRO_R_INTPECT_DisplayNode.SetVisibility(True)
-
-            # hide segments if they shouldn't be shown
-            if self._parameterNode.GetParameter("L1Vis") == 'false':
-                # don't show L1 segment
-                self.ESTRO_L_L1_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_L1_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("L2Vis") == 'false':
-                # don't show L2 segment
-                self.ESTRO_L_L2_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_L2_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("L3Vis") == 'false':
-                # don't show L3 segment
-                self.ESTRO_L_L3_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_L3_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("L4Vis") == 'false':
-                # don't show L4 segment
-                self.ESTRO_L_L4_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_L4_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("IMNVis") == 'false':
-                # don't show IMN segment
-                self.ESTRO_L_IMN_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_IMN_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("IC4Vis") == 'false':
-                # don't show IC4 segment
-                self.ESTRO_L_IC4_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_IC4_DisplayNode.SetVisibility(False)
-            if self._parameterNode.GetParameter("INTPECTVis") == 'false':
-                # don't show INTPECT segment
-                self.ESTRO_L_INTPECT_DisplayNode.SetVisibility(False)
-                self.ESTRO_R_INTPECT_DisplayNode.SetVisibility(False)
-
-        elif self._parameterNode.GetParameter("ESTROVis") == 'false':
-            # change to the 3D view
+        if 'ESTRO' in changed:
+            if state.ESTRO:
+                # change to the four up view
+                slicer.app.layoutManager().resetSliceViews()
+                self.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
+                # make the atlas back to original
+                self.MakeCPLabelNames()
+                self.SetColoursBack()
             # make sure not showing table node
-            if slicer.app.layoutManager().activeMRMLTableViewNode().IsViewVisibleInLayout() == False:
-                slicer.app.layoutManager().setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
-
-            # turn off visibility of all left and right estro segmentations
-            self.ESTRO_L_IMN_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_IMN_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_IC4_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_IC4_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_INTPECT_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_INTPECT_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_L1_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_L1_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_L2_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_L2_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_L3_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_L3_DisplayNode.SetVisibility(False)
-            self.ESTRO_L_L4_DisplayNode.SetVisibility(False)
-            self.ESTRO_R_L4_DisplayNode.SetVisibility(False)
-
-            # make the buttons for individual ESTRO segments disabled
-            self.ui.L1CheckBox.setEnabled(False)
-            self.ui.L2CheckBox.setEnabled(False)
-            self.ui.L3CheckBox.setEnabled(False)
-            self.ui.L4CheckBox.setEnabled(False)
-            self.ui.IMNCheckBox.setEnabled(False)
-            self.ui.IC4CheckBox.setEnabled(False)
-            self.ui.INTPECTCheckBox.setEnabled(False)
+            elif not self.viewManager.isTableViewShown():
+                # change to the 3D view
+                self.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+            # the individual segment buttons are only enabled when the ESTRO contours are shown
+            for part in ESTRO_PARTS:
+                getattr(self.ui, part + 'CheckBox').setEnabled(state.ESTRO)
+        if 'ESTRO' in changed or (state.ESTRO and 'ESTROParts' in changed):
+            for part in ESTRO_PARTS:
+                visible = state.ESTRO and part in state.ESTROParts
+                if previousState is not None and 'ESTRO' not in changed:
+                    # only update the parts that were toggled
+                    if (part in state.ESTROParts) == (part in previousState.ESTROParts):
+                        continue
+                getattr(self, 'ESTRO_L_%s_DisplayNode' % part).SetVisibility(visible)
+                getattr(self, 'ESTRO_R_%s_DisplayNode' % part).SetVisibility(visible)
 
         # change visibility of muscles based on check box selection
-        # pectoralis major
-        if self._parameterNode.GetParameter("pecMajVis") == 'true':
-            self.pecMajSegDisplayNode.SetSegmentVisibility('Segment_1', True)  # do not change to SetVisibility
-        elif self._parameterNode.GetParameter("pecMajVis") == 'false':
-            self.pecMajSegDisplayNode.SetSegmentVisibility('Segment_1', False)  # do not change to SetVisibility
-
-        # pectoralis minor
-        if self._parameterNode.GetParameter("pecMinVis") == 'true':
-            self.pecMinSegDisplayNode.SetVisibility(True)
-        elif self._parameterNode.GetParameter("pecMinVis") == 'false':
-            self.pecMinSegDisplayNode.SetVisibility(False)
-
-        # latissimus dorsi
-        if self._parameterNode.GetParameter("latDorVis") == 'true':
-            self.latDorSegDisplayNode.SetVisibility(True)
-        elif self._parameterNode.GetParameter("latDorVis") == 'false':
-            self.latDorSegDisplayNode.SetVisibility(False)
+        if 'pectoralisMajor' in changed:
+            # do not change to SetVisibility
+            self.pecMajSegDisplayNode.SetSegmentVisibility('Segment_1', state.pectoralisMajor)
+        if 'pectoralisMinor' in changed:
+            self.pecMinSegDisplayNode.SetVisibility(state.pectoralisMinor)
+        if 'latissimusDorsi' in changed:
+            self.latDorSegDisplayNode.SetVisibility(state.latissimusDorsi)
 
         # change the breast visibility based on the check box selection
-        if self._parameterNode.GetParameter("LbVis") == "true":
-            if self._parameterNode.GetParameter("RbVis") == "true":
-                # show both breasts
-                # check if visibility needs to change
-                if self.RbreastSegDisplayNode.GetVisibility() == 0:
-                    # show right breast
-                    self.RbreastSegDisplayNode.SetVisibility(True)
-                    self.DisplayNodeRb0.SetVisibility(True)
-                    self.DisplayNodeRb1.SetVisibility(True)
-                    self.DisplayNodeRb2.SetVisibility(True)
-                    self.DisplayNodeRb3.SetVisibility(True)
-                    self.DisplayNodeRb4.SetVisibility(True)
-                    self.DisplayNodeRb5.SetVisibility(True)
-                    self.DisplayNodeRb6.SetVisibility(True)
-                    self.DisplayNodeRb7.SetVisibility(True)
-                    self.DisplayNodeRb8.SetVisibility(True)
-                    self.DisplayNodeRb9.SetVisibility(True)
-                    self.DisplayNodeRb10.SetVisibility(True)
-                    self.DisplayNodeRb11.SetVisibility(True)
-                    self.DisplayNodeRb12.SetVisibility(True)
-
-                if self.Lb0DisplayNode.GetVisibility() == 0:
-                    # show left breast
-                    self.DisplayNodeLb0.SetVisibility(True)
-                    self.DisplayNodeLb1.SetVisibility(True)
-                    self.DisplayNodeLb2.SetVisibility(True)
-                    self.DisplayNodeLb3.SetVisibility(True)
-                    self.DisplayNodeLb4.SetVisibility(True)
-                    self.DisplayNodeLb5.SetVisibility(True)
-                    self.DisplayNodeLb6.SetVisibility(True)
-                    self.DisplayNodeLb7.SetVisibility(True)
-                    self.DisplayNodeLb8.SetVisibility(True)
-                    self.DisplayNodeLb9.SetVisibility(True)
-                    self.DisplayNodeLb10.SetVisibility(True)
-                    self.DisplayNodeLb11.SetVisibility(True)
-                    self.DisplayNodeLb12.SetVisibility(True)
-                    self.Lb0DisplayNode.SetVisibility(True)
-                    self.Lb1DisplayNode.SetVisibility(True)
-                    self.Lb2DisplayNode.SetVisibility(True)
-                    self.Lb3DisplayNode.SetVisibility(True)
-                    self.Lb4DisplayNode.SetVisibility(True)
-                    self.Lb5DisplayNode.SetVisibility(True)
-                    self.Lb6DisplayNode.SetVisibility(True)
-                    self.Lb7DisplayNode.SetVisibility(True)
-                    self.Lb8DisplayNode.SetVisibility(True)
-                    self.Lb9DisplayNode.SetVisibility(True)
-                    self.Lb10DisplayNode.SetVisibility(True)
-                    self.Lb11DisplayNode.SetVisibility(True)
-                    self.Lb12DisplayNode.SetVisibility(True)
-                    self.LbFatDisplayNode.SetVisibility(True)
-            else:
-                # show left breast only
-                if self.RbreastSegDisplayNode.GetVisibility() == 1:
-                    # hide right breast
-                    self.RbreastSegDisplayNode.SetVisibility(False)
-                    self.DisplayNodeRb0.SetVisibility(False)
-                    self.DisplayNodeRb1.SetVisibility(False)
-                    self.DisplayNodeRb2.SetVisibility(False)
-                    self.DisplayNodeRb3.SetVisibility(False)
-                    self.DisplayNodeRb4.SetVisibility(False)
-                    self.DisplayNodeRb5.SetVisibility(False)
-                    self.DisplayNodeRb6.SetVisibility(False)
-                    self.DisplayNodeRb7.SetVisibility(False)
-                    self.DisplayNodeRb8.SetVisibility(False)
-                    self.DisplayNodeRb9.SetVisibility(False)
-                    self.DisplayNodeRb10.SetVisibility(False)
-                    self.DisplayNodeRb11.SetVisibility(False)
-                    self.DisplayNodeRb12.SetVisibility(False)
-
-                if self.Lb0DisplayNode.GetVisibility() == 0:
-                    # show left breast
-                    self.DisplayNodeLb0.SetVisibility(True)
-                    self.DisplayNodeLb1.SetVisibility(True)
-                    self.DisplayNodeLb2.SetVisibility(True)
-                    self.DisplayNodeLb3.SetVisibility(True)
-                    self.DisplayNodeLb4.SetVisibility(True)
-                    self.DisplayNodeLb5.SetVisibility(True)
-                    self.DisplayNodeLb6.SetVisibility(True)
-                    self.DisplayNodeLb7.SetVisibility(True)
-                    self.DisplayNodeLb8.SetVisibility(True)
-                    self.DisplayNodeLb9.SetVisibility(True)
-                    self.DisplayNodeLb10.SetVisibility(True)
-                    self.DisplayNodeLb11.SetVisibility(True)
-                    self.DisplayNodeLb12.SetVisibility(True)
-                    self.Lb0DisplayNode.SetVisibility(True)
-                    self.Lb1DisplayNode.SetVisibility(True)
-                    self.Lb2DisplayNode.SetVisibility(True)
-                    self.Lb3DisplayNode.SetVisibility(True)
-                    self.Lb4DisplayNode.SetVisibility(True)
-                    self.Lb5DisplayNode.SetVisibility(True)
-                    self.Lb6DisplayNode.SetVisibility(True)
-                    self.Lb7DisplayNode.SetVisibility(True)
-                    self.Lb8DisplayNode.SetVisibility(True)
-                    self.Lb9DisplayNode.SetVisibility(True)
-                    self.Lb10DisplayNode.SetVisibility(True)
-                    self.Lb11DisplayNode.SetVisibility(True)
-                    self.Lb12DisplayNode.SetVisibility(True)
-                    self.LbFatDisplayNode.SetVisibility(True)
-
-        elif self._parameterNode.GetParameter("RbVis") == "true":
-            # show right breast
-            if self.RbreastSegDisplayNode.GetVisibility() == 0:
-                # show right breast
-                self.RbreastSegDisplayNode.SetVisibility(True)
-                self.DisplayNodeRb0.SetVisibility(True)
-                self.DisplayNodeRb1.SetVisibility(True)
-                self.DisplayNodeRb2.SetVisibility(True)
-                self.DisplayNodeRb3.SetVisibility(True)
-                self.DisplayNodeRb4.SetVisibility(True)
-                self.DisplayNodeRb5.SetVisibility(True)
-                self.DisplayNodeRb6.SetVisibility(True)
-                self.DisplayNodeRb7.SetVisibility(True)
-                self.DisplayNodeRb8.SetVisibility(True)
-                self.DisplayNodeRb9.SetVisibility(True)
-                self.DisplayNodeRb10.SetVisibility(True)
-                self.DisplayNodeRb11.SetVisibility(True)
-                self.DisplayNodeRb12.SetVisibility(True)
-
-            if self.Lb0DisplayNode.GetVisibility() == 1:
-                # hide left breast
-                self.DisplayNodeLb0.SetVisibility(False)
-                self.DisplayNodeLb1.SetVisibility(False)
-                self.DisplayNodeLb2.SetVisibility(False)
-                self.DisplayNodeLb3.SetVisibility(False)
-                self.DisplayNodeLb4.SetVisibility(False)
-                self.DisplayNodeLb5.SetVisibility(False)
-                self.DisplayNodeLb6.SetVisibility(False)
-                self.DisplayNodeLb7.SetVisibility(False)
-                self.DisplayNodeLb8.SetVisibility(False)
-                self.DisplayNodeLb9.SetVisibility(False)
-                self.DisplayNodeLb10.SetVisibility(False)
-                self.DisplayNodeLb11.SetVisibility(False)
-                self.DisplayNodeLb12.SetVisibility(False)
-                self.Lb0DisplayNode.SetVisibility(False)
-                self.Lb1DisplayNode.SetVisibility(False)
-                self.Lb2DisplayNode.SetVisibility(False)
-                self.Lb3DisplayNode.SetVisibility(False)
-                self.Lb4DisplayNode.SetVisibility(False)
-                self.Lb5DisplayNode.SetVisibility(False)
-                self.Lb6DisplayNode.SetVisibility(False)
-                self.Lb7DisplayNode.SetVisibility(False)
-                self.Lb8DisplayNode.SetVisibility(False)
-                self.Lb9DisplayNode.SetVisibility(False)
-                self.Lb10DisplayNode.SetVisibility(False)
-                self.Lb11DisplayNode.SetVisibility(False)
-                self.Lb12DisplayNode.SetVisibility(False)
-                self.LbFatDisplayNode.SetVisibility(False)
-        else:
-            # show neither breast
-            if self.RbreastSegDisplayNode.GetVisibility() == 1:
-                # hide right breast
-                self.RbreastSegDisplayNode.SetVisibility(False)
-                self.DisplayNodeRb0.SetVisibility(False)
-                self.DisplayNodeRb1.SetVisibility(False)
-                self.DisplayNodeRb2.SetVisibility(False)
-                self.DisplayNodeRb3.SetVisibility(False)
-                self.DisplayNodeRb4.SetVisibility(False)
-                self.DisplayNodeRb5.SetVisibility(False)
-                self.DisplayNodeRb6.SetVisibility(False)
-                self.DisplayNodeRb7.SetVisibility(False)
-                self.DisplayNodeRb8.SetVisibility(False)
-                self.DisplayNodeRb9.SetVisibility(False)
-                self.DisplayNodeRb10.SetVisibility(False)
-                self.DisplayNodeRb11.SetVisibility(False)
-                self.DisplayNodeRb12.SetVisibility(False)
-
-            if self.Lb0DisplayNode.GetVisibility() == 1:
-                # hide left breast
-                self.DisplayNodeLb0.SetVisibility(False)
-                self.DisplayNodeLb1.SetVisibility(False)
-                self.DisplayNodeLb2.SetVisibility(False)
-                self.DisplayNodeLb3.SetVisibility(False)
-                self.DisplayNodeLb4.SetVisibility(False)
-                self.DisplayNodeLb5.SetVisibility(False)
-                self.DisplayNodeLb6.SetVisibility(False)
-                self.DisplayNodeLb7.SetVisibility(False)
-                self.DisplayNodeLb8.SetVisibility(False)
-                self.DisplayNodeLb9.SetVisibility(False)
-                self.DisplayNodeLb10.SetVisibility(False)
-                self.DisplayNodeLb11.SetVisibility(False)
-                self.DisplayNodeLb12.SetVisibility(False)
-                self.Lb0DisplayNode.SetVisibility(False)
-                self.Lb1DisplayNode.SetVisibility(False)
-                self.Lb2DisplayNode.SetVisibility(False)
-                self.Lb3DisplayNode.SetVisibility(False)
-                self.Lb4DisplayNode.SetVisibility(False)
-                self.Lb5DisplayNode.SetVisibility(False)
-                self.Lb6DisplayNode.SetVisibility(False)
-                self.Lb7DisplayNode.SetVisibility(False)
-                self.Lb8DisplayNode.SetVisibility(False)
-                self.Lb9DisplayNode.SetVisibility(False)
-                self.Lb10DisplayNode.SetVisibility(False)
-                self.Lb11DisplayNode.SetVisibility(False)
-                self.Lb12DisplayNode.SetVisibility(False)
-                self.LbFatDisplayNode.SetVisibility(False)
+        for side, field in (('right', 'rightBreast'), ('left', 'leftBreast')):
+            if field not in changed:
+                continue
+            visible = getattr(state, field)
+            for key in self.breastSurfaces[side]:
+                self.atlasNodes[key].GetDisplayNode().SetVisibility(visible)
+            for item, descriptor in self.atlasItems.items():
+                if 'region' not in descriptor or descriptor['side'] != side:
+                    continue
+                self.labelMarkups[item].GetDisplayNode().SetVisibility(visible)
+                # the region models stay hidden when the merged mesh is shown instead, the segments of a
+                # segmentation follow the segmentation
+                if side not in self.regionMeshes:
+                    for highlight in descriptor['highlight']:
+                        if 'segment' not in highlight:
+                            self.atlasNodes[highlight['node']].GetDisplayNode().SetVisibility(visible)
+            if side in self.regionMeshes:
+                self.regionMeshes[side].GetDisplayNode().SetVisibility(visible)
 
 #
 # BreastCancerAtlasLogic
@@ -3377,3 +1845,2425 @@ class BreastCancerAtlasLogic(ScriptedLoadableModuleLogic):
         Called when the logic class is instantiated. Can be used for initializing member variables.
         """
         ScriptedLoadableModuleLogic.__init__(self)
+        self.sceneCacheHit = False
+        self.statisticsTables = None
+        self.fields = []
+        self.fieldNames = []
+        self.fieldGivenRegion = None
+        self.regionGivenField = None
+        self.fieldGivenRegionLabels = {}
+        self.regionGivenFieldLabels = {}
+
+    def regionCount(self, atlasItems):
+        """
+        Return the number of breast regions of a side, given by the breast region items of the manifest
+        """
+        return max(descriptor['region'] for descriptor in atlasItems.values() if 'region' in descriptor) + 1
+
+    def loadNodeRoles(self):
+        """
+        Read the node role manifest: for each group of atlas nodes, the node ID of each role in the shipped scene
+        and the widget attributes the nodes are bound to.
+        """
+        with open(NODE_ROLES_PATH) as f:
+            return json.load(f)
+
+    def findAtlasNodes(self, nodeRoles):
+        """
+        Find the node of every role of the manifest in a single pass over the scene. A node is matched by the role
+        stored in its attribute if it has one, by the node ID given in the manifest otherwise.
+        Returns a dict of "group/role" -> node. Raises RuntimeError listing all the roles that could not be found.
+        """
+        nodesByRole = {}
+        nodesById = {}
+        nodes = slicer.mrmlScene.GetNodes()
+        for index in range(nodes.GetNumberOfItems()):
+            node = nodes.GetItemAsObject(index)
+            role = node.GetAttribute(NODE_ROLE_ATTRIBUTE)
+            if role:
+                nodesByRole[role] = node
+            else:
+                nodesById[node.GetID()] = node
+
+        atlasNodes = {}
+        missing = []
+        for group, groupRoles in nodeRoles.items():
+            if 'nodes' not in groupRoles:
+                continue
+            for role, nodeId in groupRoles['nodes'].items():
+                key = group + '/' + role
+                node = nodesByRole.get(key) or nodesById.get(nodeId)
+                if node is None:
+                    missing.append("%s (%s)" % (key, nodeId))
+                else:
+                    atlasNodes[key] = node
+        if missing:
+            raise RuntimeError("Atlas nodes not found in the scene: " + ", ".join(missing))
+        return atlasNodes
+
+    def tagNodeRoles(self, atlasNodes):
+        """
+        Store the role of each atlas node in a node attribute so that the nodes are still found after the atlas
+        scene is re-saved and its node IDs change. Run this before saving a new version of the atlas scene.
+        """
+        for key, node in atlasNodes.items():
+            node.SetAttribute(NODE_ROLE_ATTRIBUTE, key)
+
+    def mergeAtlasTables(self, atlasNodes):
+        """
+        Copy all the statistics tables of the atlas into one table tagged with MERGED_STATISTICS_ROLE. Each source
+        table is a 'header' row with its column names followed by a 'row' row per table row, all under its role.
+        """
+        tables = [(key, node) for key, node in atlasNodes.items() if key.split('/')[0].endswith('Tables')]
+        columnCount = max(node.GetNumberOfColumns() for key, node in tables)
+        columns = [vtk.vtkStringArray() for column in range(columnCount + 2)]
+        for index, column in enumerate(columns):
+            column.SetName(['Role', 'Kind'][index] if index < 2 else 'Column%d' % (index - 2))
+        for key, node in tables:
+            rows = [('header', [node.GetColumnName(column) for column in range(node.GetNumberOfColumns())])]
+            rows += [('row', [node.GetCellText(row, column) for column in range(node.GetNumberOfColumns())])
+                     for row in range(node.GetNumberOfRows())]
+            for kind, values in rows:
+                values = [key, kind] + values + [''] * (columnCount - len(values))
+                for column, value in zip(columns, values):
+                    column.InsertNextValue(value)
+        mergedTable = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLTableNode', 'BreastCancerAtlasStatistics')
+        for column in columns:
+            mergedTable.GetTable().AddColumn(column)
+        mergedTable.SetAttribute(NODE_ROLE_ATTRIBUTE, MERGED_STATISTICS_ROLE)
+        return mergedTable
+
+    def expandMergedStatistics(self):
+        """
+        Recreate the statistics tables of a packaged atlas from its merged statistics table, tagged with their role.
+        Nothing is done if the scene has no merged table or if its tables were already recreated.
+        """
+        mergedTable = None
+        existingRoles = set()
+        nodes = slicer.mrmlScene.GetNodesByClass('vtkMRMLTableNode')
+        for index in range(nodes.GetNumberOfItems()):
+            node = nodes.GetItemAsObject(index)
+            role = node.GetAttribute(NODE_ROLE_ATTRIBUTE)
+            if role == MERGED_STATISTICS_ROLE:
+                mergedTable = node
+            elif role:
+                existingRoles.add(role)
+        if mergedTable is None:
+            return
+
+        tables = collections.OrderedDict()
+        for row in range(mergedTable.GetNumberOfRows()):
+            role = mergedTable.GetCellText(row, 0)
+            values = [mergedTable.GetCellText(row, column) for column in range(2, mergedTable.GetNumberOfColumns())]
+            if mergedTable.GetCellText(row, 1) == 'header':
+                tables[role] = ([name for name in values if name], [])
+            else:
+                tables[role][1].append(values)
+        for role, (columnNames, rows) in tables.items():
+            if role in existingRoles:
+                continue
+            tableNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLTableNode', role.split('/')[1])
+            tableNode.SetSaveWithScene(False)
+            tableNode.SetAttribute(NODE_ROLE_ATTRIBUTE, role)
+            for index, columnName in enumerate(columnNames):
+                column = vtk.vtkStringArray()
+                column.SetName(columnName)
+                for values in rows:
+                    column.InsertNextValue(values[index])
+                tableNode.GetTable().AddColumn(column)
+
+    def buildProbabilityIndex(self, atlasNodes, nodeRoles):
+        """
+        Parse all the statistics tables once into two arrays of shape
+        (method, side, breast region, SLN field, [estimate, CI low, CI high]), NaN where the atlas has no value:
+        fieldGivenRegion from the breast region tables (probability of draining to each SLN field) and
+        regionGivenField from the SLN field tables (probability of each breast region).
+        The control point labels of the same cells are kept in fieldGivenRegionLabels and regionGivenFieldLabels,
+        keyed by (method, side, region, field).
+        """
+        startTime = time.perf_counter()
+        fields = nodeRoles['fields']
+        self.fields = list(fields.values())
+        # short names of the fields as shown in the tables (e.g. "IM" for "IM: Internal Mammary")
+        self.fieldNames = [rowName.split(':')[0] for rowName in fields]
+        shape = (len(STATISTICS_METHODS), len(ATLAS_SIDES), self.regionCount(nodeRoles['items']), len(self.fields), 3)
+        self.fieldGivenRegion = np.full(shape, np.nan)
+        self.regionGivenField = np.full(shape, np.nan)
+        self.fieldGivenRegionLabels = {}
+        self.regionGivenFieldLabels = {}
+        for methodIndex, method in enumerate(STATISTICS_METHODS):
+            for item, descriptor in nodeRoles['items'].items():
+                side = descriptor['side']
+                sideIndex = ATLAS_SIDES.index(side)
+                columnNames, rows = self.readStatisticsTable(atlasNodes, method + 'Tables/' + item)
+                for row in rows:
+                    rowName = row[0]
+                    probability = self.parseProbability(row[1])
+                    if probability is None:
+                        continue
+                    label, values = probability
+                    if 'region' in descriptor and rowName in fields:
+                        region, field = descriptor['region'], fields[rowName]
+                        index, labels = self.fieldGivenRegion, self.fieldGivenRegionLabels
+                    elif 'field' in descriptor and rowName.isdigit():
+                        region, field = int(rowName), descriptor['field']
+                        index, labels = self.regionGivenField, self.regionGivenFieldLabels
+                    else:
+                        continue
+                    if np.isnan(values[0]):
+                        logging.warning("Statistics cell '%s' of %sTables/%s row '%s' is not a probability, it is "
+                                        "shown as is and has no value" % (row[1], method, item, rowName))
+                    index[methodIndex, sideIndex, region, self.fields.index(field)] = values
+                    labels[(method, side, region, field)] = label
+        logging.info("Atlas statistics indexed in %.2f s" % (time.perf_counter() - startTime))
+
+    def loadStatisticsIndex(self, atlasNodes, nodeRoles):
+        """
+        Map the probability index from the binary statistics file if it is shipped, build it from the statistics
+        tables otherwise
+        """
+        if not self.loadStatisticsBinary(nodeRoles):
+            self.buildProbabilityIndex(atlasNodes, nodeRoles)
+
+    def loadStatisticsBinary(self, nodeRoles, statisticsPath=ATLAS_STATISTICS_BINARY_PATH):
+        """
+        Map the probability index from the binary statistics file (see ATLAS_STATISTICS_BINARY_PATH), only the
+        control point labels are formatted. Returns False if there is no such file.
+        Raises ValueError if the file is not a statistics file of this atlas.
+        """
+        if not os.path.exists(statisticsPath):
+            return False
+        startTime = time.perf_counter()
+        fields = nodeRoles['fields']
+        self.fields = list(fields.values())
+        self.fieldNames = [rowName.split(':')[0] for rowName in fields]
+        shape = (len(STATISTICS_METHODS), len(ATLAS_SIDES), self.regionCount(nodeRoles['items']), len(self.fields))
+        header = np.fromfile(statisticsPath, STATISTICS_BINARY_HEADER, count=1)
+        if (len(header) != 1 or header['magic'][0] != STATISTICS_BINARY_MAGIC
+                or tuple(int(header[name][0]) for name in ('methods', 'sides', 'regions', 'fields')) != shape):
+            raise ValueError("%s is not a statistics file of this atlas" % statisticsPath)
+        records = np.memmap(statisticsPath, STATISTICS_RECORD, 'r', offset=STATISTICS_BINARY_HEADER.itemsize,
+                            shape=(2,) + shape)
+        self.fieldGivenRegion = records[0]['values']
+        self.regionGivenField = records[1]['values']
+        self.fieldGivenRegionLabels = self.recordLabels(records[0])
+        self.regionGivenFieldLabels = self.recordLabels(records[1])
+        logging.info("Atlas statistics mapped from %s in %.2f s"
+                     % (os.path.basename(statisticsPath), time.perf_counter() - startTime))
+        return True
+
+    def writeStatisticsBinary(self, statisticsPath):
+        """
+        Write the probability index to a binary statistics file (see ATLAS_STATISTICS_BINARY_PATH).
+        Raises ValueError if a control point label is longer than a record can hold.
+        """
+        header = np.zeros(1, STATISTICS_BINARY_HEADER)
+        header['magic'] = STATISTICS_BINARY_MAGIC
+        header['methods'], header['sides'], header['regions'], header['fields'] = self.fieldGivenRegion.shape[:4]
+        records = [self.labelledRecords(self.fieldGivenRegion, self.fieldGivenRegionLabels),
+                   self.labelledRecords(self.regionGivenField, self.regionGivenFieldLabels)]
+        with open(statisticsPath, 'wb') as f:
+            f.write(header.tobytes())
+            for labelledRecords in records:
+                f.write(labelledRecords.tobytes())
+
+    def labelledRecords(self, values, labels):
+        """
+        Return the STATISTICS_RECORD array of an array of the probability index and of its control point labels
+        """
+        records = np.zeros(values.shape[:-1], STATISTICS_RECORD)
+        records['values'] = values
+        for (method, side, region, field), label in labels.items():
+            index = (STATISTICS_METHODS.index(method), ATLAS_SIDES.index(side), region, self.fields.index(field))
+            encodedLabel = label.encode('utf-8')
+            if len(encodedLabel) > STATISTICS_RECORD['label'].itemsize:
+                raise ValueError("The label '%s' is too long for a binary statistics file" % label)
+            status = 'text' if np.isnan(records['values'][index][0]) else 'probability'
+            records['status'][index] = STATISTICS_CELL_STATUS.index(status)
+            records['label'][index] = encodedLabel
+        return records
+
+    def recordLabels(self, records):
+        """
+        Format the control point labels of a STATISTICS_RECORD array, keyed by (method, side, region, field)
+        """
+        labels = {}
+        empty = STATISTICS_CELL_STATUS.index('empty')
+        for methodIndex, sideIndex, region, fieldIndex in zip(*np.nonzero(records['status'] != empty)):
+            record = records[methodIndex, sideIndex, region, fieldIndex]
+            key = (STATISTICS_METHODS[methodIndex], ATLAS_SIDES[sideIndex], int(region), self.fields[fieldIndex])
+            labels[key] = record['label'].decode('utf-8')
+        return labels
+
+    def controlPointLabels(self, atlasItems, pressed, method):
+        """
+        Return the control point label of the atlas items showing the statistics of the pressed item (see
+        buildProbabilityIndex), keyed by item. For a breast region these are the SLN field probabilities of the same
+        side and empty labels for the SLN fields of the other side. For a SLN field these are the breast region
+        probabilities of the same side. Items without a statistic are left out.
+        """
+        item = atlasItems[pressed]
+        side = item['side']
+        labels = {}
+        if 'region' in item:
+            for name, descriptor in atlasItems.items():
+                if 'field' not in descriptor:
+                    continue
+                if descriptor['side'] != side:
+                    labels[name] = ''
+                    continue
+                label = self.fieldGivenRegionLabels.get((method, side, item['region'], descriptor['field']))
+                if label is not None:
+                    labels[name] = label
+        else:
+            for name, descriptor in atlasItems.items():
+                if 'region' not in descriptor or descriptor['side'] != side:
+                    continue
+                label = self.regionGivenFieldLabels.get((method, side, descriptor['region'], item['field']))
+                if label is not None:
+                    labels[name] = label
+        return labels
+
+    def parseProbability(self, text):
+        """
+        Parse a statistics table cell matching PROBABILITY_CELL_PATTERN. Returns (label, [estimate, CI low, CI high])
+        with NaN for a missing interval, None for an empty cell. Any other cell (e.g. "<1" or "N/A") has NaN values,
+        the number is not guessed.
+        The label is the first word of the cell followed by a percent sign, as the atlas has always shown it
+        (e.g. "<1%" for "<1 (0-2)"), the sign is not repeated if the cell has it.
+        """
+        text = text.strip()
+        if not text:
+            return None
+        label = text.split()[0]
+        if not label.endswith('%'):
+            label += '%'
+        match = PROBABILITY_CELL_PATTERN.fullmatch(text)
+        if match is None:
+            return label, [np.nan] * 3
+        return label, [np.nan if number is None else float(number) for number in match.groups()]
+
+    def regionsAbove(self, field, threshold, method=None):
+        """
+        Return a boolean array of shape (method, side, region) (or (side, region) for a single method) telling
+        which breast regions drain to the SLN field with a probability above threshold (in percent),
+        e.g. regionsAbove('ics', 10) for all the regions where P(IM) > 10%.
+        """
+        estimates = self.fieldGivenRegion[..., self.fields.index(field), 0]
+        if method is not None:
+            estimates = estimates[STATISTICS_METHODS.index(method)]
+        # NaN compares as False
+        return estimates > threshold
+
+    def mostLikelyFields(self):
+        """
+        Return the index in self.fields of the most likely SLN field for every breast region,
+        as an array of shape (method, side, region). -1 where the region has no statistics.
+        """
+        return self._nanArgmax(self.fieldGivenRegion[..., 0])
+
+    def mostLikelyRegions(self):
+        """
+        Return the most likely breast region for every SLN field, as an array of shape (method, side, field).
+        -1 where the field has no statistics.
+        """
+        return self._nanArgmax(np.moveaxis(self.regionGivenField[..., 0], 2, 3))
+
+    def _nanArgmax(self, values):
+        """
+        argmax over the last axis ignoring NaN, -1 where all the values are NaN
+        """
+        missing = np.isnan(values).all(axis=-1)
+        result = np.where(np.isnan(values), -np.inf, values).argmax(axis=-1)
+        result[missing] = -1
+        return result
+
+    def mergeStatisticsTables(self, atlasNodes, item):
+        """
+        Create a table with the statistics of a breast region or SLN field from all the statistical analyses:
+        the first column of the tables, then the other columns of each analysis. Rows are matched by their first
+        column and the analysis of each column is stored in its 'method' column property. Column names have to be
+        unique, so the analysis is added to them, the column titles shown are the ones of the statistics tables.
+        """
+        sourceTables = [(method,) + self.readStatisticsTable(atlasNodes, method + 'Tables/' + item)
+                        for method in STATISTICS_METHODS]
+        rowNames = []
+        for method, columnNames, rows in sourceTables:
+            for row in rows:
+                if row[0] not in rowNames:
+                    rowNames.append(row[0])
+
+        tableNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLTableNode',
+                                                       slicer.mrmlScene.GenerateUniqueName(item + ' statistics'))
+        tableNode.SetSaveWithScene(False)
+        with slicer.util.NodeModify(tableNode):
+            nameColumn = vtk.vtkStringArray()
+            nameColumn.SetName(sourceTables[0][1][0])
+            for rowName in rowNames:
+                nameColumn.InsertNextValue(rowName)
+            tableNode.GetTable().AddColumn(nameColumn)
+            for method, columnNames, rows in sourceTables:
+                sourceRows = {row[0]: row for row in rows}
+                for sourceColumn in range(1, len(columnNames)):
+                    column = vtk.vtkStringArray()
+                    column.SetName("%s (%s)" % (columnNames[sourceColumn], method.capitalize()))
+                    for rowName in rowNames:
+                        sourceRow = sourceRows.get(rowName)
+                        column.InsertNextValue('' if sourceRow is None else sourceRow[sourceColumn])
+                    tableNode.GetTable().AddColumn(column)
+                    tableNode.SetColumnProperty(column.GetName(), 'method', method)
+                    tableNode.SetColumnTitle(column.GetName(), columnNames[sourceColumn])
+        return tableNode
+
+    def buildRegionMesh(self, atlasNodes, atlasItems, side):
+        """
+        Merge the breast region surfaces of one side into a single model with a REGION_ID_ARRAY cell array. The
+        regions are models or segments of a segmentation, the closed surface of the segments is used.
+        """
+        parts = []
+        for item, descriptor in atlasItems.items():
+            if 'region' not in descriptor or descriptor['side'] != side:
+                continue
+            for highlight in descriptor['highlight']:
+                node = atlasNodes[highlight['node']]
+                if 'segment' in highlight:
+                    node.CreateClosedSurfaceRepresentation()
+                    surface = node.GetClosedSurfaceInternalRepresentation(highlight['segment'])
+                    colour = node.GetSegmentation().GetSegment(highlight['segment']).GetColor()
+                else:
+                    surface = self.worldSurface(node)
+                    colour = node.GetDisplayNode().GetColor()
+                parts.append((descriptor['region'], item, surface, colour))
+        return self.buildLabelledMesh(side + ' breast regions', REGION_ID_ARRAY, self.regionCount(atlasItems), parts)
+
+    def buildSLNPointCloud(self, atlasNodes, atlasItems):
+        """
+        Collect the control points of the full atlas SLN markups into one polydata with a vertex per SLN, the
+        SLN_ITEM_ARRAY point array holding the index of its atlas item and SLN_COLOUR_ARRAY its colour.
+        Returns the polydata and the point IDs of each item.
+        """
+        items = list(atlasItems)
+        points = vtk.vtkPoints()
+        itemIds = vtk.vtkIntArray()
+        itemIds.SetName(SLN_ITEM_ARRAY)
+        colours = vtk.vtkUnsignedCharArray()
+        colours.SetName(SLN_COLOUR_ARRAY)
+        colours.SetNumberOfComponents(3)
+        itemPointIds = {}
+        position = [0.0, 0.0, 0.0]
+        for key, markupsNode in atlasNodes.items():
+            group, item = key.split('/')
+            if group != 'atlasSLNMarkups':
+                continue
+            colour = [round(component * 255) for component in SLN_FIELD_COLOURS[atlasItems[item]['field']]]
+            itemPointIds[item] = []
+            for controlPoint in range(markupsNode.GetNumberOfControlPoints()):
+                markupsNode.GetNthControlPointPositionWorld(controlPoint, position)
+                itemPointIds[item].append(points.InsertNextPoint(position))
+                itemIds.InsertNextValue(items.index(item))
+                colours.InsertNextTuple3(*colour)
+        vertices = vtk.vtkCellArray()
+        for pointId in range(points.GetNumberOfPoints()):
+            vertices.InsertNextCell(1)
+            vertices.InsertCellPoint(pointId)
+        polyData = vtk.vtkPolyData()
+        polyData.SetPoints(points)
+        polyData.SetVerts(vertices)
+        polyData.GetPointData().AddArray(itemIds)
+        polyData.GetPointData().AddArray(colours)
+        return polyData, itemPointIds
+
+    def buildFieldVolumeMesh(self, atlasNodes, fieldVolumeRoles):
+        """
+        Merge the SLN field volume models into a single model with a FIELD_ID_ARRAY cell array, the field ID is
+        the index of the role in fieldVolumeRoles
+        """
+        parts = []
+        for index, role in enumerate(fieldVolumeRoles):
+            modelNode = atlasNodes['fieldVolumes/' + role]
+            parts.append((index, role, self.worldSurface(modelNode), modelNode.GetDisplayNode().GetColor()))
+        return self.buildLabelledMesh('SLN field volumes', FIELD_ID_ARRAY, len(fieldVolumeRoles), parts)
+
+    def buildDecimatedSurface(self, node, triangleBudget):
+        """
+        Create a hidden model with the surface of a model or segmentation node decimated to about triangleBudget
+        triangles. The segments of a segmentation are decimated in proportion to their size and merged into one
+        model with a SEGMENT_INDEX_ARRAY cell array, coloured by segment.
+        """
+        if not node.IsA('vtkMRMLSegmentationNode'):
+            modelNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLModelNode',
+                                                           slicer.mrmlScene.GenerateUniqueName(node.GetName() + ' LOD'))
+            modelNode.SetSaveWithScene(False)
+            modelNode.SetAndObservePolyData(self.decimateSurface(node.GetPolyData(), triangleBudget))
+            # mirror instanced models are placed by their reflection transform
+            modelNode.SetAndObserveTransformNodeID(node.GetTransformNodeID())
+            modelNode.CreateDefaultDisplayNodes()
+            modelNode.GetDisplayNode().SetSaveWithScene(False)
+            modelNode.GetDisplayNode().SetVisibility(False)
+            return modelNode
+
+        node.CreateClosedSurfaceRepresentation()
+        segmentation = node.GetSegmentation()
+        surfaces = []
+        for index in range(segmentation.GetNumberOfSegments()):
+            segmentId = segmentation.GetNthSegmentID(index)
+            surfaces.append((index, segmentId, node.GetClosedSurfaceInternalRepresentation(segmentId),
+                             segmentation.GetSegment(segmentId).GetColor()))
+        triangles = max(sum(surface.GetNumberOfCells() for index, segmentId, surface, colour in surfaces), 1)
+        parts = []
+        for index, segmentId, surface, colour in surfaces:
+            segmentBudget = triangleBudget * surface.GetNumberOfCells() // triangles
+            parts.append((index, segmentId, self.decimateSurface(surface, segmentBudget), colour))
+        modelNode = self.buildLabelledMesh(node.GetName() + ' LOD', SEGMENT_INDEX_ARRAY, len(parts), parts)
+        modelNode.GetDisplayNode().SetVisibility(False)
+        return modelNode
+
+    def decimateSurface(self, surface, triangleBudget):
+        """
+        Return the surface decimated to about triangleBudget triangles, or the surface itself if it is within budget
+        """
+        if surface.GetNumberOfCells() <= triangleBudget:
+            return surface
+        triangulate = vtk.vtkTriangleFilter()
+        triangulate.SetInputData(surface)
+        decimate = vtk.vtkQuadricDecimation()
+        decimate.SetInputConnection(triangulate.GetOutputPort())
+        decimate.SetTargetReduction(1.0 - max(triangleBudget, 1) / surface.GetNumberOfCells())
+        normals = vtk.vtkPolyDataNormals()
+        normals.SetInputConnection(decimate.GetOutputPort())
+        normals.Update()
+        decimated = vtk.vtkPolyData()
+        decimated.DeepCopy(normals.GetOutput())
+        return decimated
+
+    def findMirrorPairs(self, atlasNodes, groups=MIRROR_GROUPS):
+        """
+        Return the (left, right) keys of the left and right models of the node role groups, e.g. ESTRO/L_IMN and
+        ESTRO/R_IMN or fieldVolumes/la2 and fieldVolumes/ra2
+        """
+        pairs = []
+        for key in atlasNodes:
+            group, role = key.split('/')
+            if group not in groups or role[0] not in 'lL':
+                continue
+            rightKey = group + '/' + ('R' if role[0] == 'L' else 'r') + role[1:]
+            if rightKey in atlasNodes:
+                pairs.append((key, rightKey))
+        return pairs
+
+    def mirrorDeviation(self, leftSurface, rightSurface, reflection):
+        """
+        Return the largest distance (mm) between the left surface reflected by the reflection transform and the right
+        surface, both ways
+        """
+        reflect = vtk.vtkTransformPolyDataFilter()
+        reflect.SetInputData(leftSurface)
+        reflect.SetTransform(reflection)
+        distance = vtk.vtkDistancePolyDataFilter()
+        distance.SetInputConnection(0, reflect.GetOutputPort())
+        distance.SetInputData(1, rightSurface)
+        distance.SignedDistanceOff()
+        distance.ComputeSecondDistanceOn()
+        distance.Update()
+        return max(distance.GetOutput().GetPointData().GetScalars().GetRange()[1],
+                   distance.GetSecondDistanceOutput().GetPointData().GetScalars().GetRange()[1])
+
+    def instanceMirrorPairs(self, atlasNodes, tolerance=MIRROR_TOLERANCE):
+        """
+        Let the right model of each mirror pair share the surface of the left model, shown through a reflection
+        transform across the midsagittal plane, so that the right surface is freed. Each side keeps its display node,
+        so its colour and visibility. Only the pairs whose reflected left surface is within tolerance of the right
+        surface are instanced. The pairs, whether they qualified and the memory freed are logged.
+        This lowers the memory only, the right surface is still read from its file when the scene is loaded. The
+        reflection transforms are not saved with the scene and the instanced pairs have to be restored with
+        restoreMirrorPairs while the scene is saved, so that the files of the right models are not overwritten.
+        Returns the (left, right) keys of the instanced pairs.
+        """
+        startTime = time.perf_counter()
+        instanced = []
+        freedMemory = 0
+        for leftKey, rightKey in self.findMirrorPairs(atlasNodes):
+            leftNode = atlasNodes[leftKey]
+            rightNode = atlasNodes[rightKey]
+            if leftNode.GetParentTransformNode() is not None or rightNode.GetParentTransformNode() is not None:
+                logging.info("Mirror pair %s, %s: not instanced, already transformed" % (leftKey, rightKey))
+                continue
+            leftSurface = leftNode.GetPolyData()
+            rightSurface = rightNode.GetPolyData()
+            midline = (leftSurface.GetCenter()[0] + rightSurface.GetCenter()[0]) / 2
+            reflection = vtk.vtkTransform()
+            reflection.Translate(2 * midline, 0, 0)
+            reflection.Scale(-1, 1, 1)
+            deviation = self.mirrorDeviation(leftSurface, rightSurface, reflection)
+            if deviation > tolerance:
+                logging.info("Mirror pair %s, %s: not instanced, %.2f mm apart" % (leftKey, rightKey, deviation))
+                continue
+
+            transformNode = slicer.mrmlScene.AddNewNodeByClass(
+                'vtkMRMLLinearTransformNode', slicer.mrmlScene.GenerateUniqueName(rightNode.GetName() + ' mirror'))
+            transformNode.SetMatrixTransformToParent(reflection.GetMatrix())
+            transformNode.SetSaveWithScene(False)
+            memory = rightSurface.GetActualMemorySize()
+            rightNode.SetAndObservePolyData(leftSurface)
+            rightNode.SetAndObserveTransformNodeID(transformNode.GetID())
+            freedMemory += memory
+            instanced.append((leftKey, rightKey))
+            logging.info("Mirror pair %s, %s: instanced, %.2f mm apart, %d KiB freed"
+                         % (leftKey, rightKey, deviation, memory))
+        logging.info("Mirror instancing of %d pairs freed %d KiB, checking the pairs took %.2f s"
+                     % (len(instanced), freedMemory, time.perf_counter() - startTime))
+        return instanced
+
+    def restoreMirrorPairs(self, atlasNodes, pairs):
+        """
+        Undo instanceMirrorPairs for the (left, right) keys of pairs: the right surface is read again from its file
+        and the right model no longer observes the reflection transform, so it is as it was loaded. The transform
+        stays in the scene for the nodes that observe it (e.g. the decimated copies of the right models).
+        Returns the reflection transform of each pair, keyed by pair, to instance them again with
+        reinstanceMirrorPairs.
+        """
+        transformNodes = {}
+        for leftKey, rightKey in pairs:
+            rightNode = atlasNodes[rightKey]
+            transformNodes[(leftKey, rightKey)] = rightNode.GetParentTransformNode()
+            rightNode.SetAndObserveTransformNodeID(None)
+            storageNode = rightNode.GetStorageNode()
+            if storageNode is None or not storageNode.ReadData(rightNode):
+                raise RuntimeError("Failed to read the surface of %s again, it shares the surface of %s"
+                                   % (rightKey, leftKey))
+        return transformNodes
+
+    def reinstanceMirrorPairs(self, atlasNodes, transformNodes):
+        """
+        Let the right models of the pairs restored by restoreMirrorPairs share the left surface again, through the
+        same reflection transforms
+        """
+        for (leftKey, rightKey), transformNode in transformNodes.items():
+            rightNode = atlasNodes[rightKey]
+            rightNode.SetAndObservePolyData(atlasNodes[leftKey].GetPolyData())
+            rightNode.SetAndObserveTransformNodeID(transformNode.GetID())
+
+    def worldSurface(self, modelNode):
+        """
+        Return the surface of a model in world coordinates, with its parent transform (e.g. a mirror reflection)
+        applied
+        """
+        if modelNode.GetParentTransformNode() is None:
+            return modelNode.GetPolyData()
+        modelToWorld = vtk.vtkGeneralTransform()
+        slicer.vtkMRMLTransformNode.GetTransformBetweenNodes(modelNode.GetParentTransformNode(), None, modelToWorld)
+        transform = vtk.vtkTransformPolyDataFilter()
+        transform.SetInputData(modelNode.GetPolyData())
+        transform.SetTransform(modelToWorld)
+        transform.Update()
+        return transform.GetOutput()
+
+    def buildLabelledMesh(self, name, arrayName, numberOfLabels, parts):
+        """
+        Append the surfaces of parts, a list of (label, name, polydata, colour), into one model. The label of each
+        cell is stored in the arrayName cell array and the model is coloured by a colour table with the colour
+        of each label, so the colour and visibility (alpha) of a part are edits of its colour table entry.
+        Neither node is saved with the scene.
+        """
+        colorNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLColorTableNode',
+                                                       slicer.mrmlScene.GenerateUniqueName(name))
+        colorNode.SetSaveWithScene(False)
+        colorNode.SetTypeToUser()
+        colorNode.SetNumberOfColors(numberOfLabels)
+        append = vtk.vtkAppendPolyData()
+        for label, partName, surface, colour in parts:
+            colorNode.SetColor(label, partName, *colour, 1.0)
+            labels = vtk.vtkIntArray()
+            labels.SetName(arrayName)
+            labels.SetNumberOfValues(surface.GetNumberOfCells())
+            labels.Fill(label)
+            labelledSurface = vtk.vtkPolyData()
+            labelledSurface.ShallowCopy(surface)
+            labelledSurface.GetCellData().AddArray(labels)
+            append.AddInputData(labelledSurface)
+        append.Update()
+
+        modelNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLModelNode', slicer.mrmlScene.GenerateUniqueName(name))
+        modelNode.SetSaveWithScene(False)
+        modelNode.SetAndObservePolyData(append.GetOutput())
+        modelNode.CreateDefaultDisplayNodes()
+        displayNode = modelNode.GetDisplayNode()
+        displayNode.SetSaveWithScene(False)
+        displayNode.SetActiveScalar(arrayName, vtk.vtkAssignAttribute.CELL_DATA)
+        displayNode.SetAndObserveColorNodeID(colorNode.GetID())
+        displayNode.SetScalarRangeFlag(slicer.vtkMRMLDisplayNode.UseColorNodeScalarRange)
+        displayNode.SetScalarVisibility(True)
+        return modelNode
+
+    def measureFrameTime(self, threeDView, frames):
+        """
+        Render the 3D view the given number of times, turning the camera a little each frame, and return the
+        mean frame time in seconds. The camera is turned back afterwards.
+        """
+        renderWindow = threeDView.renderWindow()
+        camera = renderWindow.GetRenderers().GetFirstRenderer().GetActiveCamera()
+        renderWindow.Render()
+        startTime = time.perf_counter()
+        for frame in range(frames):
+            camera.Azimuth(360.0 / frames)
+            renderWindow.Render()
+        return (time.perf_counter() - startTime) / frames
+
+    def loadAtlasStatistics(self, sceneBundlePath=ATLAS_SCENE_PATH):
+        """
+        Load the statistics tables of the atlas into the scene, if they are not there yet, and index them.
+        Only the table stages of the scene are loaded, so this is usable without the module GUI.
+        """
+        nodeRoles = self.loadNodeRoles()
+        if self.loadStatisticsBinary(nodeRoles):
+            return
+        if self.loadStatisticsFile():
+            self.buildProbabilityIndex({}, nodeRoles)
+            return
+        self.buildProbabilityIndex(self.loadStatisticsTables(sceneBundlePath, nodeRoles), nodeRoles)
+
+    def loadStatisticsTables(self, sceneBundlePath, nodeRoles):
+        """
+        Load the table stages of the atlas scene, if the tables are not in the scene yet.
+        Returns a dict of "group/role" -> table node.
+        """
+        tableRoles = {group: groupRoles for group, groupRoles in nodeRoles.items() if group.endswith('Tables')}
+        try:
+            self.expandMergedStatistics()
+            return self.findAtlasNodes(tableRoles)
+        except RuntimeError:
+            tableStages = self.tableStageLabels()
+            for label, stagePath in self.prepareAtlasSceneStages(sceneBundlePath):
+                if label in tableStages:
+                    slicer.util.loadScene(stagePath, {'clear': False})
+            self.expandMergedStatistics()
+            return self.findAtlasNodes(tableRoles)
+
+    def tableStageLabels(self):
+        """
+        Return the labels of the loading stages that only bring in statistics tables
+        """
+        return [label for label, groups in ATLAS_LOADING_STAGES if all(group.endswith('Tables') for group in groups)]
+
+    def loadStatisticsFile(self, statisticsPath=ATLAS_STATISTICS_PATH):
+        """
+        Read the statistics tables from the side file, if it is shipped, so that they are not needed in the scene.
+        Returns True if the statistics are read from the side file.
+        """
+        if self.statisticsTables is not None:
+            return True
+        if not os.path.exists(statisticsPath):
+            return False
+        startTime = time.perf_counter()
+        with gzip.open(statisticsPath, 'rt', encoding='utf-8') as f:
+            self.statisticsTables = {role: (table['columns'], table['rows']) for role, table in json.load(f).items()}
+        logging.info("Atlas statistics read from %s in %.2f s"
+                     % (os.path.basename(statisticsPath), time.perf_counter() - startTime))
+        return True
+
+    def writeStatisticsFile(self, atlasNodes, statisticsPath):
+        """
+        Write the statistics tables of atlasNodes to a side file: gzipped JSON with, for each table role
+        (e.g. "bayesianTables/Rb0"), its column names and its rows of cell texts
+        """
+        tables = {}
+        for key in atlasNodes:
+            if key.split('/')[0].endswith('Tables'):
+                columnNames, rows = self.readStatisticsTable(atlasNodes, key)
+                tables[key] = {'columns': columnNames, 'rows': rows}
+        with gzip.open(statisticsPath, 'wt', encoding='utf-8') as f:
+            json.dump(tables, f, separators=(',', ':'))
+
+    def readStatisticsTable(self, atlasNodes, role):
+        """
+        Return the column names and the rows (lists of cell texts) of a statistics table, from the side file if it
+        was read, from the table node of atlasNodes otherwise
+        """
+        if self.statisticsTables is not None:
+            return self.statisticsTables[role]
+        tableNode = atlasNodes[role]
+        columnNames = [tableNode.GetColumnName(column) for column in range(tableNode.GetNumberOfColumns())]
+        rows = [[tableNode.GetCellText(row, column) for column in range(len(columnNames))]
+                for row in range(tableNode.GetNumberOfRows())]
+        return columnNames, rows
+
+    def readQueries(self, path):
+        """
+        Read statistics queries from a CSV file (with a side,region,method header) or a JSON Lines file
+        (one object with side, region and method per line). Yields one dict per query, or the line itself where it
+        is not JSON.
+        """
+        with open(path, newline='') as f:
+            if path.lower().endswith('.csv'):
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line.strip()
+
+    def queryStatistics(self, queries):
+        """
+        Answer (side, region, method) queries from the statistics index, method defaults to bayesian.
+        Yields one dict per query: the query and, for each SLN field, the probability of drainage with its interval
+        (None where the atlas has no value). An invalid query gets an "error" message instead of stopping the batch.
+        """
+        for query in queries:
+            if not isinstance(query, dict):
+                yield {'query': query, 'error': "Invalid query: not an object with side, region and method"}
+                continue
+            result = dict(query)
+            try:
+                if not isinstance(query.get('side'), str):
+                    raise ValueError("side is missing")
+                side = query['side'].strip().lower()
+                region = self.parseRegion(query.get('region'))
+                method = str(query.get('method') or STATISTICS_METHODS[0]).strip().lower()
+                if side not in ATLAS_SIDES:
+                    raise ValueError("unknown side '%s'" % side)
+                if method not in STATISTICS_METHODS:
+                    raise ValueError("unknown method '%s'" % method)
+                regionCount = self.fieldGivenRegion.shape[2]
+                if not 0 <= region < regionCount:
+                    raise ValueError("region must be between 0 and %d" % (regionCount - 1))
+                values = self.fieldGivenRegion[STATISTICS_METHODS.index(method), ATLAS_SIDES.index(side), region]
+            except (KeyError, TypeError, ValueError) as e:
+                result['error'] = "Invalid query: %s" % e
+                yield result
+                continue
+            result['fields'] = {
+                fieldName: dict(zip(('probability', 'ciLow', 'ciHigh'),
+                                    [None if np.isnan(value) else float(value) for value in fieldValues]))
+                for fieldName, fieldValues in zip(self.fieldNames, values)}
+            yield result
+
+    def parseRegion(self, value):
+        """
+        Return the breast region number of a query: an integer, or a string or number holding an integer.
+        Raises ValueError for anything else, a region is never rounded.
+        """
+        if isinstance(value, str) and re.fullmatch(r'\s*[+-]?\d+\s*', value):
+            return int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if value is None or value == '':
+            raise ValueError("region is missing")
+        raise ValueError("region '%s' is not an integer" % value)
+
+    def runBatchQuery(self, inputPath, outputPath):
+        """
+        Answer all the queries of inputPath (CSV or JSON Lines) and write the results as JSON Lines
+        to outputPath ('-' for the standard output). Returns the number of queries.
+        """
+        startTime = time.perf_counter()
+        output = sys.stdout if outputPath == '-' else open(outputPath, 'w')
+        count = 0
+        try:
+            for result in self.queryStatistics(self.readQueries(inputPath)):
+                output.write(json.dumps(result) + '\n')
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        logging.info("%d atlas queries answered in %.2f s" % (count, time.perf_counter() - startTime))
+        return count
+
+    def prepareAtlasSceneStages(self, sceneBundlePath):
+        """
+        Return the atlas scene split into its loading stages as a list of (label, scene file path) in load order.
+        The extracted and split scene is kept in the Slicer cache folder, keyed by the content hash of the bundle,
+        so it is only rebuilt when a new version of the atlas is shipped.
+        """
+        startTime = time.perf_counter()
+        nodeRoles = self.loadNodeRoles()
+        stages = [(label, [(group + '/' + role, nodeId) for group in groups
+                           for role, nodeId in nodeRoles[group]['nodes'].items()])
+                  for label, groups in ATLAS_LOADING_STAGES]
+        # a packaged atlas has all its statistics in one merged table, loaded with the first table stage
+        for (label, stageNodes), (stageLabel, groups) in zip(stages, ATLAS_LOADING_STAGES):
+            if all(group.endswith('Tables') for group in groups):
+                stageNodes.append((MERGED_STATISTICS_ROLE, None))
+                break
+        cacheRoot = os.path.join(slicer.app.cachePath, 'BreastCancerAtlas')
+        digest = self.sceneBundleDigest(sceneBundlePath, cacheRoot, stages)
+        cacheDirectory = os.path.join(cacheRoot, digest)
+        stagesFile = os.path.join(cacheDirectory, 'stages.json')
+
+        self.sceneCacheHit = os.path.exists(stagesFile)
+        if not self.sceneCacheHit:
+            # build in a separate folder and rename when complete, an interrupted build is never picked up
+            buildDirectory = cacheDirectory + '.partial'
+            for directory in (buildDirectory, cacheDirectory):
+                if os.path.exists(directory):
+                    shutil.rmtree(directory)
+            scenePath = self.extractSceneBundle(sceneBundlePath, buildDirectory)
+            stageFiles = self.writeSceneStages(scenePath, stages)
+            with open(os.path.join(buildDirectory, 'stages.json'), 'w') as f:
+                json.dump([(label, os.path.relpath(path, buildDirectory)) for label, path in stageFiles], f)
+            os.replace(buildDirectory, cacheDirectory)
+            self.pruneSceneCache(cacheRoot, digest)
+
+        with open(stagesFile) as f:
+            stageFiles = [(label, os.path.join(cacheDirectory, path)) for label, path in json.load(f)]
+        logging.info("Atlas scene cache %s, prepared in %.2f s"
+                     % ("hit" if self.sceneCacheHit else "miss", time.perf_counter() - startTime))
+        return stageFiles
+
+    def sceneBundleDigest(self, sceneBundlePath, cacheRoot, stages):
+        """
+        Return the cache key of a scene bundle: the SHA-256 of its content and of the loading stages.
+        Hashing the whole bundle is not free, so the hash is remembered for a given file size and modification time.
+        """
+        stat = os.stat(sceneBundlePath)
+        fileKey = "%s|%d|%d" % (os.path.abspath(sceneBundlePath), stat.st_size, stat.st_mtime_ns)
+        hashesFile = os.path.join(cacheRoot, 'hashes.json')
+        try:
+            with open(hashesFile) as f:
+                hashes = json.load(f)
+        except (OSError, ValueError):
+            hashes = {}
+
+        contentHash = hashes.get(fileKey)
+        if contentHash is None:
+            sha = hashlib.sha256()
+            with open(sceneBundlePath, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            contentHash = sha.hexdigest()
+            os.makedirs(cacheRoot, exist_ok=True)
+            with open(hashesFile, 'w') as f:
+                json.dump({fileKey: contentHash}, f)
+
+        # stage files have to be rebuilt when the stages change, even if the bundle did not
+        stagesHash = hashlib.sha256(repr(stages).encode()).hexdigest()
+        return hashlib.sha256((contentHash + stagesHash).encode()).hexdigest()[:32]
+
+    def pruneSceneCache(self, cacheRoot, currentDigest):
+        """
+        Remove cached scenes of previous atlas versions
+        """
+        for name in os.listdir(cacheRoot):
+            path = os.path.join(cacheRoot, name)
+            if name != currentDigest and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def loadClosedSurfaces(self, segmentationNodes, useCache=True):
+        """
+        Add the closed surface representation to segmentations stored as labelmaps, unless they already have it.
+        With useCache the surfaces are read from the Slicer cache folder, keyed by the content hash of the
+        segmentation, and only converted from the labelmaps (and cached) the first time. A cached entry whose
+        segments do not match the segmentation is converted and written again.
+        The time taken, the conversion time it saved and the memory used by each segmentation are logged.
+        Returns the cache keys of the segmentations.
+        """
+        closedSurface = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        cacheRoot = os.path.join(slicer.app.cachePath, 'BreastCancerAtlasSurfaces')
+        digests = set()
+        for node in segmentationNodes:
+            segmentation = node.GetSegmentation()
+            if (segmentation.GetMasterRepresentationName() == closedSurface
+                    or segmentation.ContainsRepresentation(closedSurface)):
+                continue
+            startTime = time.perf_counter()
+            digest = self.segmentationDigest(node)
+            digests.add(digest)
+            cacheDirectory = os.path.join(cacheRoot, digest)
+            conversionTime = self.readClosedSurfaces(node, cacheDirectory) if useCache else None
+            if conversionTime is not None:
+                source = "read from the cache, %.2f s less than converting" % (
+                    conversionTime - (time.perf_counter() - startTime))
+            else:
+                node.CreateClosedSurfaceRepresentation()
+                source = "converted"
+                if useCache:
+                    self.writeClosedSurfaces(node, cacheDirectory, time.perf_counter() - startTime)
+            logging.info("Closed surfaces of %s %s in %.2f s, %d KiB in memory"
+                         % (node.GetName(), source, time.perf_counter() - startTime, self.measureNode(node)['memory']))
+        return digests
+
+    def discardLabelmaps(self, segmentationNodes):
+        """
+        Make the closed surface the master representation of segmentations and remove their labelmaps from memory,
+        the segmentations can no longer be edited
+        """
+        closedSurface = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        for node in segmentationNodes:
+            segmentation = node.GetSegmentation()
+            labelmap = segmentation.GetMasterRepresentationName()
+            if labelmap == closedSurface:
+                continue
+            if not segmentation.ContainsRepresentation(closedSurface):
+                node.CreateClosedSurfaceRepresentation()
+            segmentation.SetMasterRepresentationName(closedSurface)
+            for index in range(segmentation.GetNumberOfSegments()):
+                segmentation.GetNthSegment(index).RemoveRepresentation(labelmap)
+
+    def pruneClosedSurfaceCache(self, digests):
+        """
+        Remove the cached surfaces of previous atlas versions, the ones of the given cache keys are kept
+        """
+        cacheRoot = os.path.join(slicer.app.cachePath, 'BreastCancerAtlasSurfaces')
+        if not os.path.isdir(cacheRoot):
+            return
+        for name in os.listdir(cacheRoot):
+            if name not in digests:
+                shutil.rmtree(os.path.join(cacheRoot, name), ignore_errors=True)
+
+    def segmentationDigest(self, segmentationNode):
+        """
+        Return the cache key of the closed surfaces of a segmentation: the SHA-256 of its master representation
+        (the voxels and geometry of the labelmaps) and of its conversion parameters
+        """
+        from vtk.util import numpy_support
+        sha = hashlib.sha256()
+        segmentation = segmentationNode.GetSegmentation()
+        sha.update(segmentation.SerializeAllConversionParameters().encode())
+        masterRepresentation = segmentation.GetMasterRepresentationName()
+        hashedLabelmaps = set()
+        for index in range(segmentation.GetNumberOfSegments()):
+            segmentId = segmentation.GetNthSegmentID(index)
+            segment = segmentation.GetSegment(segmentId)
+            sha.update(("%s|%d" % (segmentId, segment.GetLabelValue())).encode())
+            labelmap = segment.GetRepresentation(masterRepresentation)
+            # segments of one layer share their labelmap
+            if labelmap is None or labelmap.GetAddressAsString('') in hashedLabelmaps:
+                continue
+            hashedLabelmaps.add(labelmap.GetAddressAsString(''))
+            imageToWorld = vtk.vtkMatrix4x4()
+            labelmap.GetImageToWorldMatrix(imageToWorld)
+            sha.update(repr(labelmap.GetExtent()).encode())
+            sha.update(repr([imageToWorld.GetElement(row, column) for row in range(4) for column in range(4)]).encode())
+            sha.update(numpy_support.vtk_to_numpy(labelmap.GetPointData().GetScalars()).tobytes())
+        return sha.hexdigest()[:32]
+
+    def readClosedSurfaces(self, segmentationNode, cacheDirectory):
+        """
+        Add the closed surfaces cached in cacheDirectory to a segmentation. Returns the time the conversion took
+        when the surfaces were cached, None if there are no cached surfaces for exactly the segments of the
+        segmentation.
+        """
+        cachePath = os.path.join(cacheDirectory, 'surfaces.vtm')
+        try:
+            with open(os.path.join(cacheDirectory, 'conversion.json')) as f:
+                conversionTime = json.load(f)['seconds']
+        except (OSError, ValueError, KeyError):
+            return None
+        if not os.path.exists(cachePath):
+            return None
+        reader = vtk.vtkXMLMultiBlockDataReader()
+        reader.SetFileName(cachePath)
+        reader.Update()
+        surfaces = reader.GetOutput()
+        blocks = {}
+        for index in range(surfaces.GetNumberOfBlocks()):
+            metaData = surfaces.GetMetaData(index)
+            segmentId = metaData.Get(vtk.vtkCompositeDataSet.NAME()) if metaData is not None else None
+            if segmentId in blocks or not isinstance(surfaces.GetBlock(index), vtk.vtkPolyData):
+                return None
+            blocks[segmentId] = surfaces.GetBlock(index)
+        segmentation = segmentationNode.GetSegmentation()
+        segmentIds = [segmentation.GetNthSegmentID(index) for index in range(segmentation.GetNumberOfSegments())]
+        if set(blocks) != set(segmentIds):
+            logging.warning("Cached closed surfaces of %s do not match its segments, they are converted again"
+                            % segmentationNode.GetName())
+            return None
+        closedSurface = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        for segmentId in segmentIds:
+            segmentation.GetSegment(segmentId).AddRepresentation(closedSurface, blocks[segmentId])
+        return conversionTime
+
+    def writeClosedSurfaces(self, segmentationNode, cacheDirectory, conversionTime):
+        """
+        Write the closed surface of each segment of a segmentation, named by segment ID, to a multiblock file in
+        cacheDirectory, along with the time the conversion took
+        """
+        segmentation = segmentationNode.GetSegmentation()
+        surfaces = vtk.vtkMultiBlockDataSet()
+        for index in range(segmentation.GetNumberOfSegments()):
+            segmentId = segmentation.GetNthSegmentID(index)
+            surfaces.SetBlock(index, segmentationNode.GetClosedSurfaceInternalRepresentation(segmentId))
+            surfaces.GetMetaData(index).Set(vtk.vtkCompositeDataSet.NAME(), segmentId)
+        # write in a separate folder and rename when complete, an interrupted write is never picked up
+        buildDirectory = cacheDirectory + '.partial'
+        for directory in (buildDirectory, cacheDirectory):
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+        os.makedirs(buildDirectory)
+        writer = vtk.vtkXMLMultiBlockDataWriter()
+        writer.SetFileName(os.path.join(buildDirectory, 'surfaces.vtm'))
+        writer.SetInputData(surfaces)
+        writer.SetDataModeToBinary()
+        writer.SetCompressorTypeToLZ4()
+        if not writer.Write():
+            shutil.rmtree(buildDirectory, ignore_errors=True)
+            logging.warning("Closed surfaces of %s could not be cached" % segmentationNode.GetName())
+            return
+        with open(os.path.join(buildDirectory, 'conversion.json'), 'w') as f:
+            json.dump({'seconds': conversionTime}, f)
+        os.replace(buildDirectory, cacheDirectory)
+
+    def extractSceneBundle(self, sceneBundlePath, outputDirectory):
+        """
+        Unzip a scene bundle (.mrb) and return the path of the MRML scene file it contains
+        """
+        with zipfile.ZipFile(sceneBundlePath) as bundle:
+            bundle.extractall(outputDirectory)
+        for root, dirs, files in os.walk(outputDirectory):
+            for fileName in files:
+                if fileName.lower().endswith('.mrml'):
+                    return os.path.join(root, fileName)
+        raise ValueError("No MRML scene file found in " + sceneBundlePath)
+
+    def writeSceneStages(self, scenePath, stages):
+        """
+        Split an MRML scene file into one scene file per loading stage, next to the original so that relative data
+        file paths still resolve. Stages are given as (label, [(role, node ID), ...]) and each stage holds its data
+        nodes and every node they reference (display, storage...).
+        Nodes that no stage claims (views, layout, parameter nodes...) are loaded with the first stage and the
+        subject hierarchy is loaded last, once all the nodes it refers to exist.
+        Returns a list of (label, scene file path) in load order.
+        """
+        root = ElementTree.parse(scenePath).getroot()
+        elements = list(root)
+        elementOrder = {id(element): index for index, element in enumerate(elements)}
+        elementsById = {element.get('id'): element for element in elements if element.get('id')}
+        # nodes tagged with a role are only matched by their role, their ID may have been reused
+        roleIds = {}
+        for element in elements:
+            role = re.search(re.escape(NODE_ROLE_ATTRIBUTE) + r':([^;]*)', element.get('attributes', ''))
+            if role:
+                roleIds[urllib.parse.unquote(role.group(1))] = element.get('id')
+        untaggedIds = set(elementsById) - set(roleIds.values())
+
+        claimedIds = set()
+        stageElements = []
+        for label, stageNodes in stages:
+            stage = []
+            pendingIds = [roleIds.get(role, nodeId if nodeId in untaggedIds else None) for role, nodeId in stageNodes]
+            pendingIds = [nodeId for nodeId in pendingIds if nodeId in elementsById]
+            while pendingIds:
+                nodeId = pendingIds.pop()
+                if nodeId in claimedIds:
+                    continue
+                claimedIds.add(nodeId)
+                element = elementsById[nodeId]
+                stage.append(element)
+                # follow node references (displayNodeRef, storageNodeRef, references, ...)
+                for value in element.attrib.values():
+                    pendingIds.extend(token for token in re.split(r'[\s;:,]+', value) if token in elementsById)
+            stageElements.append((label, stage))
+
+        unclaimed = [element for element in elements
+                     if element.get('id') not in claimedIds and element.tag != 'SubjectHierarchy']
+        if stageElements:
+            stageElements[0][1].extend(unclaimed)
+        else:
+            stageElements.append(("scene", unclaimed))
+        stageElements[-1][1].extend(element for element in elements if element.tag == 'SubjectHierarchy')
+
+        stageFiles = []
+        for label, stage in stageElements:
+            if not stage:
+                continue
+            stageRoot = ElementTree.Element(root.tag, root.attrib)
+            stageRoot.extend(sorted(stage, key=lambda element: elementOrder[id(element)]))
+            stagePath = os.path.join(os.path.dirname(scenePath), 'BreastCancerAtlasStage%02d.mrml' % len(stageFiles))
+            ElementTree.ElementTree(stageRoot).write(stagePath, encoding='utf-8', xml_declaration=True)
+            stageFiles.append((label, stagePath))
+        return stageFiles
+
+    def packageAtlas(self, inputPath, outputPath, reportPath, triangleBudgets=PACKAGE_TRIANGLE_BUDGETS,
+                     quantizationStep=PACKAGE_QUANTIZATION_STEP):
+        """
+        Write an optimized copy of an atlas scene bundle for slower computers: surfaces decimated to the triangle
+        budget of their node role group, point coordinates rounded to quantizationStep and compressed, segmentations
+        reduced to their closed surface representation and the statistics tables merged into one table.
+        The file size, read time and memory of every atlas node before and after are written to the reportPath CSV
+        file. The current scene is cleared.
+        """
+        nodeRoles = self.loadNodeRoles()
+        slicer.mrmlScene.Clear(0)
+        startTime = time.perf_counter()
+        slicer.util.loadScene(inputPath)
+        sceneLoadTimes = [time.perf_counter() - startTime]
+        atlasNodes = self.findAtlasNodes(nodeRoles)
+        # the node IDs change when the scene is saved, the roles are kept in the nodes
+        self.tagNodeRoles(atlasNodes)
+        before = {key: self.measureNode(node) for key, node in atlasNodes.items()}
+
+        for key, node in atlasNodes.items():
+            group = key.split('/')[0]
+            if group.endswith('Tables'):
+                continue
+            storageNode = node.GetStorageNode()
+            if node.IsA('vtkMRMLSegmentationNode'):
+                self.packageSegmentation(node, triangleBudgets.get(group), quantizationStep)
+            elif node.IsA('vtkMRMLModelNode'):
+                surface = node.GetPolyData()
+                if group in triangleBudgets:
+                    surface = self.decimateSurface(surface, triangleBudgets[group])
+                node.SetAndObservePolyData(self.quantizeSurface(surface, quantizationStep))
+                # only the XML VTK format is compressed
+                if storageNode is not None and storageNode.GetFileName():
+                    storageNode.SetFileName(os.path.splitext(storageNode.GetFileName())[0] + '.vtp')
+            if storageNode is not None:
+                storageNode.SetUseCompression(True)
+        self.mergeAtlasTables(atlasNodes)
+        for key, node in atlasNodes.items():
+            if key.split('/')[0].endswith('Tables'):
+                slicer.mrmlScene.RemoveNode(node)
+        if not slicer.util.saveScene(outputPath):
+            raise RuntimeError("Failed to save the packaged atlas to " + outputPath)
+
+        slicer.mrmlScene.Clear(0)
+        startTime = time.perf_counter()
+        slicer.util.loadScene(outputPath)
+        sceneLoadTimes.append(time.perf_counter() - startTime)
+        self.expandMergedStatistics()
+        after = {}
+        for key, node in self.findAtlasNodes(nodeRoles).items():
+            # the statistics tables are recreated from the merged table, which is measured instead
+            if not key.split('/')[0].endswith('Tables'):
+                after[key] = self.measureNode(node)
+        after[MERGED_STATISTICS_ROLE] = self.measureNode(slicer.util.getFirstNodeByClassByName(
+            'vtkMRMLTableNode', 'BreastCancerAtlasStatistics'))
+        self.writePackageReport(reportPath, before, after, [os.path.getsize(inputPath), os.path.getsize(outputPath)],
+                                sceneLoadTimes)
+        slicer.mrmlScene.Clear(0)
+
+    def packageSegmentation(self, segmentationNode, triangleBudget, quantizationStep):
+        """
+        Keep only the closed surface representation of the segments, decimated within triangleBudget (shared by the
+        segments in proportion to their size) and quantized
+        """
+        closedSurface = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        segmentationNode.CreateClosedSurfaceRepresentation()
+        segmentation = segmentationNode.GetSegmentation()
+        segmentIds = [segmentation.GetNthSegmentID(index) for index in range(segmentation.GetNumberOfSegments())]
+        surfaces = [segmentationNode.GetClosedSurfaceInternalRepresentation(segmentId) for segmentId in segmentIds]
+        triangles = max(sum(surface.GetNumberOfCells() for surface in surfaces), 1)
+        segmentation.SetMasterRepresentationName(closedSurface)
+        for segmentId, surface in zip(segmentIds, surfaces):
+            if triangleBudget is not None:
+                surface = self.decimateSurface(surface, triangleBudget * surface.GetNumberOfCells() // triangles)
+            surface = self.quantizeSurface(surface, quantizationStep)
+            segment = segmentation.GetSegment(segmentId)
+            segment.RemoveAllRepresentations()
+            segment.AddRepresentation(closedSurface, surface)
+
+    def quantizeSurface(self, surface, step):
+        """
+        Return a copy of the surface with its point coordinates rounded to a grid of the given step and stored as
+        32-bit floats, which makes them compress much better
+        """
+        from vtk.util import numpy_support
+        coordinates = numpy_support.vtk_to_numpy(surface.GetPoints().GetData())
+        quantized = (np.round(coordinates / step) * step).astype(np.float32)
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(quantized, deep=True))
+        quantizedSurface = vtk.vtkPolyData()
+        quantizedSurface.ShallowCopy(surface)
+        quantizedSurface.SetPoints(points)
+        return quantizedSurface
+
+    def measureNode(self, node):
+        """
+        Return the file size (bytes), the time to read the file again (s), the memory (KiB) and the number of
+        triangles of a model, segmentation or table node
+        """
+        storageNode = node.GetStorageNode()
+        fileSize = readTime = None
+        if storageNode is not None and storageNode.GetFileName() and os.path.exists(storageNode.GetFileName()):
+            fileSize = os.path.getsize(storageNode.GetFileName())
+            startTime = time.perf_counter()
+            storageNode.ReadData(node)
+            readTime = time.perf_counter() - startTime
+
+        if node.IsA('vtkMRMLSegmentationNode'):
+            dataObjects = []
+            segmentation = node.GetSegmentation()
+            for index in range(segmentation.GetNumberOfSegments()):
+                segment = segmentation.GetNthSegment(index)
+                representationNames = vtk.vtkStringArray()
+                segment.GetContainedRepresentationNames(representationNames)
+                dataObjects += [segment.GetRepresentation(representationNames.GetValue(name))
+                                for name in range(representationNames.GetNumberOfValues())]
+        elif node.IsA('vtkMRMLModelNode'):
+            dataObjects = [node.GetPolyData()]
+        elif node.IsA('vtkMRMLTableNode'):
+            dataObjects = [node.GetTable()]
+        else:
+            dataObjects = []
+        dataObjects = [dataObject for dataObject in dataObjects if dataObject is not None]
+        return {
+            'fileSize': fileSize,
+            'readTime': readTime,
+            'memory': sum(dataObject.GetActualMemorySize() for dataObject in dataObjects),
+            'triangles': sum(dataObject.GetNumberOfCells() for dataObject in dataObjects
+                             if dataObject.IsA('vtkPolyData')),
+        }
+
+    def writePackageReport(self, reportPath, before, after, bundleSizes, sceneLoadTimes):
+        """
+        Write the measures of every atlas node before and after packaging, and the totals, to a CSV file
+        """
+        measures = ['fileSize', 'readTime', 'memory', 'triangles']
+        with open(reportPath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['role'] + ['%s %s' % (measure, state) for measure in measures
+                                        for state in ['before', 'after']])
+            for role in list(before) + [role for role in after if role not in before]:
+                row = [role]
+                for measure in measures:
+                    for measured in (before, after):
+                        value = measured.get(role, {}).get(measure)
+                        row.append('' if value is None else value)
+                writer.writerow(row)
+            writer.writerow(['scene bundle', bundleSizes[0], bundleSizes[1], sceneLoadTimes[0], sceneLoadTimes[1]])
+        logging.info("Atlas packaged: %.1f MB to %.1f MB, scene loaded in %.1f s instead of %.1f s"
+                     % (bundleSizes[0] / 1e6, bundleSizes[1] / 1e6, sceneLoadTimes[1], sceneLoadTimes[0]))
+
+
+#
+# BreastCancerAtlasTest
+#
+
+class BreastCancerAtlasRecordingNode:
+    """
+    Stand-in for an atlas node or display node in the widget tests: the calls made to it are appended to calls,
+    as (node name, method name, arguments)
+    """
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+        self.displayNode = None
+
+    def GetDisplayNode(self):
+        if self.displayNode is None:
+            self.displayNode = BreastCancerAtlasRecordingNode(self.name + ' display', self.calls)
+        return self.displayNode
+
+    def GetID(self):
+        return self.name
+
+    def __getattr__(self, method):
+        return lambda *args: self.calls.append((self.name, method, args))
+
+
+class BreastCancerAtlasTest(ScriptedLoadableModuleTest):
+    """
+    This is the test case for your scripted module.
+    Uses ScriptedLoadableModuleTest base class, available at:
+    https://github.com/Slicer/Slicer/blob/main/Base/Python/slicer/ScriptedLoadableModule.py
+    """
+
+    def setUp(self):
+        """
+        Do whatever is needed to reset the state - typically a scene clear will be enough.
+        """
+        slicer.mrmlScene.Clear()
+
+    def runTest(self):
+        """
+        Run as few or as many tests as needed here.
+        """
+        self.setUp()
+        self.test_ProbabilityIndex()
+        self.test_ControlPointLabels()
+        self.test_ParseProbability()
+        self.test_StatisticsQueries()
+        self.test_BatchQueries()
+        self.test_NodeRoleManifest()
+        self.test_SceneStages()
+        self.test_SceneBundleDigest()
+        self.setUp()
+        self.test_StatisticsBinaryRoundTrip()
+        self.setUp()
+        self.test_AtlasStatisticsBinaryRoundTrip()
+        self.setUp()
+        self.test_ClosedSurfaceCache()
+        self.setUp()
+        self.test_MirrorInstancingSave()
+        self.setUp()
+        self.test_SLNPointCloud()
+        self.setUp()
+        self.test_ViewStateReconciler()
+        self.setUp()
+        self.test_ToggleCoalescing()
+        self.setUp()
+        self.test_HighlightTracking()
+        self.setUp()
+        self.test_ViewManager()
+        self.setUp()
+        self.test_RegionMesh()
+        self.setUp()
+        self.test_FieldVolumeMesh()
+        self.setUp()
+        self.test_LevelOfDetail()
+        self.setUp()
+        self.test_RenderingProfile()
+        self.setUp()
+        self.test_StatisticsSideFile()
+
+    def baselineLabel(self, text):
+        """
+        Return the control point label the atlas showed for a statistics cell before the cells were parsed: its
+        first word followed by a percent sign, which is not doubled
+        """
+        return text.split()[0].rstrip('%') + '%'
+
+    def statisticsTables(self, nodeRoles, cells):
+        """
+        Return statistics tables of every analysis and atlas item as read from the statistics side file, with empty
+        cells but the ones given in cells, keyed by (method, item, row name)
+        """
+        regionCount = BreastCancerAtlasLogic().regionCount(nodeRoles['items'])
+        tables = {}
+        for method in STATISTICS_METHODS:
+            for item, descriptor in nodeRoles['items'].items():
+                if 'region' in descriptor:
+                    rowNames = list(nodeRoles['fields'])
+                else:
+                    rowNames = [str(region) for region in range(regionCount)]
+                rows = [[rowName, cells.get((method, item, rowName), '')] for rowName in rowNames]
+                tables[method + 'Tables/' + item] = (['Name', 'Probability (%)'], rows)
+        return tables
+
+    def indexedLogic(self, nodeRoles, cells):
+        """
+        Return a logic with the probability index of statistics tables holding only the given cells
+        """
+        logic = BreastCancerAtlasLogic()
+        logic.statisticsTables = self.statisticsTables(nodeRoles, cells)
+        logic.buildProbabilityIndex({}, nodeRoles)
+        return logic
+
+    def test_ProbabilityIndex(self):
+        """
+        The breast region tables fill fieldGivenRegion and the SLN field tables regionGivenField, with the control
+        point label of each cell, at the analysis, side, region and field of the cell
+        """
+        self.delayDisplay("Starting the probability index test")
+        nodeRoles = BreastCancerAtlasLogic().loadNodeRoles()
+        logic = self.indexedLogic(nodeRoles, {
+            ('bayesian', 'Rb3', 'IM: Internal Mammary'): '23 (15-31)',
+            ('frequentist', 'Rb3', 'SC: Supraclavicular'): '7.5',
+            ('bayesian', 'rics', '3'): '40 (30-50)',
+        })
+        right = ATLAS_SIDES.index('right')
+        frequentist = STATISTICS_METHODS.index('frequentist')
+        ics = logic.fields.index('ics')
+        np.testing.assert_array_equal(logic.fieldGivenRegion[0, right, 3, ics], [23, 15, 31])
+        np.testing.assert_array_equal(logic.fieldGivenRegion[frequentist, right, 3, logic.fields.index('sc')],
+                                      [7.5, np.nan, np.nan])
+        np.testing.assert_array_equal(logic.regionGivenField[0, right, 3, ics], [40, 30, 50])
+        self.assertEqual(np.count_nonzero(~np.isnan(logic.fieldGivenRegion[..., 0])), 2)
+        self.assertEqual(np.count_nonzero(~np.isnan(logic.regionGivenField[..., 0])), 1)
+        self.assertEqual(logic.fieldGivenRegionLabels, {('bayesian', 'right', 3, 'ics'): '23%',
+                                                        ('frequentist', 'right', 3, 'sc'): '7.5%'})
+        self.assertEqual(logic.regionGivenFieldLabels, {('bayesian', 'right', 3, 'ics'): '40%'})
+        self.delayDisplay('Test passed')
+
+    def test_ControlPointLabels(self):
+        """
+        A pressed breast region labels the SLN fields of its side and blanks the other side, a pressed SLN field
+        labels the breast regions of its side, in the selected analysis
+        """
+        self.delayDisplay("Starting the control point label test")
+        nodeRoles = BreastCancerAtlasLogic().loadNodeRoles()
+        logic = self.indexedLogic(nodeRoles, {
+            ('bayesian', 'Rb3', 'IM: Internal Mammary'): '23 (15-31)',
+            ('frequentist', 'Rb3', 'SC: Supraclavicular'): '7.5',
+            ('bayesian', 'rics', '3'): '40 (30-50)',
+        })
+        items = nodeRoles['items']
+        leftFields = {name: '' for name, descriptor in items.items()
+                      if 'field' in descriptor and descriptor['side'] == 'left'}
+        self.assertEqual(logic.controlPointLabels(items, 'Rb3', 'bayesian'), dict(leftFields, rics='23%'))
+        self.assertEqual(logic.controlPointLabels(items, 'Rb3', 'frequentist'), dict(leftFields, rsc='7.5%'))
+        self.assertEqual(logic.controlPointLabels(items, 'Rb4', 'bayesian'), leftFields)
+        self.assertEqual(logic.controlPointLabels(items, 'rics', 'bayesian'), {'Rb3': '40%'})
+        self.assertEqual(logic.controlPointLabels(items, 'rics', 'bootstrapping'), {})
+        self.assertEqual(logic.controlPointLabels(items, 'lics', 'bayesian'), {})
+        self.delayDisplay('Test passed')
+
+    def test_ParseProbability(self):
+        """
+        Only cells made of a probability and an optional interval are parsed, anything else has no value. All the
+        cells keep the label the atlas showed before the cells were parsed.
+        """
+        self.delayDisplay("Starting the probability parsing test")
+        logic = BreastCancerAtlasLogic()
+        parsed = {
+            '23 (15-31)': ('23%', [23, 15, 31]),
+            '23% (15-31)': ('23%', [23, 15, 31]),
+            ' 0.5 (0.1 - 2.25%) ': ('0.5%', [0.5, 0.1, 2.25]),
+            '7.5': ('7.5%', [7.5, np.nan, np.nan]),
+            '<1 (0-2)': ('<1%', [np.nan] * 3),
+            'N/A': ('N/A%', [np.nan] * 3),
+            '1e-3': ('1e-3%', [np.nan] * 3),
+            '23 (15-': ('23%', [np.nan] * 3),
+        }
+        for text, (label, values) in parsed.items():
+            parsedLabel, parsedValues = logic.parseProbability(text)
+            self.assertEqual(parsedLabel, label, text)
+            np.testing.assert_array_equal(parsedValues, values, text)
+            # the label of the atlas before the cells were parsed, without its doubled percent sign
+            self.assertEqual(parsedLabel, self.baselineLabel(text), text)
+        self.assertIsNone(logic.parseProbability(''))
+        self.assertIsNone(logic.parseProbability('  '))
+
+        nodeRoles = logic.loadNodeRoles()
+        with self.assertLogs(level='WARNING'):
+            logic = self.indexedLogic(nodeRoles, {('bayesian', 'Rb3', 'IM: Internal Mammary'): '<1 (0-2)'})
+        self.assertTrue(np.isnan(logic.fieldGivenRegion).all())
+        self.assertEqual(logic.fieldGivenRegionLabels, {('bayesian', 'right', 3, 'ics'): '<1%'})
+        self.delayDisplay('Test passed')
+
+    def test_StatisticsQueries(self):
+        """
+        regionsAbove, mostLikelyFields and mostLikelyRegions ignore the cells without a value
+        """
+        self.delayDisplay("Starting the statistics query test")
+        nodeRoles = BreastCancerAtlasLogic().loadNodeRoles()
+        logic = self.indexedLogic(nodeRoles, {
+            ('bayesian', 'Rb3', 'IM: Internal Mammary'): '23 (15-31)',
+            ('bayesian', 'Rb3', 'SC: Supraclavicular'): '7.5',
+            ('bayesian', 'Rb4', 'IM: Internal Mammary'): '5',
+            ('bayesian', 'Rb4', 'SC: Supraclavicular'): 'N/A',
+            ('bayesian', 'rics', '3'): '40 (30-50)',
+            ('bayesian', 'rics', '4'): '60',
+            ('bayesian', 'rsc', '3'): '<1',
+        })
+        left, right = ATLAS_SIDES.index('left'), ATLAS_SIDES.index('right')
+        ics, sc = logic.fields.index('ics'), logic.fields.index('sc')
+        regionShape = (len(STATISTICS_METHODS), len(ATLAS_SIDES), logic.regionCount(nodeRoles['items']))
+
+        above = logic.regionsAbove('ics', 10)
+        self.assertEqual(above.shape, regionShape)
+        self.assertEqual(list(zip(*np.nonzero(above))), [(0, right, 3)])
+        self.assertEqual(list(zip(*np.nonzero(logic.regionsAbove('ics', 1, 'bayesian')))), [(right, 3), (right, 4)])
+        # the N/A cell of region 4 is not above any threshold
+        self.assertEqual(list(zip(*np.nonzero(logic.regionsAbove('sc', 0)))), [(0, right, 3)])
+
+        fields = logic.mostLikelyFields()
+        self.assertEqual(fields.shape, regionShape)
+        self.assertEqual(fields[0, right, 3], ics)
+        self.assertEqual(fields[0, right, 4], ics)
+        self.assertEqual(fields[0, right, 5], -1)
+        self.assertTrue((fields[1:] == -1).all() and (fields[:, left] == -1).all())
+
+        regions = logic.mostLikelyRegions()
+        self.assertEqual(regions.shape, (len(STATISTICS_METHODS), len(ATLAS_SIDES), len(logic.fields)))
+        self.assertEqual(regions[0, right, ics], 4)
+        self.assertEqual(regions[0, right, sc], -1)
+        self.assertEqual(regions[0, left, ics], -1)
+        self.delayDisplay('Test passed')
+
+    def test_BatchQueries(self):
+        """
+        Malformed CSV rows and JSON lines get an error each and the rest of the batch is still answered
+        """
+        self.delayDisplay("Starting the batch query test")
+        nodeRoles = BreastCancerAtlasLogic().loadNodeRoles()
+        logic = self.indexedLogic(nodeRoles, {('bayesian', 'Rb3', 'IM: Internal Mammary'): '23 (15-31)',
+                                              ('frequentist', 'Rb3', 'IM: Internal Mammary'): '19'})
+        queries = {
+            '.csv': [
+                ('side,region,method', None),
+                ('right', False),
+                ('right,2.7', False),
+                ('right,3,frequentist', 19),
+                ('left,,bayesian', False),
+                ('middle,3', False),
+                ('right,13', False),
+                ('right,3,unknown', False),
+                ('right, 3 ,', 23),
+            ],
+            '.jsonl': [
+                ('{"side": "right", "region": null}', False),
+                ('[1, 2]', False),
+                ('not json', False),
+                ('{"side": "right", "region": 3}', 23),
+                ('{"side": "right", "region": 3.0, "method": "frequentist"}', 19),
+                ('{"side": "right", "region": 2.7}', False),
+                ('{"side": "right", "region": true}', False),
+                ('{"side": null, "region": 3}', False),
+            ],
+        }
+        for extension, lines in queries.items():
+            inputPath = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestQueries' + extension)
+            outputPath = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestResults.jsonl')
+            with open(inputPath, 'w') as f:
+                f.write('\n'.join(line for line, expected in lines) + '\n')
+            expectedResults = [expected for line, expected in lines if expected is not None]
+            self.assertEqual(logic.runBatchQuery(inputPath, outputPath), len(expectedResults))
+            with open(outputPath) as f:
+                results = [json.loads(line) for line in f]
+            self.assertEqual(len(results), len(expectedResults))
+            for result, expected in zip(results, expectedResults):
+                if expected is False:
+                    self.assertIn('error', result)
+                else:
+                    self.assertNotIn('error', result)
+                    self.assertEqual(result['fields']['IM']['probability'], expected)
+        self.delayDisplay('Test passed')
+
+    def test_NodeRoleManifest(self):
+        """
+        The items of the manifest only refer to roles of the manifest, and a breast region added to the manifest is
+        indexed without code changes
+        """
+        self.delayDisplay("Starting the node role manifest test")
+        logic = BreastCancerAtlasLogic()
+        nodeRoles = logic.loadNodeRoles()
+        roles = {group + '/' + role for group, groupRoles in nodeRoles.items() if 'nodes' in groupRoles
+                 for role in groupRoles['nodes']}
+        for item, descriptor in nodeRoles['items'].items():
+            self.assertIn(descriptor['label']['node'], roles, item)
+            for highlight in descriptor['highlight']:
+                self.assertIn(highlight['node'], roles, item)
+        for side in ATLAS_SIDES:
+            self.assertTrue(set(nodeRoles['breastSurfaces'][side]) <= roles, side)
+        self.assertEqual(logic.regionCount(nodeRoles['items']), 13)
+
+        nodeRoles['items']['Rb13'] = {'side': 'right', 'region': 13,
+                                      'label': {'node': 'regionMarkups/Rb13', 'name': '13'}, 'highlight': []}
+        logic = self.indexedLogic(nodeRoles, {('bayesian', 'Rb13', 'IM: Internal Mammary'): '12',
+                                              ('bayesian', 'rics', '13'): '4'})
+        self.assertEqual(logic.fieldGivenRegion.shape[2], 14)
+        self.assertEqual(logic.controlPointLabels(nodeRoles['items'], 'rics', 'bayesian'), {'Rb13': '4%'})
+        self.assertEqual(logic.controlPointLabels(nodeRoles['items'], 'Rb13', 'bayesian')['rics'], '12%')
+        self.delayDisplay('Test passed')
+
+    def test_SceneStages(self):
+        """
+        Each loading stage gets its nodes, matched by role or by the ID of untagged nodes, and the nodes they refer
+        to. The nodes that no stage claims go to the first stage and the subject hierarchy to the last one.
+        """
+        self.delayDisplay("Starting the scene stage test")
+        sceneDirectory = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestStages')
+        shutil.rmtree(sceneDirectory, ignore_errors=True)
+        os.makedirs(sceneDirectory)
+        scenePath = os.path.join(sceneDirectory, 'scene.mrml')
+        with open(scenePath, 'w') as f:
+            f.write("""<MRML version="Slicer4.4.0" userTags="">
+ <View id="vtkMRMLViewNode1" name="View1"></View>
+ <Model id="vtkMRMLModelNode4" name="L_IMN" displayNodeRef="vtkMRMLModelDisplayNode4"
+   storageNodeRef="vtkMRMLModelStorageNode4" attributes="BreastCancerAtlas.Role:ESTRO%2FL_IMN"></Model>
+ <ModelDisplay id="vtkMRMLModelDisplayNode4" name="ModelDisplay"></ModelDisplay>
+ <ModelStorage id="vtkMRMLModelStorageNode4" name="ModelStorage" fileName="L_IMN.vtk"></ModelStorage>
+ <Model id="vtkMRMLModelNode5" name="L_AX1" displayNodeRef="vtkMRMLModelDisplayNode5"></Model>
+ <ModelDisplay id="vtkMRMLModelDisplayNode5" name="ModelDisplay"></ModelDisplay>
+ <Model id="vtkMRMLModelNode6" name="R_IMN" displayNodeRef="vtkMRMLModelDisplayNode6"
+   attributes="BreastCancerAtlas.Role:ESTRO%2FR_IMN"></Model>
+ <ModelDisplay id="vtkMRMLModelDisplayNode6" name="ModelDisplay"></ModelDisplay>
+ <Table id="vtkMRMLTableNode1" name="Rb1" attributes="BreastCancerAtlas.Role:bayesianTables%2FRb2"></Table>
+ <SubjectHierarchy id="vtkMRMLSubjectHierarchyNode1" name="SubjectHierarchy"></SubjectHierarchy>
+</MRML>
+""")
+        stages = [('first', [('ESTRO/L_IMN', 'vtkMRMLModelNode4')]),
+                  # R_IMN is found by its role, the table by its ID is not as it is tagged with another role
+                  ('second', [('ESTRO/R_IMN', 'vtkMRMLModelNode9'), ('ESTRO/L_AX1', 'vtkMRMLModelNode5'),
+                              ('bayesianTables/Rb1', 'vtkMRMLTableNode1')])]
+        stageFiles = BreastCancerAtlasLogic().writeSceneStages(scenePath, stages)
+        self.assertEqual([label for label, stagePath in stageFiles], ['first', 'second'])
+        stageIds = []
+        for label, stagePath in stageFiles:
+            self.assertEqual(os.path.dirname(stagePath), sceneDirectory)
+            stageIds.append([element.get('id') for element in ElementTree.parse(stagePath).getroot()])
+        self.assertEqual(stageIds[0], ['vtkMRMLViewNode1', 'vtkMRMLModelNode4', 'vtkMRMLModelDisplayNode4',
+                                       'vtkMRMLModelStorageNode4', 'vtkMRMLTableNode1'])
+        self.assertEqual(stageIds[1], ['vtkMRMLModelNode5', 'vtkMRMLModelDisplayNode5', 'vtkMRMLModelNode6',
+                                       'vtkMRMLModelDisplayNode6', 'vtkMRMLSubjectHierarchyNode1'])
+        shutil.rmtree(sceneDirectory, ignore_errors=True)
+        self.delayDisplay('Test passed')
+
+    def test_SceneBundleDigest(self):
+        """
+        The cache key of a scene bundle only changes with its content or the loading stages, and the content hash
+        is remembered for the file size and modification time
+        """
+        self.delayDisplay("Starting the scene bundle digest test")
+        logic = BreastCancerAtlasLogic()
+        cacheRoot = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestCache')
+        shutil.rmtree(cacheRoot, ignore_errors=True)
+        sceneBundlePath = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestScene.mrb')
+        with open(sceneBundlePath, 'wb') as f:
+            f.write(b'atlas version 1')
+        stages = [('first', [('ESTRO/L_IMN', 'vtkMRMLModelNode4')])]
+        digest = logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages)
+        self.assertEqual(len(digest), 32)
+        self.assertEqual(logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages), digest)
+        self.assertNotEqual(logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages + [('second', [])]), digest)
+
+        # the remembered content hash is used while the size and modification time of the bundle are the same
+        hashesFile = os.path.join(cacheRoot, 'hashes.json')
+        with open(hashesFile) as f:
+            hashes = json.load(f)
+        self.assertEqual(list(hashes.values()), [hashlib.sha256(b'atlas version 1').hexdigest()])
+        with open(hashesFile, 'w') as f:
+            json.dump({fileKey: '0' * 64 for fileKey in hashes}, f)
+        self.assertNotEqual(logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages), digest)
+
+        with open(sceneBundlePath, 'wb') as f:
+            f.write(b'atlas version 2 ')
+        newDigest = logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages)
+        self.assertNotEqual(newDigest, digest)
+        with open(sceneBundlePath, 'wb') as f:
+            f.write(b'atlas version 1')
+        self.assertEqual(logic.sceneBundleDigest(sceneBundlePath, cacheRoot, stages), digest)
+        os.remove(sceneBundlePath)
+        shutil.rmtree(cacheRoot, ignore_errors=True)
+        self.delayDisplay('Test passed')
+
+    def test_StatisticsBinaryRoundTrip(self):
+        """
+        Statistics tables with estimates of 0 to 2 decimals, intervals, empty cells and text which is not a
+        probability give the same control point labels and values once written to and mapped from the binary
+        statistics file
+        """
+        self.delayDisplay("Starting the binary statistics round trip test")
+        logic = BreastCancerAtlasLogic()
+        nodeRoles = logic.loadNodeRoles()
+        cells = ['23 (15-31)', '0.5 (0.1-2.25)', '', '100', '7.25 (3.5-12)', '0', '<1 (0-2)', 'N/A', '1e-3',
+                 '23% (15-31)', '07.50']
+        regionCount = logic.regionCount(nodeRoles['items'])
+        atlasNodes = {}
+        for method in STATISTICS_METHODS:
+            for item, descriptor in nodeRoles['items'].items():
+                if 'region' in descriptor:
+                    rowNames = list(nodeRoles['fields'])
+                else:
+                    rowNames = [str(region) for region in range(regionCount)]
+                rows = [[rowName, cells[(index + len(item)) % len(cells)]] for index, rowName in enumerate(rowNames)]
+                atlasNodes[method + 'Tables/' + item] = self.createTableNode(item, ['Name', 'Probability (%)'], rows)
+        self.assertBinaryRoundTrip(atlasNodes, nodeRoles)
+        self.delayDisplay('Test passed')
+
+    def test_AtlasStatisticsBinaryRoundTrip(self):
+        """
+        The statistics of the atlas scene give the same control point labels and values once written to and mapped
+        from the binary statistics file
+        """
+        if not os.path.exists(ATLAS_SCENE_PATH):
+            self.delayDisplay("Atlas scene not found, skipping the atlas statistics round trip test")
+            return
+        self.delayDisplay("Starting the atlas statistics round trip test")
+        logic = BreastCancerAtlasLogic()
+        nodeRoles = logic.loadNodeRoles()
+        self.assertBinaryRoundTrip(logic.loadStatisticsTables(ATLAS_SCENE_PATH, nodeRoles), nodeRoles)
+        self.delayDisplay('Test passed')
+
+    def test_ClosedSurfaceCache(self):
+        """
+        The closed surfaces of a segmentation are converted and cached once, then read from the cache. A cache entry
+        with other segments is converted and written again instead of failing.
+        """
+        self.delayDisplay("Starting the closed surface cache test")
+        logic = BreastCancerAtlasLogic()
+        closedSurface = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        segmentationNode = self.createSegmentationNode('regions', ['upper', 'lower'])
+        otherNode = self.createSegmentationNode('other', ['left', 'middle', 'right'])
+        segmentation = segmentationNode.GetSegmentation()
+
+        digests = logic.loadClosedSurfaces([segmentationNode])
+        self.assertEqual(len(digests), 1)
+        cacheDirectory = os.path.join(slicer.app.cachePath, 'BreastCancerAtlasSurfaces', digests.pop())
+        self.assertTrue(segmentation.ContainsRepresentation(closedSurface))
+        self.assertIsNotNone(logic.readClosedSurfaces(segmentationNode, cacheDirectory))
+
+        segmentation.RemoveRepresentation(closedSurface)
+        logic.loadClosedSurfaces([segmentationNode])
+        self.assertTrue(segmentation.ContainsRepresentation(closedSurface))
+
+        # a cache entry of other segments, e.g. written by another version of the module
+        otherNode.CreateClosedSurfaceRepresentation()
+        logic.writeClosedSurfaces(otherNode, cacheDirectory, 1.0)
+        segmentation.RemoveRepresentation(closedSurface)
+        self.assertIsNone(logic.readClosedSurfaces(segmentationNode, cacheDirectory))
+        logic.loadClosedSurfaces([segmentationNode])
+        self.assertTrue(segmentation.ContainsRepresentation(closedSurface))
+        self.assertIsNotNone(logic.readClosedSurfaces(segmentationNode, cacheDirectory))
+        shutil.rmtree(cacheDirectory, ignore_errors=True)
+        self.delayDisplay('Test passed')
+
+    def test_MirrorInstancingSave(self):
+        """
+        Saving a scene with a mirror instanced pair writes the own surface of the right model and no reflection
+        transform, and leaves the pair and the decimated copy of the right model on the right side
+        """
+        self.delayDisplay("Starting the mirror instancing save test")
+        logic = BreastCancerAtlasLogic()
+        sceneDirectory = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestMirror')
+        shutil.rmtree(sceneDirectory, ignore_errors=True)
+        os.makedirs(sceneDirectory)
+        atlasNodes = {}
+        for key, centre in (('ESTRO/L_IMN', (-50, 0, 0)), ('ESTRO/R_IMN', (50, 0, 0))):
+            sphere = vtk.vtkSphereSource()
+            sphere.SetCenter(centre)
+            sphere.SetRadius(10)
+            sphere.Update()
+            modelNode = slicer.modules.models.logic().AddModel(sphere.GetOutput())
+            modelNode.SetName(key.split('/')[1])
+            self.assertTrue(slicer.util.saveNode(modelNode, os.path.join(sceneDirectory, modelNode.GetName() + '.vtk')))
+            atlasNodes[key] = modelNode
+        leftNode, rightNode = atlasNodes['ESTRO/L_IMN'], atlasNodes['ESTRO/R_IMN']
+        self.assertEqual(logic.instanceMirrorPairs(atlasNodes), [('ESTRO/L_IMN', 'ESTRO/R_IMN')])
+        self.assertIs(rightNode.GetPolyData(), leftNode.GetPolyData())
+        transformNode = rightNode.GetParentTransformNode()
+        decimatedNode = logic.buildDecimatedSurface(rightNode, 100)
+
+        # the same save event handlers as the module widget
+        transformNodes = {}
+        onStartSave = lambda caller, event: transformNodes.update(
+            logic.restoreMirrorPairs(atlasNodes, [('ESTRO/L_IMN', 'ESTRO/R_IMN')]))
+        onEndSave = lambda caller, event: logic.reinstanceMirrorPairs(atlasNodes, transformNodes)
+        observations = [slicer.mrmlScene.AddObserver(slicer.mrmlScene.StartSaveEvent, onStartSave),
+                        slicer.mrmlScene.AddObserver(slicer.mrmlScene.EndSaveEvent, onEndSave)]
+        sceneBundlePath = os.path.join(sceneDirectory, 'scene.mrb')
+        try:
+            self.assertTrue(slicer.util.saveScene(sceneBundlePath))
+        finally:
+            for tag in observations:
+                slicer.mrmlScene.RemoveObserver(tag)
+
+        # the right model shares the left surface again, and the decimated copy still observes the transform
+        self.assertIs(rightNode.GetPolyData(), leftNode.GetPolyData())
+        self.assertIs(rightNode.GetParentTransformNode(), transformNode)
+        self.assertIs(decimatedNode.GetParentTransformNode(), transformNode)
+        self.assertGreater(logic.worldSurface(decimatedNode).GetCenter()[0], 0)
+
+        # the bundle has the right surface on the right side and no reflection transform
+        bundleDirectory = os.path.join(sceneDirectory, 'bundle')
+        scenePath = logic.extractSceneBundle(sceneBundlePath, bundleDirectory)
+        self.assertNotIn(transformNode.GetName(), open(scenePath, encoding='utf-8').read())
+        rightPaths = [os.path.join(root, fileName) for root, dirs, files in os.walk(bundleDirectory)
+                      for fileName in files if fileName.startswith('R_IMN')]
+        self.assertEqual(len(rightPaths), 1)
+        # read as a model, the file may be in LPS coordinates
+        self.assertAlmostEqual(slicer.util.loadModel(rightPaths[0]).GetPolyData().GetCenter()[0], 50, places=3)
+        shutil.rmtree(sceneDirectory, ignore_errors=True)
+        self.delayDisplay('Test passed')
+
+    def test_SLNPointCloud(self):
+        """
+        The SLN point cloud is a model of the scene that is not saved, coloured per SLN field, and it is removed with
+        the scene
+        """
+        self.delayDisplay("Starting the SLN point cloud test")
+        logic = BreastCancerAtlasLogic()
+        nodeRoles = logic.loadNodeRoles()
+        atlasNodes = {}
+        for item, positions in (('rics', [(10, 0, 0), (12, 0, 0)]), ('lics', [(-10, 0, 0)])):
+            markupsNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLMarkupsFiducialNode', item)
+            for position in positions:
+                markupsNode.AddControlPoint(position)
+            atlasNodes['atlasSLNMarkups/' + item] = markupsNode
+        polyData, itemPointIds = logic.buildSLNPointCloud(atlasNodes, nodeRoles['items'])
+        self.assertEqual(itemPointIds, {'rics': [0, 1], 'lics': [2]})
+        pointCloud = BreastCancerAtlasSLNPointCloud(polyData, itemPointIds)
+        self.assertIs(pointCloud.modelNode.GetScene(), slicer.mrmlScene)
+        self.assertFalse(pointCloud.modelNode.GetSaveWithScene())
+
+        pointCloud.setColour('rics', (1, 0, 0))
+        colours = polyData.GetPointData().GetArray(SLN_COLOUR_ARRAY)
+        self.assertEqual([colours.GetTuple3(pointId) for pointId in (0, 1)], [(255, 0, 0)] * 2)
+        self.assertNotEqual(colours.GetTuple3(2), (255, 0, 0))
+        pointCloud.setVisibility(False)
+        self.assertFalse(pointCloud.modelNode.GetDisplayNode().GetVisibility())
+
+        # nothing is left in the view once the scene is closed
+        slicer.mrmlScene.Clear(0)
+        self.assertIsNone(pointCloud.modelNode.GetScene())
+        pointCloud.cleanup()
+        self.delayDisplay('Test passed')
+
+    def test_ViewStateReconciler(self):
+        """
+        A toggle only changes the display nodes of the view state field it changes, and a toggle that leaves the view
+        state as it is does not change the scene
+        """
+        self.delayDisplay("Starting the view state reconciler test")
+        calls = []
+        widget = self.createStubWidget(calls)
+        widget.appliedViewState = widget.desiredViewState()
+
+        def toggle(parameter, value="true"):
+            del calls[:]
+            widget._parameterNode.SetParameter(parameter, value)
+            widget.process()
+            return sorted(set((name, method, args) for name, method, args in calls))
+
+        self.assertEqual(toggle("SLNVolVis"), [('lsc display', 'SetVisibility', (True,)),
+                                               ('rsc display', 'SetVisibility', (True,))])
+        self.assertEqual(toggle("repSLNVis"), [('rics display', 'SetVisibility', (False,))])
+        self.assertEqual(toggle("latDorVis"), [('latDorSeg display', 'SetVisibility', (True,))])
+        self.assertEqual(toggle("pecMajVis"), [('pecMajSeg display', 'SetSegmentVisibility', ('Segment_1', True))])
+        self.assertEqual(toggle("RbVis"), [('Rb0 display', 'SetVisibility', (True,)),
+                                           ('Rb1 display', 'SetVisibility', (True,)),
+                                           ('rightBreast display', 'SetVisibility', (True,)),
+                                           ('rightBreastLabel display', 'SetVisibility', (True,))])
+        # the hover preview only ends a preview, none is shown
+        self.assertEqual(toggle("hoverPreview"), [])
+        self.assertEqual(toggle("hoverPreview", "false"), [])
+        # an ESTRO contour part is only changed while the ESTRO contours are shown
+        self.assertEqual(toggle("L2Vis"), [])
+        widget._parameterNode.SetParameter("ESTROVis", "true")
+        widget.appliedViewState = widget.desiredViewState()
+        self.assertEqual(toggle("L3Vis"), [('ESTRO_L_L3', 'SetVisibility', (True,)),
+                                           ('ESTRO_R_L3', 'SetVisibility', (True,))])
+        self.assertEqual(toggle("L2Vis", "false"), [('ESTRO_L_L2', 'SetVisibility', (False,)),
+                                                    ('ESTRO_R_L2', 'SetVisibility', (False,))])
+        self.delayDisplay('Test passed')
+
+    def test_ToggleCoalescing(self):
+        """
+        The toggles made in one event loop turn, like the two buttons of a radio button switch, update the parameter
+        node and the atlas once
+        """
+        self.delayDisplay("Starting the toggle coalescing test")
+        widget = self.createStubWidget([])
+        # the check boxes and radio buttons of the module GUI, each radio button group in its own box
+        uiWidget = qt.QWidget()
+        groups = {'method': ['bayesianButton', 'bootstrappingButton', 'frequentistButton'],
+                  'label': ['numberLabelButton', 'nameLabelButton', 'noLabelButton']}
+        for names in groups.values():
+            groupBox = qt.QWidget(uiWidget)
+            for name in names:
+                qt.QRadioButton(groupBox).objectName = name
+        for name in ['leftBreast', 'rightBreast', 'pectoralisMajor', 'pectoralisMinor', 'latissimusDorsi',
+                     'repSLNOnly', 'ESTRO', 'greenSLN', 'SLNFieldModel', 'hoverPreview'] + ESTRO_PARTS:
+            qt.QCheckBox(uiWidget).objectName = name + 'CheckBox'
+        widget.ui = slicer.util.childWidgetVariables(uiWidget)
+        widget.ui.bayesianButton.checked = True
+        widget.ui.nameLabelButton.checked = True
+        # the view states the atlas is updated to
+        processed = []
+        widget.process = lambda: processed.append(widget.desiredViewState())
+        widget.updateParameterNodeFromGUI()
+        del processed[:]
+
+        widget.parameterNodeUpdateTimer = qt.QTimer()
+        widget.parameterNodeUpdateTimer.setSingleShot(True)
+        widget.parameterNodeUpdateTimer.setInterval(0)
+        widget.parameterNodeUpdateTimer.connect('timeout()', widget.applyScheduledParameterNodeUpdate)
+        widget.methodTriggers = set(groups['method'])
+        for names in groups.values():
+            for name in names:
+                widget.connectParameterWidget(getattr(widget.ui, name))
+        widget.connectParameterWidget(widget.ui.leftBreastCheckBox)
+        widget.connectParameterWidget(widget.ui.rightBreastCheckBox)
+
+        # switching the analysis unchecks one button and checks another
+        widget.ui.bootstrappingButton.click()
+        self.assertEqual(sorted(widget.scheduledUpdateTriggers), ['bayesianButton', 'bootstrappingButton'])
+        self.assertEqual(processed, [])
+        self.assertIsNotNone(widget.methodSwitchTime)
+        slicer.app.processEvents()
+        self.assertEqual([state.method for state in processed], ['bootstrapping'])
+        self.assertEqual(widget.scheduledUpdateTriggers, [])
+        self.assertIsNone(widget.methodSwitchTime)
+
+        # check boxes toggled together are applied together
+        del processed[:]
+        widget.ui.leftBreastCheckBox.checked = True
+        widget.ui.rightBreastCheckBox.checked = True
+        slicer.app.processEvents()
+        self.assertEqual([(state.leftBreast, state.rightBreast) for state in processed], [(True, True)])
+        self.assertIsNone(widget.methodSwitchTime)
+        self.delayDisplay('Test passed')
+
+    def test_HighlightTracking(self):
+        """
+        A new selection sets back only the item highlighted before and highlights the pressed one, while setting the
+        colours back resets every item
+        """
+        self.delayDisplay("Starting the highlight tracking test")
+        calls = []
+        widget = self.createStubWidget(calls)
+        red = ('SetColor', (1, 0, 0))
+        restored = ('SetColor', BREAST_REGION_COLOUR)
+
+        def press(item):
+            del calls[:]
+            widget.pressed = item
+            widget.updateHighlight()
+            return [(name, method, args) for name, method, args in calls]
+
+        self.assertEqual(press('Rb0'), [('Rb0 display',) + red])
+        self.assertEqual(press('Rb1'), [('Rb0 display',) + restored, ('Rb1 display',) + red])
+        self.assertEqual(press('rics'), [('Rb1 display',) + restored,
+                                         ('rics display', 'SetSelectedColor', (1, 0, 0))])
+        self.assertEqual(widget.highlightedItems, {'rics'})
+        # pressing the same item again only keeps it red
+        self.assertEqual(press('rics'), [('rics display', 'SetSelectedColor', (1, 0, 0))])
+        press('Lb0')
+        self.assertEqual(calls[0], ('rics display', 'SetSelectedColor', SLN_FIELD_COLOURS['ics']))
+
+        del calls[:]
+        widget.clearNode = "true"
+        widget.SetColoursBack()
+        self.assertEqual(sorted(name for name, method, args in calls),
+                         ['Lb0 display', 'Rb0 display', 'Rb1 display', 'rics display'])
+        self.assertEqual(widget.highlightedItems, set())
+        self.delayDisplay('Test passed')
+
+    def test_ViewManager(self):
+        """
+        Switching to the layout or the table already shown does not rebuild the views or propagate the table again
+        """
+        self.delayDisplay("Starting the view manager test")
+        viewManager = BreastCancerAtlasViewManager()
+        layoutManager = slicer.app.layoutManager()
+        viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+        layouts = []
+        onLayoutChanged = layouts.append
+        layoutManager.connect('layoutChanged(int)', onLayoutChanged)
+        try:
+            self.assertFalse(viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView))
+            self.assertFalse(viewManager.isTableViewShown())
+            self.assertTrue(viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpTableView))
+            self.assertFalse(viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpTableView))
+            self.assertEqual(layouts, [slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpTableView])
+            self.assertTrue(viewManager.isTableViewShown())
+        finally:
+            layoutManager.disconnect('layoutChanged(int)', onLayoutChanged)
+
+        tableNode = self.createTableNode('BreastCancerAtlasTestTable', ['Name'], [['Rb0']])
+        otherTableNode = self.createTableNode('BreastCancerAtlasTestOtherTable', ['Name'], [['Lb0']])
+        tableViewNode = layoutManager.activeMRMLTableViewNode()
+        self.assertTrue(viewManager.showTable(tableNode))
+        self.assertEqual(tableViewNode.GetTableNodeID(), tableNode.GetID())
+        self.assertFalse(viewManager.showTable(tableNode))
+        self.assertTrue(viewManager.showTable(otherTableNode))
+        self.assertEqual(tableViewNode.GetTableNodeID(), otherTableNode.GetID())
+        # a table shown by another module is replaced
+        tableViewNode.SetTableNodeID(tableNode.GetID())
+        self.assertTrue(viewManager.showTable(otherTableNode))
+        self.assertEqual(tableViewNode.GetTableNodeID(), otherTableNode.GetID())
+        viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+        self.delayDisplay('Test passed')
+
+    def test_RegionMesh(self):
+        """
+        The breast regions of each side are merged into one model whose cells hold their region in REGION_ID_ARRAY.
+        Highlighting a region makes its colour table entry red and restoring it sets back the region colour, the
+        other entries stay as they are.
+        """
+        self.delayDisplay("Starting the region mesh test")
+        widget = self.createStubWidget([])
+        widget.logic = BreastCancerAtlasLogic()
+        widget.interactionNodes = []
+        widget.regionMeshItems = {}
+        widget.threeDView = slicer.app.layoutManager().threeDWidget(0).threeDView()
+        widget.atlasItems = {item: descriptor for item, descriptor in widget.atlasItems.items()
+                             if 'region' in descriptor}
+        colours = {'Rb0': (0.2, 0.4, 0.6), 'Rb1': (0.8, 0.6, 0.4), 'Lb0': (0.4, 0.8, 0.2)}
+        centres = {'Rb0': (50, 0, 0), 'Rb1': (50, 30, 0), 'Lb0': (-50, 0, 0)}
+        cells = {}
+        for item, descriptor in widget.atlasItems.items():
+            modelNode = self.createSphereModel(item, centres[item], colours[item])
+            widget.atlasNodes[descriptor['highlight'][0]['node']] = modelNode
+            cells[item] = modelNode.GetPolyData().GetNumberOfCells()
+        widget.useRegionMeshes()
+        try:
+            rightMesh, leftMesh = widget.regionMeshes['right'], widget.regionMeshes['left']
+            np.testing.assert_array_equal(slicer.util.arrayFromModelCellData(rightMesh, REGION_ID_ARRAY),
+                                          [0] * cells['Rb0'] + [1] * cells['Rb1'])
+            np.testing.assert_array_equal(slicer.util.arrayFromModelCellData(leftMesh, REGION_ID_ARRAY),
+                                          [0] * cells['Lb0'])
+            self.assertEqual(widget.regionMeshItems, {(rightMesh.GetID(), 0): 'Rb0', (rightMesh.GetID(), 1): 'Rb1',
+                                                      (leftMesh.GetID(), 0): 'Lb0'})
+            self.assertEqual(rightMesh.GetDisplayNode().GetActiveScalarName(), REGION_ID_ARRAY)
+            for item, descriptor in widget.atlasItems.items():
+                self.assertFalse(widget.atlasNodes[descriptor['highlight'][0]['node']].GetDisplayNode().GetVisibility())
+
+            lookupTable = rightMesh.GetDisplayNode().GetColorNode().GetLookupTable()
+            entries = lambda: [lookupTable.GetTableValue(region) for region in range(2)]
+            # the table entries are stored as bytes
+            np.testing.assert_allclose(entries(), [colours['Rb0'] + (1.0,), colours['Rb1'] + (1.0,)], atol=1 / 255)
+            shown = entries()
+            widget.highlightAtlasItem('Rb1')
+            np.testing.assert_allclose(entries(), [shown[0], (1.0, 0.0, 0.0, 1.0)])
+            widget.restoreAtlasItem('Rb1')
+            np.testing.assert_allclose(entries(), shown)
+        finally:
+            widget.removeObservers()
+        self.delayDisplay('Test passed')
+
+    def test_FieldVolumeMesh(self):
+        """
+        The SLN field volumes are merged into one model whose cells hold their field in FIELD_ID_ARRAY, shown like
+        the field volumes were. Showing or hiding a field volume only changes the alpha of its colour table entry.
+        """
+        self.delayDisplay("Starting the field volume mesh test")
+        widget = self.createStubWidget([])
+        widget.logic = BreastCancerAtlasLogic()
+        widget.interactionNodes = []
+        widget.fieldVolumeRoles = ['rsc', 'lsc']
+        cells = []
+        for role, centre, colour in (('rsc', (50, 0, 0), (0.2, 0.4, 0.6)), ('lsc', (-50, 0, 0), (0.8, 0.6, 0.4))):
+            modelNode = self.createSphereModel(role, centre, colour)
+            modelNode.GetDisplayNode().SetOpacity(0.4)
+            widget.atlasNodes['fieldVolumes/' + role] = modelNode
+            cells.append(modelNode.GetPolyData().GetNumberOfCells())
+        widget.useFieldVolumeMesh()
+        meshDisplayNode = widget.fieldVolumeMesh.GetDisplayNode()
+        np.testing.assert_array_equal(slicer.util.arrayFromModelCellData(widget.fieldVolumeMesh, FIELD_ID_ARRAY),
+                                      [0] * cells[0] + [1] * cells[1])
+        self.assertEqual(meshDisplayNode.GetActiveScalarName(), FIELD_ID_ARRAY)
+        self.assertAlmostEqual(meshDisplayNode.GetOpacity(), 0.4)
+        self.assertTrue(meshDisplayNode.GetVisibility())
+        for displayNode in widget.atlasDisplayNodes('fieldVolumes'):
+            self.assertFalse(displayNode.GetVisibility())
+
+        lookupTable = meshDisplayNode.GetColorNode().GetLookupTable()
+        shown = [lookupTable.GetTableValue(index) for index in range(2)]
+        widget.setFieldVolumeVisibility('lsc', False)
+        self.assertEqual([lookupTable.GetTableValue(index) for index in range(2)], [shown[0], shown[1][:3] + (0.0,)])
+        widget.setFieldVolumeVisibility('lsc', True)
+        self.assertEqual([lookupTable.GetTableValue(index) for index in range(2)], shown)
+
+        # the field volume check box shows and hides the merged mesh
+        widget.appliedViewState = widget.desiredViewState()
+        widget._parameterNode.SetParameter("SLNVolVis", "true")
+        widget.process()
+        self.assertTrue(meshDisplayNode.GetVisibility())
+        widget._parameterNode.SetParameter("SLNVolVis", "false")
+        widget.process()
+        self.assertFalse(meshDisplayNode.GetVisibility())
+        for displayNode in widget.atlasDisplayNodes('fieldVolumes'):
+            self.assertFalse(displayNode.GetVisibility())
+        self.delayDisplay('Test passed')
+
+    def test_LevelOfDetail(self):
+        """
+        A camera drag in the 3D view shows the decimated copies of the shown surfaces, with their colour, opacity and
+        segment visibility, and the release shows the full surfaces again. Hidden surfaces stay hidden.
+        """
+        self.delayDisplay("Starting the level of detail test")
+        logic = BreastCancerAtlasLogic()
+        threeDView = slicer.app.layoutManager().threeDWidget(0).threeDView()
+        modelNode = self.createSphereModel('shown', (50, 0, 0), (0.2, 0.4, 0.6))
+        modelNode.GetDisplayNode().SetOpacity(0.5)
+        hiddenNode = self.createSphereModel('hidden', (-50, 0, 0), (0.8, 0.6, 0.4))
+        hiddenNode.GetDisplayNode().SetVisibility(False)
+        segmentationNode = self.createSegmentationNode('segments', ['shownSegment', 'hiddenSegment'])
+        segmentationNode.CreateDefaultDisplayNodes()
+        segmentationDisplayNode = segmentationNode.GetDisplayNode()
+        segmentation = segmentationNode.GetSegmentation()
+        segmentationDisplayNode.SetSegmentVisibility(segmentation.GetNthSegmentID(1), False)
+        segmentationDisplayNode.SetOpacity3D(0.7)
+
+        cameraMotion = BreastCancerAtlasCameraMotion(threeDView)
+        levelOfDetail = BreastCancerAtlasLevelOfDetail(
+            logic, [(modelNode, 100), (hiddenNode, 100), (segmentationNode, 100)], threeDView, cameraMotion)
+        decimated = {node.GetName(): copy.GetDisplayNode() for node, copy in levelOfDetail.levels}
+        for displayNode in decimated.values():
+            self.assertFalse(displayNode.GetVisibility())
+        interactor = threeDView.interactor()
+        try:
+            # a click is not a camera motion
+            interactor.SetEventPosition(100, 100)
+            cameraMotion.onButtonPressed(interactor, None)
+            cameraMotion.onButtonReleased(interactor, None)
+            self.assertEqual(levelOfDetail.swapped, [])
+
+            cameraMotion.onButtonPressed(interactor, None)
+            interactor.SetEventPosition(120, 100)
+            cameraMotion.onMouseMoved(interactor, None)
+            self.assertFalse(modelNode.GetDisplayNode().GetVisibility3D())
+            self.assertTrue(decimated['shown'].GetVisibility())
+            self.assertEqual(decimated['shown'].GetColor(), modelNode.GetDisplayNode().GetColor())
+            self.assertAlmostEqual(decimated['shown'].GetOpacity(), 0.5)
+            self.assertFalse(decimated['hidden'].GetVisibility())
+            self.assertTrue(hiddenNode.GetDisplayNode().GetVisibility3D())
+            self.assertFalse(segmentationDisplayNode.GetVisibility3D())
+            self.assertTrue(decimated['segments'].GetVisibility())
+            self.assertAlmostEqual(decimated['segments'].GetOpacity(), 0.7)
+            lookupTable = decimated['segments'].GetColorNode().GetLookupTable()
+            segmentColour = segmentation.GetNthSegment(0).GetColor()
+            np.testing.assert_allclose(lookupTable.GetTableValue(0), tuple(segmentColour) + (1.0,), atol=1 / 255)
+            self.assertEqual(lookupTable.GetTableValue(1)[3], 0.0)
+
+            cameraMotion.onButtonReleased(interactor, None)
+            self.assertEqual(levelOfDetail.swapped, [])
+            for node in (modelNode, hiddenNode, segmentationNode):
+                self.assertTrue(node.GetDisplayNode().GetVisibility3D())
+                self.assertFalse(decimated[node.GetName()].GetVisibility())
+            self.assertTrue(modelNode.GetDisplayNode().GetVisibility())
+            self.assertFalse(hiddenNode.GetDisplayNode().GetVisibility())
+        finally:
+            levelOfDetail.cleanup()
+            cameraMotion.cleanup()
+        self.delayDisplay('Test passed')
+
+    def test_RenderingProfile(self):
+        """
+        Depth peeling is off without translucent actors, and uses more peels as more translucent actors are shown,
+        within the minimum and maximum number of peels. While the camera moves fewer peels are used.
+        """
+        self.delayDisplay("Starting the rendering profile test")
+        threeDView = slicer.app.layoutManager().threeDWidget(0).threeDView()
+        cameraMotion = BreastCancerAtlasCameraMotion(threeDView)
+        # a view node of its own, so that the settings of the 3D view are left as they are
+        viewNode = slicer.vtkMRMLViewNode()
+        profile = BreastCancerAtlasRenderingProfile(threeDView, viewNode, cameraMotion)
+        try:
+            self.assertEqual([profile.fullQualityProfile(actors) for actors in (0, 1, 4, 6, 8, 20)],
+                             [(False, 0, 0.0), (True, 4, 0.0), (True, 4, 0.0), (True, 6, 0.0), (True, 8, 0.0),
+                              (True, 8, 0.0)])
+            currentProfile = lambda: (bool(viewNode.GetUseDepthPeeling()), viewNode.GetMaximumNumberOfPeels(),
+                                      viewNode.GetOcclusionRatio())
+
+            translucentActors = profile.countTranslucentActors()
+            modelNodes = []
+            for index in range(5):
+                modelNode = self.createSphereModel('sphere%d' % index, (30 * index, 0, 0), (0.2, 0.4, 0.6))
+                modelNode.GetDisplayNode().SetOpacity(0.5)
+                modelNodes.append(modelNode)
+            slicer.util.forceRenderAllViews()
+            self.assertEqual(profile.countTranslucentActors(), translucentActors + 5)
+            profile.update()
+            self.assertEqual(currentProfile(), profile.fullQualityProfile(translucentActors + 5))
+
+            profile.onMotionStarted()
+            self.assertEqual(currentProfile(), (True, profile.interactivePeels, profile.interactiveOcclusionRatio))
+            # a change made while the camera moves is applied once it stops
+            modelNodes[0].GetDisplayNode().SetVisibility(False)
+            slicer.util.forceRenderAllViews()
+            profile.update()
+            self.assertEqual(currentProfile(), (True, profile.interactivePeels, profile.interactiveOcclusionRatio))
+            profile.onMotionStopped()
+            self.assertEqual(currentProfile(), profile.fullQualityProfile(translucentActors + 4))
+
+            for modelNode in modelNodes:
+                modelNode.GetDisplayNode().SetOpacity(1.0)
+            slicer.util.forceRenderAllViews()
+            profile.update()
+            self.assertEqual(currentProfile(), profile.fullQualityProfile(translucentActors))
+        finally:
+            profile.cleanup()
+            cameraMotion.cleanup()
+        self.delayDisplay('Test passed')
+
+    def test_StatisticsSideFile(self):
+        """
+        The statistics table of an item is merged from the side file like from the table nodes, and only once, when
+        it is first shown. Switching the analysis only changes the columns shown.
+        """
+        self.delayDisplay("Starting the statistics side file test")
+        sourceTables = {
+            'bayesian': (['Name', 'Probability (%)', '95% Credible interval'], [['lsc', '23%', '15-31'],
+                                                                               ['med', '<1%', '0-1']]),
+            'bootstrapping': (['Name', 'Probability (%)', '95% Confidence interval'], [['lsc', '22%', '14-30'],
+                                                                                      ['med', '1%', '0-2']]),
+            'frequentist': (['Name', 'Probability (%)'], [['lsc', '24%']]),
+        }
+        atlasNodes = {method + 'Tables/Rb0': self.createTableNode(method + 'Rb0', columnNames, rows)
+                      for method, (columnNames, rows) in sourceTables.items()}
+        tableLogic = BreastCancerAtlasLogic()
+        statisticsPath = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestStatistics.json.gz')
+        tableLogic.writeStatisticsFile(atlasNodes, statisticsPath)
+        fileLogic = BreastCancerAtlasLogic()
+        self.assertFalse(fileLogic.loadStatisticsFile(statisticsPath + '.missing'))
+        self.assertTrue(fileLogic.loadStatisticsFile(statisticsPath))
+
+        def tableContent(tableNode):
+            table = tableNode.GetTable()
+            columns = []
+            for column in range(table.GetNumberOfColumns()):
+                name = tableNode.GetColumnName(column)
+                columns.append((name, tableNode.GetColumnTitle(name), tableNode.GetColumnProperty(name, 'method'),
+                                [tableNode.GetCellText(row, column) for row in range(tableNode.GetNumberOfRows())]))
+            return columns
+
+        expected = tableContent(tableLogic.mergeStatisticsTables(atlasNodes, 'Rb0'))
+        self.assertEqual(expected, [
+            ('Name', 'Name', '', ['lsc', 'med']),
+            ('Probability (%) (Bayesian)', 'Probability (%)', 'bayesian', ['23%', '<1%']),
+            ('95% Credible interval (Bayesian)', '95% Credible interval', 'bayesian', ['15-31', '0-1']),
+            ('Probability (%) (Bootstrapping)', 'Probability (%)', 'bootstrapping', ['22%', '1%']),
+            ('95% Confidence interval (Bootstrapping)', '95% Confidence interval', 'bootstrapping', ['14-30', '0-2']),
+            ('Probability (%) (Frequentist)', 'Probability (%)', 'frequentist', ['24%', ''])])
+        # the table nodes are not needed once the side file is read
+        for tableNode in atlasNodes.values():
+            slicer.mrmlScene.RemoveNode(tableNode)
+        self.assertEqual(tableContent(fileLogic.mergeStatisticsTables({}, 'Rb0')), expected)
+
+        widget = self.createStubWidget([])
+        widget.logic = fileLogic
+        widget.atlasNodes = {}
+        widget.columnUpdateTimer = qt.QTimer()
+        widget.columnUpdateTimer.setSingleShot(True)
+        widget.columnUpdateTimer.setInterval(0)
+        widget.columnUpdateTimer.connect('timeout()', widget.hideOtherMethodColumns)
+        widget.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpTableView)
+        tableView = slicer.app.layoutManager().tableWidget(0).tableView()
+        try:
+            tableCount = slicer.mrmlScene.GetNumberOfNodesByClass('vtkMRMLTableNode')
+            for method in ['bootstrapping', 'frequentist', 'bootstrapping']:
+                widget.showStatisticsTable('Rb0', method)
+                slicer.app.processEvents()
+                self.assertEqual(slicer.mrmlScene.GetNumberOfNodesByClass('vtkMRMLTableNode'), tableCount + 1)
+                self.assertEqual(tableContent(widget.tableNode), expected)
+                self.assertEqual(tableView.mrmlTableNode().GetID(), widget.tableNode.GetID())
+                hidden = [columnMethod != method for name, title, columnMethod, cells in expected[1:]]
+                self.assertEqual([tableView.isColumnHidden(column) for column in range(len(expected))],
+                                 [False] + hidden)
+        finally:
+            widget.columnUpdateTimer.stop()
+            widget.removeObservers()
+            widget.viewManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutOneUp3DView)
+        self.delayDisplay('Test passed')
+
+    def createStubWidget(self, calls):
+        """
+        Return an atlas widget without its GUI, with a parameter node in the scene and a small atlas of recording
+        nodes: a breast region and a SLN field on each side. The calls made to the nodes are appended to calls.
+        """
+        widget = BreastCancerAtlasWidget(slicer.qMRMLWidget())
+        widget._parameterNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLScriptedModuleNode')
+        widget.profileInteractions = False
+        widget.batchSceneModifications = True
+        widget.renderingProfile = None
+        widget.slnPointCloud = None
+        widget.fieldVolumeMesh = None
+        widget.regionMeshes = {}
+        widget.previewedItem = None
+        widget.atlasItems = {
+            'Rb0': {'region': 0, 'side': 'right', 'highlight': [{'node': 'rightRegions/Rb0'}]},
+            'Rb1': {'region': 1, 'side': 'right', 'highlight': [{'node': 'rightRegions/Rb1'}]},
+            'Lb0': {'region': 0, 'side': 'left', 'highlight': [{'node': 'leftRegions/Lb0'}]},
+            'rics': {'field': 'ics', 'side': 'right', 'highlight': [{'node': 'atlasSLNMarkups/rics'}]},
+        }
+        keys = ['rightRegions/Rb0', 'rightRegions/Rb1', 'leftRegions/Lb0', 'atlasSLNMarkups/rics',
+                'fieldVolumes/rsc', 'fieldVolumes/lsc', 'breasts/rightBreast', 'breasts/leftBreast']
+        widget.atlasNodes = {key: BreastCancerAtlasRecordingNode(key.split('/')[1], calls) for key in keys}
+        widget.breastSurfaces = {'right': ['breasts/rightBreast'], 'left': ['breasts/leftBreast']}
+        # the right regions share a label markups node, like the regions of a breast in the atlas
+        rightLabel = BreastCancerAtlasRecordingNode('rightBreastLabel', calls)
+        widget.labelMarkups = {'Rb0': rightLabel, 'Rb1': rightLabel,
+                               'Lb0': BreastCancerAtlasRecordingNode('leftBreastLabel', calls),
+                               'rics': BreastCancerAtlasRecordingNode('ricsLabel', calls)}
+        widget.labelNodes = [node for markupsNode in widget.labelMarkups.values()
+                             for node in (markupsNode, markupsNode.GetDisplayNode())]
+        widget.highlightActions = {}
+        widget.restoreActions = {}
+        widget.highlightNodes = {}
+        for item, descriptor in widget.atlasItems.items():
+            displayNode = widget.atlasNodes[descriptor['highlight'][0]['node']].GetDisplayNode()
+            widget.highlightNodes[item] = [displayNode]
+            if 'field' in descriptor:
+                widget.highlightActions[item] = [functools.partial(displayNode.SetSelectedColor, 1, 0, 0)]
+                widget.restoreActions[item] = [
+                    functools.partial(widget.restoreSLNColour, displayNode, descriptor['field'])]
+            else:
+                widget.highlightActions[item] = [functools.partial(displayNode.SetColor, 1, 0, 0)]
+                widget.restoreActions[item] = [functools.partial(displayNode.SetColor, *BREAST_REGION_COLOUR)]
+        for name in ('pecMajSeg', 'pecMinSeg', 'latDorSeg'):
+            setattr(widget, name + 'DisplayNode', BreastCancerAtlasRecordingNode(name, calls).GetDisplayNode())
+        for part in ESTRO_PARTS:
+            for side in ('L', 'R'):
+                name = 'ESTRO_%s_%s' % (side, part)
+                setattr(widget, name + '_DisplayNode', BreastCancerAtlasRecordingNode(name, calls))
+        return widget
+
+    def createSphereModel(self, name, centre, colour):
+        """
+        Return a model of a sphere of radius 10 mm at centre, shown in colour
+        """
+        sphere = vtk.vtkSphereSource()
+        sphere.SetCenter(centre)
+        sphere.SetRadius(10)
+        sphere.Update()
+        modelNode = slicer.modules.models.logic().AddModel(sphere.GetOutput())
+        modelNode.SetName(name)
+        modelNode.GetDisplayNode().SetColor(*colour)
+        return modelNode
+
+    def createSegmentationNode(self, name, segmentNames):
+        """
+        Return a segmentation stored as a labelmap, with one box shaped segment per name
+        """
+        voxels = np.zeros((10, 10, 10 * len(segmentNames)), np.uint8)
+        for index in range(len(segmentNames)):
+            voxels[2:8, 2:8, 10 * index + 2:10 * index + 8] = index + 1
+        labelmapNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLLabelMapVolumeNode', name + 'Labelmap')
+        slicer.util.updateVolumeFromArray(labelmapNode, voxels)
+        segmentationNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLSegmentationNode', name)
+        slicer.modules.segmentations.logic().ImportLabelmapToSegmentationNode(labelmapNode, segmentationNode)
+        segmentation = segmentationNode.GetSegmentation()
+        for index, segmentName in enumerate(segmentNames):
+            segmentation.GetNthSegment(index).SetName(segmentName)
+        slicer.mrmlScene.RemoveNode(labelmapNode)
+        return segmentationNode
+
+    def createTableNode(self, name, columnNames, rows):
+        tableNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLTableNode', name)
+        for index, columnName in enumerate(columnNames):
+            column = vtk.vtkStringArray()
+            column.SetName(columnName)
+            for row in rows:
+                column.InsertNextValue(row[index])
+            tableNode.GetTable().AddColumn(column)
+        return tableNode
+
+    def assertBinaryRoundTrip(self, atlasNodes, nodeRoles):
+        tableLogic = BreastCancerAtlasLogic()
+        tableLogic.buildProbabilityIndex(atlasNodes, nodeRoles)
+        statisticsPath = os.path.join(slicer.app.temporaryPath, 'BreastCancerAtlasTestStatistics.bin')
+        tableLogic.writeStatisticsBinary(statisticsPath)
+
+        binaryLogic = BreastCancerAtlasLogic()
+        self.assertTrue(binaryLogic.loadStatisticsBinary(nodeRoles, statisticsPath))
+        for tableLabels, binaryLabels in ((tableLogic.fieldGivenRegionLabels, binaryLogic.fieldGivenRegionLabels),
+                                          (tableLogic.regionGivenFieldLabels, binaryLogic.regionGivenFieldLabels)):
+            self.assertTrue(tableLabels)
+            self.assertEqual(set(tableLabels), set(binaryLabels))
+            for key, label in tableLabels.items():
+                self.assertEqual(label.encode(), binaryLabels[key].encode(), key)
+        np.testing.assert_array_equal(tableLogic.fieldGivenRegion, binaryLogic.fieldGivenRegion)
+        np.testing.assert_array_equal(tableLogic.regionGivenField, binaryLogic.regionGivenField)
+
+        # the labels shown are the ones the atlas showed when it read the table cells itself
+        items = nodeRoles['items']
+        for method in STATISTICS_METHODS:
+            for pressed in items:
+                expectedLabels = self.baselineControlPointLabels(tableLogic, atlasNodes, nodeRoles, pressed, method)
+                for logic in (tableLogic, binaryLogic):
+                    labels = logic.controlPointLabels(items, pressed, method)
+                    self.assertEqual({name: label.encode() for name, label in labels.items()},
+                                     {name: label.encode() for name, label in expectedLabels.items()},
+                                     (pressed, method))
+
+    def baselineControlPointLabels(self, logic, atlasNodes, nodeRoles, pressed, method):
+        """
+        Return the control point labels the atlas showed for a pressed item before the cells were parsed, read from
+        the rows of its statistics table: a label per non-empty cell of the items of its side and, for a breast
+        region, empty labels for the SLN fields of the other side
+        """
+        items = nodeRoles['items']
+        side = items[pressed]['side']
+        if 'region' in items[pressed]:
+            rowItems = {rowName: name for rowName, field in nodeRoles['fields'].items()
+                        for name, descriptor in items.items()
+                        if descriptor.get('field') == field and descriptor['side'] == side}
+            labels = {name: '' for name, descriptor in items.items()
+                      if 'field' in descriptor and descriptor['side'] != side}
+        else:
+            rowItems = {str(descriptor['region']): name for name, descriptor in items.items()
+                        if 'region' in descriptor and descriptor['side'] == side}
+            labels = {}
+        columnNames, rows = logic.readStatisticsTable(atlasNodes, method + 'Tables/' + pressed)
+        for row in rows:
+            if row[0] in rowItems and row[1].strip():
+                labels[rowItems[row[0]]] = self.baselineLabel(row[1])
+        return labels
@@ -0,0 +1,33 @@
+"""
+Batch query of the breast cancer atlas statistics, without the module GUI.
+
+Usage:
+    Slicer --no-main-window --python-script BatchQuery.py <queries.csv|queries.jsonl> <results.jsonl|->
+
+Each query gives the side ("left" or "right"), the breast region (0 to 12) and optionally the statistical
+analysis ("bayesian", "bootstrapping" or "frequentist", bayesian by default). Queries are read from a CSV file
+with a side,region,method header or from a JSON Lines file with one object per line. One JSON object is written
+per query, with the probability of drainage to each SLN field and its interval. Use - to write to the standard
+output.
+"""
+
+import sys
+
+import slicer
+
+from BreastCancerAtlas import BreastCancerAtlasLogic
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(__doc__)
+        return 1
+    inputPath, outputPath = argv
+    logic = BreastCancerAtlasLogic()
+    logic.loadAtlasStatistics()
+    logic.runBatchQuery(inputPath, outputPath)
+    return 0
+
+
+if __name__ == "__main__":
+    slicer.util.exit(main(sys.argv[1:]))
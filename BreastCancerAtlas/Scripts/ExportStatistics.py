@@ -0,0 +1,37 @@
+"""
+Export the statistics tables of the breast cancer atlas scene to the statistics side file, without the module GUI.
+
+Usage:
+    Slicer --no-main-window --python-script ExportStatistics.py <atlas.mrb> <statistics.json.gz|statistics.bin>
+
+Shipped as Resources/Atlas/statistics.json.gz next to the atlas scene, the side file replaces the 150 statistics
+tables of the scene: they are not loaded with the scene and a table is only created when it is shown.
+With a .bin output the probability estimates, intervals and labels of the tables are converted to the binary statistics
+file, shipped as Resources/Atlas/statistics.bin and memory-mapped instead of parsing the tables.
+"""
+
+import sys
+
+import slicer
+
+from BreastCancerAtlas import BreastCancerAtlasLogic
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(__doc__)
+        return 1
+    sceneBundlePath, statisticsPath = argv
+    logic = BreastCancerAtlasLogic()
+    nodeRoles = logic.loadNodeRoles()
+    atlasNodes = logic.loadStatisticsTables(sceneBundlePath, nodeRoles)
+    if statisticsPath.lower().endswith('.bin'):
+        logic.buildProbabilityIndex(atlasNodes, nodeRoles)
+        logic.writeStatisticsBinary(statisticsPath)
+    else:
+        logic.writeStatisticsFile(atlasNodes, statisticsPath)
+    return 0
+
+
+if __name__ == "__main__":
+    slicer.util.exit(main(sys.argv[1:]))
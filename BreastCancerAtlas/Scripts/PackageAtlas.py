@@ -0,0 +1,31 @@
+"""
+Package the breast cancer atlas scene for slower computers, without the module GUI.
+
+Usage:
+    Slicer --no-main-window --python-script PackageAtlas.py <input.mrb> <output.mrb> <report.csv>
+
+The surfaces of the atlas are decimated to the triangle budget of their group and their point coordinates are
+quantized and compressed, the segmentations are stored as closed surfaces only and the statistics tables are merged
+into one table. The file size, read time, memory and number of triangles of every atlas node before and after
+packaging are written to the report CSV file.
+"""
+
+import sys
+
+import slicer
+
+from BreastCancerAtlas import BreastCancerAtlasLogic
+
+
+def main(argv):
+    if len(argv) != 3:
+        print(__doc__)
+        return 1
+    inputPath, outputPath, reportPath = argv
+    logic = BreastCancerAtlasLogic()
+    logic.packageAtlas(inputPath, outputPath, reportPath)
+    return 0
+
+
+if __name__ == "__main__":
+    slicer.util.exit(main(sys.argv[1:]))